@@ -2,7 +2,7 @@ import { useState, useEffect } from 'react';
 import { Card, CardContent, CardHeader, CardTitle } from './ui/card';
 import { Cloud, CloudRain, Sun, Wind, Droplets } from 'lucide-react';
 import { Badge } from './ui/badge';
-import { fetchRegionWeather, forecastForDate, inferRegionFromAddress, summarizeRegionWeather } from '../services/backend';
+import { fetchRegionsWeather, forecastForDate, inferRegionFromAddress, summarizeRegionWeather } from '../services/backend';
 
 interface ExamRound {
   round: string;
@@ -51,11 +51,7 @@ export function WeatherInfo({ rounds }: WeatherInfoProps) {
 
     const loadWeather = async () => {
       setLoading(true);
-      const weatherMap: Record<string, Awaited<ReturnType<typeof fetchRegionWeather>>> = {};
-
-      for (const region of regions) {
-        weatherMap[region] = await fetchRegionWeather(region);
-      }
+      const weatherMap = await fetchRegionsWeather(regions);
 
       if (!isMounted) return;
 
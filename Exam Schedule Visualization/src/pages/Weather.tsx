@@ -8,7 +8,7 @@ import { Button } from '../components/ui/button';
 import { Calendar } from '../components/ui/calendar';
 import { Certification } from '../utils/certificationParser';
 import { formatDate, getDaysUntil, getWeatherEmoji } from '../utils/dateUtils';
-import { fetchRegionWeather, forecastForDate, inferRegionFromAddress, MidWeatherResponse, summarizeRegionWeather } from '../services/backend';
+import { fetchRegionsWeather, forecastForDate, inferRegionFromAddress, MidWeatherResponse, summarizeRegionWeather } from '../services/backend';
 import { Label } from '../components/ui/label';
 import { Select, SelectContent, SelectItem, SelectTrigger, SelectValue } from '../components/ui/select';
 
@@ -87,18 +87,18 @@ export function Weather({ certifications }: WeatherProps) {
     const regions = new Set<string>([activeRegion]);
     examDates.forEach(exam => regions.add(exam.region));
 
-    regions.forEach(region => {
-      if (!region || weatherByRegion[region] !== undefined) return;
-      setWeatherLoading(true);
-      fetchRegionWeather(region)
-        .then(data => {
-          setWeatherByRegion(prev => ({
-            ...prev,
-            [region]: data,
-          }));
-        })
-        .finally(() => setWeatherLoading(false));
-    });
+    const missing = Array.from(regions).filter(region => region && weatherByRegion[region] === undefined);
+    if (!missing.length) return;
+
+    setWeatherLoading(true);
+    fetchRegionsWeather(missing)
+      .then(data => {
+        setWeatherByRegion(prev => ({
+          ...prev,
+          ...data,
+        }));
+      })
+      .finally(() => setWeatherLoading(false));
   }, [activeRegion, examDates, weatherByRegion]);
 
   const selectedDateKey = toDateKey(selectedDate);
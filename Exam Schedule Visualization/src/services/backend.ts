@@ -345,6 +345,32 @@ export async function fetchRegionWeather(region: string): Promise<MidWeatherResp
   }
 }
 
+type MidWeatherAllResponse = {
+  tmFc?: string;
+  results?: MidWeatherResponse[];
+};
+
+export async function fetchRegionsWeather(regions: string[]): Promise<Record<string, MidWeatherResponse | null>> {
+  const weatherMap: Record<string, MidWeatherResponse | null> = {};
+  if (!regions.length) return weatherMap;
+
+  try {
+    const data = await fetchJson<MidWeatherAllResponse>(
+      `/weather/mid/all?regions=${encodeURIComponent(regions.join(','))}`,
+    );
+    (data.results ?? []).forEach((item) => {
+      weatherMap[item.region] = item;
+    });
+  } catch (error) {
+    console.warn('Failed to load weather for regions', regions, error);
+  }
+
+  regions.forEach((region) => {
+    if (!(region in weatherMap)) weatherMap[region] = null;
+  });
+  return weatherMap;
+}
+
 export function summarizeRegionWeather(weather: MidWeatherResponse | null): RegionWeatherSnapshot | null {
   if (!weather?.has_data) return null;
   const summary = weather.summary_day4;
@@ -0,0 +1,173 @@
+"""
+데이터셋에만 의존하는 카탈로그 API 응답을 정적 파일로 미리 만들어 두는 스크립트
+(정적 파일 서버/CDN이 바로 서빙 → 백엔드는 날씨/일정 같은 동적 API만 처리)
+
+대상:
+  /licenses/search?q={이름}          → licenses/search/{이름}.json
+  /licenses/schedule?name={이름}     → licenses/schedule/{이름}.json
+  /licenses/fee?name={이름}          → licenses/fee/{이름}.json
+  /terminals/regions                 → terminals/regions.json
+  /terminals/localities?sido={시도}  → terminals/localities/{시도}.json
+  /terminals/by-region?sido={시도}[&locality={시군구}]
+                                     → terminals/by-region/{시도}.json, terminals/by-region/{시도}/{시군구}.json
+  (이름은 URL 인코딩해서 파일명으로 사용)
+
+출력 구조:
+  {out}/{데이터셋 지문}/...json, ...json.gz, ...json.br(brotli 있으면)
+  {out}/{데이터셋 지문}/manifest.json   URL → 파일/크기/ETag 목록
+  {out}/latest.json                    현재 버전 가리키는 포인터 (다 쓴 다음 마지막에 교체)
+
+사용법)
+  python export_static.py --out ../static
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import shutil
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote, urlencode
+
+from fastapi.responses import Response
+
+import main
+
+try:
+    import brotli
+except ImportError:  # 없으면 .gz 만 만듦
+    brotli = None
+
+EXPORT_KEEP_VERSIONS = 3      # 남겨둘 이전 버전 개수
+
+
+def render(result) -> bytes:
+    """응답 본문 함수(main.*_payload) 반환값 → 실제 응답과 같은 JSON 바이트"""
+    if isinstance(result, Response):
+        return result.body
+    return main.dump_json(result)
+
+
+def file_key(value: str) -> str:
+    return quote(value, safe="")
+
+
+def export_jobs(license_names, regions):
+    """(URL, 상대 경로, 렌더 함수) 목록"""
+    jobs = []
+
+    def add(path, params, rel, fn):
+        url = path + ("?" + urlencode(params) if params else "")
+        jobs.append((url, rel, fn))
+
+    for name in license_names:
+        key = file_key(name)
+        add("/licenses/search", {"q": name}, f"licenses/search/{key}.json",
+            lambda n=name: main.search_licenses_payload(n))
+        add("/licenses/schedule", {"name": name}, f"licenses/schedule/{key}.json",
+            lambda n=name: main.license_schedule_payload(n))
+        add("/licenses/fee", {"name": name}, f"licenses/fee/{key}.json",
+            lambda n=name: main.license_fee_payload(n))
+
+    add("/terminals/regions", None, "terminals/regions.json", main.terminal_regions_payload)
+    for sido, localities in regions.items():
+        sido_key = file_key(sido)
+        add("/terminals/localities", {"sido": sido}, f"terminals/localities/{sido_key}.json",
+            lambda s=sido: main.terminal_localities_payload(s))
+        add("/terminals/by-region", {"sido": sido}, f"terminals/by-region/{sido_key}.json",
+            lambda s=sido: main.terminals_by_region_payload(s))
+        for locality in localities:
+            add("/terminals/by-region", {"sido": sido, "locality": locality},
+                f"terminals/by-region/{sido_key}/{file_key(locality)}.json",
+                lambda s=sido, loc=locality: main.terminals_by_region_payload(s, loc))
+    return jobs
+
+
+def write_variants(root: str, rel: str, body: bytes) -> dict:
+    """원본 + 미리 압축한 .gz/.br 쓰기 → manifest 항목"""
+    path = os.path.join(root, rel)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(body)
+
+    entry = {
+        "path": rel,
+        "bytes": len(body),
+        "etag": '"' + hashlib.sha1(body).hexdigest() + '"',
+        "encodings": {},
+    }
+    if len(body) >= main.COMPRESS_MIN_SIZE:
+        variants = {"gzip": (".gz", lambda b: gzip.compress(b, compresslevel=9, mtime=0))}
+        if brotli is not None:
+            variants["br"] = (".br", lambda b: brotli.compress(b, quality=11))
+        for encoding, (suffix, compress) in variants.items():
+            compressed = compress(body)
+            with open(path + suffix, "wb") as f:
+                f.write(compressed)
+            entry["encodings"][encoding] = {"path": rel + suffix, "bytes": len(compressed)}
+    return entry
+
+
+def prune_versions(out_dir: str, keep_version: str):
+    versions = [
+        d for d in os.listdir(out_dir)
+        if os.path.isdir(os.path.join(out_dir, d)) and d != keep_version and not d.startswith(".")
+    ]
+    versions.sort(key=lambda d: os.path.getmtime(os.path.join(out_dir, d)), reverse=True)
+    for old in versions[EXPORT_KEEP_VERSIONS - 1:]:
+        shutil.rmtree(os.path.join(out_dir, old), ignore_errors=True)
+
+
+def export(out_dir: str, workers: int) -> str:
+    version = main.dataset_fingerprint()
+    stage = os.path.join(out_dir, f".{version}.tmp")
+    final = os.path.join(out_dir, version)
+    shutil.rmtree(stage, ignore_errors=True)
+    os.makedirs(stage)
+
+    # 서버와 같은 파생 인덱스/쿼리 캐시를 한 번 만들어서 모든 렌더링이 같이 씀
+    # 서버가 핫 리로드로 올린 스테이징 그래프가 있으면 그걸 봄
+    main.DATASET = main.build_dataset_state(0, version, main.find_staged_graphs())
+    regions = main.DATASET.lookups["terminal_localities"]
+    license_names = main.query_license_names()
+    jobs = export_jobs(license_names, regions)
+    print(f"자격증 {len(license_names)}개, 시/도 {len(regions)}개 → 파일 {len(jobs)}개")
+
+    def run(job):
+        url, rel, fn = job
+        return url, write_variants(stage, rel, render(fn()))
+
+    started = time.time()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        entries = dict(pool.map(run, jobs))
+
+    manifest = {
+        "version": version,
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "count": len(entries),
+        "entries": entries,
+    }
+    main.write_json_atomic(os.path.join(stage, "manifest.json"), manifest)
+
+    shutil.rmtree(final, ignore_errors=True)
+    os.replace(stage, final)
+    main.write_json_atomic(
+        os.path.join(out_dir, "latest.json"),
+        {"version": version, "manifest": f"{version}/manifest.json"},
+    )
+    prune_versions(out_dir, version)
+    print(f"완료: {final} ({time.time() - started:.1f}초)")
+    return final
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="카탈로그 API 정적 스냅샷 내보내기")
+    parser.add_argument("--out", default=os.path.join(main.BACKEND_DATA_DIR, "static"), help="출력 디렉터리")
+    parser.add_argument("--workers", type=int, default=8, help="동시에 보낼 SPARQL 쿼리 수")
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = parse_args(sys.argv[1:])
+    export(os.path.abspath(args.out), args.workers)
@@ -0,0 +1,41 @@
+"""
+file/*.ttl 을 Fuseki(licenses)에 소스별 named graph로 올리는 스크립트
+- terminal.ttl     → <GRAPH_BASE>terminals
+- fake_data_v3.ttl → <GRAPH_BASE>licenses
+- result.ttl       → <GRAPH_BASE>concepts
+
+사용법)
+  python load_graphs.py              # 전부 다시 올리기
+  python load_graphs.py terminals    # 해당 그래프만 교체
+
+백엔드는 FUSEKI_NAMED_GRAPHS=1 로 띄워야 FROM 절로 그래프를 골라 조회함
+"""
+import os
+import sys
+
+os.environ["FUSEKI_NAMED_GRAPHS"] = "1"
+
+from main import DATASET_DIR, DATASET_GRAPHS, push_dataset_to_fuseki  # noqa: E402
+
+
+def main(argv):
+    graphs = argv or list(DATASET_GRAPHS)
+    unknown = [g for g in graphs if g not in DATASET_GRAPHS]
+    if unknown:
+        print(f"모르는 그래프: {', '.join(unknown)} (가능: {', '.join(DATASET_GRAPHS)})")
+        return 1
+
+    paths = [os.path.join(DATASET_DIR, DATASET_GRAPHS[g]) for g in graphs]
+    missing = [p for p in paths if not os.path.exists(p)]
+    if missing:
+        print(f"파일 없음: {', '.join(missing)}")
+        return 1
+
+    push_dataset_to_fuseki(paths)
+    for g in graphs:
+        print(f"{DATASET_GRAPHS[g]} → {g}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
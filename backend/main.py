@@ -1,23 +1,84 @@
-from fastapi import FastAPI, Query, HTTPException
+from fastapi import FastAPI, Query, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.concurrency import run_in_threadpool
 import requests
 from typing import Optional, List
 import xml.etree.ElementTree as ET
 from datetime import datetime, timedelta
+import os
+import glob
+import base64
+import bisect
+import csv
+import hashlib
+import heapq
+import json
+import math
+import re
+import logging
+import sqlite3
+import threading
+import time
+import contextvars
+from contextlib import contextmanager
+from itertools import islice
+from urllib.parse import urlsplit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import gzip
+import asyncio
+import anyio
 
-app = FastAPI()
+try:
+    import orjson
+except ImportError:  # orjson 없으면 표준 json 인코더 사용
+    orjson = None
 
-# 나중에 React(프론트)가 여기로 요청 보낼 거라 CORS 열어두기
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],       # 과제용이라 그냥 전체 허용
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+try:
+    import brotli
+except ImportError:  # brotli 없으면 gzip만 지원
+    brotli = None
+
+
+# 응답 dict는 전부 str/int/None/list/dict 라서 jsonable_encoder를 거칠 필요가 없음
+# → 미리 만들어둔 인코더로 바로 bytes로 직렬화
+_JSON_ENCODER = json.JSONEncoder(ensure_ascii=False, allow_nan=False, separators=(",", ":"))
+
+
+def dump_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return _JSON_ENCODER.encode(data).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    핸들러에서 바로 돌려주면 FastAPI 기본 인코딩(jsonable_encoder)을 건너뜀
+    - default_response_class로만 두면 dict 반환은 여전히 jsonable_encoder를 거침
+      → 자주 불리는 조회 API는 FastJSONResponse(...)로 직접 감싸서 반환
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+app = FastAPI(default_response_class=FastJSONResponse)
+logger = logging.getLogger("uvicorn.error")
 
 
 FUSEKI_ENDPOINT = "http://localhost:3030/licenses/sparql"
+# 같은 데이터셋을 서빙하는 Fuseki 여러 개 (쉼표 구분, 없으면 FUSEKI_ENDPOINT 하나)
+FUSEKI_ENDPOINTS = [
+    url.strip()
+    for url in os.getenv("FUSEKI_ENDPOINTS", FUSEKI_ENDPOINT).split(",")
+    if url.strip()
+]
+
+# Fuseki(licenses)에 올린 TTL 원본 위치 (file/*.ttl)
+DATASET_DIR = os.getenv(
+    "DATASET_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "file")
+)
 
 # 자격구분명(한글) -> API 코드 매핑
 QUALGB_MAP = {
@@ -69,660 +130,4380 @@ WEATHER_TEMP_REGION_MAP = {
     "제주도": "11G00601",   # 제주
 }
 
-def escape_literal(text: str) -> str:
-    """SPARQL 문자열에 넣을 때 큰따옴표, 역슬래시 이스케이프"""
-    return text.replace("\\", "\\\\").replace('"', '\\"')
+# -------------------------
+# 공공 API 공통 호출부 (적응형 타임아웃 + 요청 헤징)
+# -------------------------
+# data.go.kr / 기상청 API는 가끔 응답이 엄청 늦게 와서 p99가 망가짐.
+# 업스트림별로 최근 응답시간을 모아서 타임아웃을 정하고,
+# 1차 요청이 최근 p95를 넘기면 같은 요청을 한 번 더 보내서 먼저 오는 걸 씀.
+UPSTREAM_DEFAULT_TIMEOUT = 10.0   # 표본이 모이기 전에는 예전처럼 10초
+UPSTREAM_MIN_TIMEOUT = 2.0
+UPSTREAM_MAX_TIMEOUT = 15.0
+UPSTREAM_TIMEOUT_FACTOR = 2.0     # 타임아웃 = p99 * 2 (최소/최대로 자름)
+UPSTREAM_LATENCY_WINDOW = 200     # 업스트림별로 최근 몇 건을 기준으로 볼지
+UPSTREAM_MIN_SAMPLES = 20         # 이보다 표본이 적으면 기본 타임아웃 + 헤징 안 함
 
+HEDGE_ENABLED = os.getenv("UPSTREAM_HEDGE", "1") == "1"
+HEDGE_BUDGET_RATIO = 0.1          # 헤지 요청은 1차 요청 수의 10%까지만 (업스트림 부하 2배 방지)
+HEDGE_BUDGET_MAX = 10.0           # 모아둘 수 있는 헤지 토큰 최대치
+HEDGE_MIN_DELAY = 0.05            # p95가 너무 작아도 최소 50ms는 기다렸다가 헤지
 
-def run_sparql(query: str):
-    """Fuseki SPARQL 엔드포인트에 쿼리 보내고 JSON 반환"""
-    res = requests.post(
-        FUSEKI_ENDPOINT,
-        data={"query": query},
-        headers={"Accept": "application/sparql-results+json"},
-        timeout=10,
-    )
-    res.raise_for_status()
-    return res.json()
 
-def get_binding_value(binding: dict, key: str):
-    """SPARQL binding dict에서 value만 꺼내기 (없으면 None)"""
-    v = binding.get(key)
-    return v.get("value") if isinstance(v, dict) and "value" in v else None
+class UpstreamStats:
+    """업스트림 하나의 최근 응답시간 표본과 헤지 예산"""
 
+    def __init__(self, name: str):
+        self.name = name
+        self.lock = threading.Lock()
+        self.samples = deque(maxlen=UPSTREAM_LATENCY_WINDOW)
+        self.hedge_tokens = 0.0
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.timeouts = 0
 
-def query_license_items_by_name(name: str):
-    """
-    Fuseki(licenses)에 올라간 자격증 TTL에서
-    skos:prefLabel(자격증 이름)으로 검색해서
-    회차별(1차/2차/3차) 응시 정보 한 줄씩 뽑아오는 함수.
+    def record(self, elapsed: float):
+        with self.lock:
+            self.samples.append(elapsed)
 
-    TTL 구조:
-      - 자격증 개체(ex:xxx)는 skos:Concept
-      - skos:prefLabel "세무사"@ko
-      - koqu:applicationDate1 / examDate1 / applicationFee1 / testMode1
-      - koqu:applicationDate2 / examDate2 / applicationFee2 / testMode2
-      - koqu:applicationDate3 / examDate3 / applicationFee3 / testMode3
+    def percentile(self, p: float) -> Optional[float]:
+        """최근 표본 기준 p 퍼센타일(nearest-rank), 표본이 부족하면 None"""
+        with self.lock:
+            if len(self.samples) < UPSTREAM_MIN_SAMPLES:
+                return None
+            ordered = sorted(self.samples)
+        idx = min(len(ordered) - 1, max(0, int(round(p / 100.0 * len(ordered))) - 1))
+        return ordered[idx]
+
+    def timeout(self) -> float:
+        p99 = self.percentile(99)
+        if p99 is None:
+            return UPSTREAM_DEFAULT_TIMEOUT
+        return min(UPSTREAM_MAX_TIMEOUT, max(UPSTREAM_MIN_TIMEOUT, p99 * UPSTREAM_TIMEOUT_FACTOR))
+
+    def hedge_delay(self) -> Optional[float]:
+        p95 = self.percentile(95)
+        if p95 is None:
+            return None
+        return max(HEDGE_MIN_DELAY, p95)
+
+    def on_request(self):
+        """1차 요청마다 헤지 토큰을 조금씩 적립"""
+        with self.lock:
+            self.requests += 1
+            self.hedge_tokens = min(HEDGE_BUDGET_MAX, self.hedge_tokens + HEDGE_BUDGET_RATIO)
+
+    def take_hedge_token(self) -> bool:
+        with self.lock:
+            if self.hedge_tokens < 1.0:
+                return False
+            self.hedge_tokens -= 1.0
+            self.hedges += 1
+            return True
+
+    def snapshot(self) -> dict:
+        return {
+            "samples": len(self.samples),
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "timeout": self.timeout(),
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "timeouts": self.timeouts,
+        }
+
+
+# -------------------------
+# 공공 API 쿼터 스케줄러 (serviceKey 하나를 모든 기능이 같이 씀)
+# -------------------------
+# 스냅샷/캐시/쿼터 DB 같은 로컬 데이터 저장 위치
+BACKEND_DATA_DIR = os.getenv(
+    "BACKEND_DATA_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+)
+# 워커 프로세스끼리 토큰 버킷을 공유하려고 sqlite 파일 하나에 저장
+QUOTA_DB_PATH = os.path.join(BACKEND_DATA_DIR, "upstream_quota.sqlite3")
+
+# API별 (초당 허용 요청 수, 하루 허용 요청 수) - 개발계정 기준
+UPSTREAM_QUOTAS = {
+    "exam_schedule": (10, 10000),
+    "exam_area": (10, 10000),
+    "mid_land": (10, 10000),
+    "mid_ta": (10, 10000),
+}
+QUOTA_BACKGROUND_RESERVE = 0.2    # 하루 쿼터의 마지막 20%는 사용자 요청 전용으로 남겨둠
+QUOTA_MAX_WAIT = {                # 토큰 없을 때 줄 서서 기다리는 최대 시간(초)
+    "interactive": 5.0,
+    "background": 120.0,
+}
+
+# 지금 요청이 사용자 요청인지 백그라운드 갱신인지 (기본은 사용자 요청)
+UPSTREAM_PRIORITY = contextvars.ContextVar("upstream_priority", default="interactive")
+
+
+@contextmanager
+def background_priority():
+    """백그라운드 작업(스냅샷 갱신, 프리워밍 등)에서 공공 API 부를 때 감싸서 사용"""
+    token = UPSTREAM_PRIORITY.set("background")
+    try:
+        yield
+    finally:
+        UPSTREAM_PRIORITY.reset(token)
+
+
+class UpstreamQuota:
+    """
+    API별 토큰 버킷 (초당 제한) + 일일 사용량 카운터
+    - 상태는 sqlite에 두고 BEGIN IMMEDIATE로 잠가서 여러 워커 프로세스가 같이 씀
+    - 토큰이 없으면 실패 대신 기다렸다가 가져감
+    - 같은 프로세스에서 사용자 요청이 기다리는 중이면 백그라운드 요청은 양보
     """
-    keyword = escape_literal(name)
 
-    query = f"""
-PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+    def __init__(self, path: str, quotas: dict):
+        self.path = path
+        self.quotas = quotas
+        self.local = threading.local()
+        self.lock = threading.Lock()
+        self.interactive_waiting = 0
 
-SELECT ?exam ?itemLabel ?round ?appDate ?examDate ?fee ?mode
-WHERE {{
-  ?exam a skos:Concept ;
-        skos:prefLabel ?itemLabel .
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS buckets ("
+                " api TEXT PRIMARY KEY, tokens REAL, updated REAL, day TEXT, used INTEGER)"
+            )
+            self.local.conn = conn
+        return conn
 
-  FILTER(CONTAINS(STR(?itemLabel), "{keyword}"))
+    def _try_take(self, api: str, priority: str):
+        """
+        토큰 하나 가져오기 시도
+        - 성공: (True, 0)
+        - 실패: (False, 다시 시도할 때까지 기다릴 초) / 일일 한도 초과면 (False, None)
+        """
+        rate, daily = self.quotas[api]
+        limit = daily if priority == "interactive" else int(daily * (1 - QUOTA_BACKGROUND_RESERVE))
+        now = time.time()
+        today = datetime.now().strftime("%Y%m%d")
 
-  {{
-    BIND("1차" AS ?round)
-    OPTIONAL {{ ?exam koqu:applicationDate1 ?appDate . }}
-    OPTIONAL {{ ?exam koqu:examDate1 ?examDate . }}
-    OPTIONAL {{ ?exam koqu:applicationFee1 ?fee . }}
-    OPTIONAL {{ ?exam koqu:testMode1 ?mode . }}
-    FILTER(BOUND(?appDate) || BOUND(?examDate) || BOUND(?fee) || BOUND(?mode))
-  }}
-  UNION
-  {{
-    BIND("2차" AS ?round)
-    OPTIONAL {{ ?exam koqu:applicationDate2 ?appDate . }}
-    OPTIONAL {{ ?exam koqu:examDate2 ?examDate . }}
-    OPTIONAL {{ ?exam koqu:applicationFee2 ?fee . }}
-    OPTIONAL {{ ?exam koqu:testMode2 ?mode . }}
-    FILTER(BOUND(?appDate) || BOUND(?examDate) || BOUND(?fee) || BOUND(?mode))
-  }}
-  UNION
-  {{
-    BIND("3차" AS ?round)
-    OPTIONAL {{ ?exam koqu:applicationDate3 ?appDate . }}
-    OPTIONAL {{ ?exam koqu:examDate3 ?examDate . }}
-    OPTIONAL {{ ?exam koqu:applicationFee3 ?fee . }}
-    OPTIONAL {{ ?exam koqu:testMode3 ?mode . }}
-    FILTER(BOUND(?appDate) || BOUND(?examDate) || BOUND(?fee) || BOUND(?mode))
-  }}
-}}
-ORDER BY ?itemLabel ?round
-"""
-    data = run_sparql(query)
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT tokens, updated, day, used FROM buckets WHERE api = ?", (api,)
+            ).fetchone()
+            if row is None:
+                tokens, updated, day, used = float(rate), now, today, 0
+            else:
+                tokens, updated, day, used = row
+            tokens = min(float(rate), tokens + max(0.0, now - updated) * rate)
+            if day != today:
+                day, used = today, 0
 
-    items = []
-    for b in data["results"]["bindings"]:
-        items.append(
-            {
-                "uri": get_binding_value(b, "exam"),
-                "itemLabel": get_binding_value(b, "itemLabel"),
-                "round": get_binding_value(b, "round"),
-                "appDate": get_binding_value(b, "appDate"),
-                "examDate": get_binding_value(b, "examDate"),
-                "fee": get_binding_value(b, "fee"),
-                "mode": get_binding_value(b, "mode"),
+            if used >= limit:
+                ok, wait_for = False, None
+            elif tokens >= 1.0:
+                tokens -= 1.0
+                used += 1
+                ok, wait_for = True, 0.0
+            else:
+                ok, wait_for = False, (1.0 - tokens) / rate
+
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (api, tokens, updated, day, used) VALUES (?, ?, ?, ?, ?)",
+                (api, tokens, now, day, used),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return ok, wait_for
+
+    def acquire(self, api: str, blocking: bool = True) -> bool:
+        """
+        API 호출 전에 토큰 하나 확보
+        - blocking=False: 바로 못 가져오면 False (헤지 요청용)
+        - blocking=True: 우선순위별 최대 대기시간까지 기다리고, 그래도 안 되면 503
+        """
+        if api not in self.quotas:
+            return True
+
+        priority = UPSTREAM_PRIORITY.get()
+        if not blocking:
+            return self._try_take(api, priority)[0]
+
+        deadline = time.monotonic() + QUOTA_MAX_WAIT.get(priority, 5.0)
+        if priority == "interactive":
+            with self.lock:
+                self.interactive_waiting += 1
+        try:
+            while True:
+                yield_to_interactive = False
+                if priority != "interactive":
+                    with self.lock:
+                        yield_to_interactive = self.interactive_waiting > 0
+
+                if yield_to_interactive:
+                    ok, wait_for = False, 0.05
+                else:
+                    ok, wait_for = self._try_take(api, priority)
+                if ok:
+                    return True
+                if wait_for is None:
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"공공 API 일일 호출 한도 초과: {api}",
+                        headers={"Retry-After": str(seconds_until_tomorrow())},
+                    )
+                if time.monotonic() + wait_for > deadline:
+                    raise HTTPException(
+                        status_code=503,
+                        detail=f"공공 API 호출이 밀려 있음: {api}",
+                        headers={"Retry-After": "1"},
+                    )
+                time.sleep(wait_for)
+        finally:
+            if priority == "interactive":
+                with self.lock:
+                    self.interactive_waiting -= 1
+
+    def budget(self) -> dict:
+        """API별 남은 토큰/오늘 남은 호출 수"""
+        now = time.time()
+        today = datetime.now().strftime("%Y%m%d")
+        rows = {
+            r[0]: r[1:]
+            for r in self._conn().execute("SELECT api, tokens, updated, day, used FROM buckets")
+        }
+        result = {}
+        for api, (rate, daily) in self.quotas.items():
+            tokens, updated, day, used = rows.get(api, (float(rate), now, today, 0))
+            if day != today:
+                used = 0
+            tokens = min(float(rate), tokens + max(0.0, now - updated) * rate)
+            background_limit = int(daily * (1 - QUOTA_BACKGROUND_RESERVE))
+            result[api] = {
+                "rate_per_sec": rate,
+                "tokens": round(tokens, 2),
+                "daily_limit": daily,
+                "used_today": used,
+                "remaining_today": max(0, daily - used),
+                "remaining_background": max(0, background_limit - used),
             }
-        )
-    return items
+        return result
 
 
-def format_yyyymmdd(date_str: str) -> str:
-    """YYYYMMDD -> YYYY-MM-DD 형태로 보기 좋게 바꾸기"""
-    if not date_str or len(date_str) != 8 or not date_str.isdigit():
-        return date_str
-    return f"{date_str[0:4]}-{date_str[4:6]}-{date_str[6:8]}"
+def seconds_until_tomorrow() -> int:
+    now = datetime.now()
+    tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+    return max(1, int((tomorrow - now).total_seconds()))
 
 
-def call_exam_schedule_api(year: int, qualgb_name: Optional[str] = None):
-    """국가자격 시험일정 API 호출해서 raw item 리스트 반환"""
-    params = {
-        "serviceKey": EXAM_API_KEY,
-        "numOfRows": "100",   # 한 번에 넉넉하게 받기
-        "pageNo": "1",
-        "dataFormat": "json",
-        "implYy": str(year),
-    }
+UPSTREAM_QUOTA = UpstreamQuota(QUOTA_DB_PATH, UPSTREAM_QUOTAS)
 
-    # 자격구분명(한글)을 코드(T/C/W/S)로 변환해서 넣기 (옵션)
-    if qualgb_name:
-        code = QUALGB_MAP.get(qualgb_name)
-        if not code:
-            raise HTTPException(status_code=400, detail=f"지원하지 않는 자격구분명: {qualgb_name}")
-        params["qualgbCd"] = code
 
-    res = requests.get(EXAM_API_URL, params=params, timeout=10)
-    res.raise_for_status()
-    data = res.json()
+UPSTREAM_STATS = {}
+_UPSTREAM_STATS_LOCK = threading.Lock()
+_HEDGE_POOL = ThreadPoolExecutor(max_workers=64, thread_name_prefix="upstream")
 
-    body = data.get("response", {}).get("body", {})
-    items = body.get("items", {}).get("item", [])
 
-    # 결과가 1건일 때 dict로 올 수 있어서 리스트로 통일
-    if isinstance(items, dict):
-        items = [items]
+def get_upstream_stats(name: str) -> UpstreamStats:
+    with _UPSTREAM_STATS_LOCK:
+        stats = UPSTREAM_STATS.get(name)
+        if stats is None:
+            stats = UPSTREAM_STATS[name] = UpstreamStats(name)
+        return stats
 
-    return items
 
-def call_exam_area_api(brch_cd: str, page: int = 1, per_page: int = 50):
-    """
-    국가자격시험 시험장소 API 호출해서 raw XML 반환
-    brch_cd: 지사코드 (예: 01=서울, 10=경기, 18=제주 ...)
-    """
-    params = {
-        "serviceKey": EXAM_API_KEY,
-        "brchCd": brch_cd,
-        "numOfRows": str(per_page),
-        "pageNo": str(page),
-    }
+def _timed_get(stats: UpstreamStats, url: str, params: dict, timeout: float, stream: bool = False):
+    """requests.get 한 번 + 걸린 시간 기록 (타임아웃 나면 타임아웃 값을 표본으로 넣음)"""
+    started = time.monotonic()
+    try:
+        res = requests.get(url, params=params, timeout=timeout, stream=stream)
+    except requests.Timeout:
+        # 타임아웃은 응답시간 표본에 안 넣음 (넣으면 p99가 타임아웃 값 자체가 돼서 타임아웃이 계속 커짐)
+        with stats.lock:
+            stats.timeouts += 1
+        raise
+    elapsed = time.monotonic() - started
+    stats.record(elapsed)
+    if UPSTREAM_MODE == "record":
+        record_fixture(stats.name, url, params, res, elapsed)
+    return res
 
-    res = requests.get(EXAM_AREA_API_URL, params=params, timeout=10)
-    res.raise_for_status()
-    return res.text  # XML 문자열 그대로 반환
 
+def _close_hedge_loser(fut):
+    if not fut.cancelled() and fut.exception() is None:
+        fut.result().close()
 
-def parse_exam_area_xml(xml_text: str):
+
+def upstream_get(name: str, url: str, params: dict, stream: bool = False):
     """
-    시험장소 XML 응답을 파싱해서 파이썬 dict 리스트로 변환
+    공공 API GET 공통 함수
+    - name: 업스트림 이름 (exam_schedule, exam_area, mid_land, mid_ta ...)
+    - 타임아웃은 최근 p99 기반으로 자동 조정
+    - 1차 요청이 최근 p95보다 늦으면 헤지 예산 안에서 같은 요청을 한 번 더 보내고
+      먼저 돌아온 응답을 사용
+    - 호출 전에 쿼터 스케줄러에서 토큰을 받아감 (헤지 요청은 토큰 있을 때만)
+    - stream=True면 헤더까지만 받고 본문은 호출한 쪽에서 iter_content로 읽음
+    - UPSTREAM_MODE=replay 면 replay_server로 보내고 쿼터는 쓰지 않음
     """
-    root = ET.fromstring(xml_text)
+    replay = UPSTREAM_MODE == "replay"
+    if replay:
+        url = replay_url(url)
+    else:
+        UPSTREAM_QUOTA.acquire(name)
+    stats = get_upstream_stats(name)
+    stats.on_request()
+    timeout = stats.timeout()
+    delay = stats.hedge_delay() if HEDGE_ENABLED else None
 
-    # openapi.q-net 응답 구조: <response><body><items><item>...</item></items></body></response>
-    body = root.find("body")
-    if body is None:
-        return [], 0
+    if delay is None:
+        return _timed_get(stats, url, params, timeout, stream)
 
-    total_count_el = body.find("totalCount")
-    total_count = int(total_count_el.text) if total_count_el is not None and total_count_el.text.isdigit() else 0
+    first = _HEDGE_POOL.submit(_timed_get, stats, url, params, timeout, stream)
+    done, _ = wait([first], timeout=delay)
+    if done or not stats.take_hedge_token() or not (replay or UPSTREAM_QUOTA.acquire(name, blocking=False)):
+        return first.result()
 
-    items_el = body.find("items")
-    if items_el is None:
-        return [], total_count
+    second = _HEDGE_POOL.submit(_timed_get, stats, url, params, timeout, stream)
+    pending = {first, second}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for fut in done:
+            if fut.exception() is None:
+                if fut is second:
+                    with stats.lock:
+                        stats.hedge_wins += 1
+                # 진 쪽 응답은 아무도 안 읽으므로 끝나는 대로 닫아서 연결을 풀로 돌려줌
+                # (stream=True면 본문을 안 읽은 채로 연결을 계속 잡고 있음)
+                for other in pending:
+                    if not other.cancel():
+                        other.add_done_callback(_close_hedge_loser)
+                for other in done - {fut}:
+                    _close_hedge_loser(other)
+                return fut.result()
+            error = error or fut.exception()
+    # 둘 다 실패한 경우
+    raise error
 
-    results = []
-    for item in items_el.findall("item"):
-        def get(tag):
-            el = item.find(tag)
-            return el.text.strip() if el is not None and el.text is not None else None
 
-        results.append(
-            {
-                "address": get("address"),
-                "brchCd": get("brchCd"),
-                "brchNm": get("brchNm"),
-                "examAreaGbNm": get("examAreaGbNm"),
-                "examAreaNm": get("examAreaNm"),
-                "plceLoctGid": get("plceLoctGid"),
-                "telNo": get("telNo"),
-            }
-        )
+# -------------------------
+# 공공 API 녹화/재생 (오프라인 성능 테스트용)
+# -------------------------
+# UPSTREAM_MODE=live   : 공공 API 그대로 호출 (기본)
+# UPSTREAM_MODE=record : 호출은 그대로 하고 요청/응답/응답시간을 fixture 파일로 저장
+# UPSTREAM_MODE=replay : 공공 API 대신 replay_server.py(UPSTREAM_REPLAY_URL)로 보냄
+#                        → 네트워크/쿼터 없이 같은 응답으로 처리량·꼬리 지연 측정 반복 가능
+UPSTREAM_MODES = ("live", "record", "replay")
+UPSTREAM_MODE = os.getenv("UPSTREAM_MODE", "live")
+if UPSTREAM_MODE not in UPSTREAM_MODES:
+    raise RuntimeError(f"UPSTREAM_MODE는 {'/'.join(UPSTREAM_MODES)} 중 하나: {UPSTREAM_MODE}")
 
-    return results, total_count
+UPSTREAM_FIXTURE_DIR = os.getenv(
+    "UPSTREAM_FIXTURE_DIR", os.path.join(BACKEND_DATA_DIR, "upstream_fixtures")
+)
+UPSTREAM_REPLAY_URL = os.getenv("UPSTREAM_REPLAY_URL", "http://127.0.0.1:8090")
+UPSTREAM_FIXTURE_LATENCIES = 200          # fixture 하나에 남길 응답시간 표본 수
+UPSTREAM_FIXTURE_SECRET_PARAMS = ("serviceKey",)   # fixture 키/파일에 안 넣는 파라미터
 
-@app.get("/")
-def root():
-    return {"message": "backend alive"}
+_FIXTURE_LOCK = threading.Lock()
 
 
-@app.get("/licenses/search")
-def search_licenses(q: str = Query(..., min_length=1)):
-    """
-    자격증 이름(부분 문자열)으로 그래프DB에서 검색
-    예) /licenses/search?q=세무사
-    """
-    keyword = escape_literal(q)
+def fixture_params(params: dict) -> dict:
+    return {k: str(v) for k, v in sorted(params.items()) if k not in UPSTREAM_FIXTURE_SECRET_PARAMS}
 
-    query = f"""
-PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
-PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
-PREFIX dcterms: <http://purl.org/dc/terms/>
 
-SELECT ?license ?label ?desc
-WHERE {{
-  ?license a skos:Concept ;
-           skos:inScheme koqu:QualificationScheme ;
-           skos:prefLabel ?label .
-  OPTIONAL {{ ?license dcterms:description ?desc . }}
-  FILTER(CONTAINS(STR(?label), "{keyword}"))
-}}
-LIMIT 20
-"""
+def fixture_key(path: str, params: dict) -> str:
+    """(URL 경로, serviceKey 뺀 파라미터) → fixture 키 (replay_server도 같은 함수로 찾음)"""
+    return hashlib.sha1(dump_json([path, fixture_params(params)])).hexdigest()
 
-    data = run_sparql(query)
 
-    results = []
-    for b in data["results"]["bindings"]:
-        results.append(
-            {
-                "uri": b["license"]["value"],
-                "label": b["label"]["value"],
-                "desc": b.get("desc", {}).get("value"),
-            }
-        )
+def fixture_path(name: str, path: str, params: dict) -> str:
+    return os.path.join(UPSTREAM_FIXTURE_DIR, name, fixture_key(path, params) + ".json")
 
-    return {"query": q, "count": len(results), "results": results}
 
-@app.get("/licenses/schedule")
-def get_license_schedule(
-    name: str = Query(..., description="자격증 이름(예: 세무사)")
-):
+def replay_url(url: str) -> str:
+    """공공 API URL → 같은 경로의 replay_server URL (호스트만 바꿈)"""
+    return UPSTREAM_REPLAY_URL.rstrip("/") + urlsplit(url).path
+
+
+def record_fixture(name: str, url: str, params: dict, res, elapsed: float):
     """
-    ✅ fake_data_v3.ttl (GraphDB) 에서 자격증 일정 조회
-    - itemLable 로 검색해서 round / appDate / examDate / fee / mode 모두 반환
+    응답 하나를 fixture로 저장
+    - 같은 요청을 또 녹화하면 응답은 최신 걸로 바꾸고 응답시간 표본은 이어 붙임
+    - stream=True 요청도 여기서 본문을 다 읽음 (requests가 읽어둔 본문으로 iter_content를 다시 돌려줌)
+    - 녹화 실패는 로그만 남김 (원래 요청은 그대로 진행)
     """
-    items = query_license_items_by_name(name)
+    try:
+        path = urlsplit(url).path
+        content = res.content
+        try:
+            body = {"body": content.decode("utf-8")}
+        except UnicodeDecodeError:
+            body = {"body_base64": base64.b64encode(content).decode("ascii")}
 
-    return {
-        "name": name,
-        "year": None,          # 예전 응답형식 맞추려고 남겨둠(실제 필터는 안 함)
-        "qualgb_name": None,   # 마찬가지
-        "total_from_api": len(items),
-        "count": len(items),
-        "results": [
-            {
-                "label": it["itemLabel"],
-                "round": it["round"],
-                "appDate": it["appDate"],
-                "examDate": it["examDate"],
-                "fee": it["fee"],
-                "mode": it["mode"],
-            }
-            for it in items
-        ],
-    }  
-@app.get("/weather/mid")
-def get_mid_weather(
-    region: str = Query(
-        ...,
-        description="예: 수도권, 강원영서, 강원영동, 충청북도, 충남권, 전라북도, 전남권, 경북권, 경남권, 제주도 중 하나",
-    ),
-    tm_fc: Optional[str] = Query(
-        None,
-        description="(선택) 중기예보 발표시각, 예: 202512070600. 없으면 서버가 자동으로 가장 최근 발표시각을 계산"
-    ),
-):
+        target = fixture_path(name, path, params)
+        with _FIXTURE_LOCK:
+            latencies = (read_json(target) or {}).get("latencies", [])
+            latencies = (latencies + [round(elapsed, 4)])[-UPSTREAM_FIXTURE_LATENCIES:]
+            write_json_atomic(
+                target,
+                {
+                    "name": name,
+                    "path": path,
+                    "params": fixture_params(params),
+                    "status": res.status_code,
+                    "content_type": res.headers.get("Content-Type"),
+                    **body,
+                    "latencies": latencies,
+                    "recorded_at": datetime.now().isoformat(timespec="seconds"),
+                },
+            )
+    except Exception:
+        logger.exception("[%s] 업스트림 응답 녹화 실패", name)
+
+# -------------------------
+# 백그라운드 주기 작업 공통부
+# -------------------------
+# 여러 워커를 띄울 때 한 프로세스만 돌리고 싶으면 BACKGROUND_JOBS=0 으로 끄면 됨
+BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS", "1") == "1"
+
+
+def run_periodic(name: str, interval: float, job, initial_delay: float = 0.0):
     """
-    기상청 중기예보(중기육상예보 + 중기기온)를 합쳐서 반환
-    - region: 사람이 읽는 지역 이름 (수도권 등) → regId로 매핑
-    - 반환: 3일 후 기준 간단 요약 + 원본 데이터
+    job()을 interval초마다 백그라운드 스레드에서 실행
+    - 공공 API는 background 우선순위로 호출됨 (사용자 요청에 양보)
+    - 예외가 나도 로그만 남기고 다음 주기에 다시 시도
     """
-    # 중기육상예보용 regId, 중기기온용 regId를 각각 매핑
-    land_reg_id = WEATHER_LAND_REGION_MAP.get(region)
-    temp_reg_id = WEATHER_TEMP_REGION_MAP.get(region)
+    if not BACKGROUND_JOBS_ENABLED:
+        return
 
-    if not land_reg_id or not temp_reg_id:
-        valid = ", ".join(WEATHER_LAND_REGION_MAP.keys())
+    def loop():
+        time.sleep(initial_delay)
+        while True:
+            try:
+                with background_priority():
+                    job()
+            except Exception:
+                logger.exception("[%s] 백그라운드 작업 실패", name)
+            time.sleep(interval)
+
+    threading.Thread(target=loop, name=name, daemon=True).start()
+
+
+def write_json_atomic(path: str, data):
+    """임시 파일에 쓰고 os.replace로 바꿔치기 (읽는 쪽이 반쪽짜리 파일을 보지 않게)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def read_json(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def escape_literal(text: str) -> str:
+    """SPARQL 문자열에 넣을 때 큰따옴표, 역슬래시 이스케이프"""
+    return text.replace("\\", "\\\\").replace('"', '\\"')
+
+
+# -------------------------
+# SPARQL 쿼리 조립 도우미 (인덱스 타는 형태로)
+# -------------------------
+# STR()/REPLACE() 결과를 FILTER로 거르면 Fuseki가 전체를 훑어야 해서
+# 상수 IRI / 언어태그 리터럴을 VALUES로 묶어 트리플 패턴에 바로 꽂음
+ADMIN_DIVISION_BASE = "http://vocab.datahub.kr/def/administrative-division/"
+SIDO_CLASSES = ("Province", "MetropolitanCity", "SpecialMetropolitanCity", "SpecialSelfGoverningProvince")
+LOCALITY_CLASSES = ("City", "County", "District")
+LABEL_MATCH_MODES = ("exact", "prefix", "contains")
+_IRI_UNSAFE_CHARS = '<>"{}|^`\\ '
+
+
+def iri_ref(iri: str) -> str:
+    """IRI → SPARQL IRI 표기 (IRI에 못 들어가는 문자는 퍼센트 인코딩)"""
+    for ch in _IRI_UNSAFE_CHARS:
+        iri = iri.replace(ch, "%{:02X}".format(ord(ch)))
+    return f"<{iri}>"
+
+
+def admin_division_terms(name: str, classes) -> List[str]:
+    """행정구역 이름 → 후보 IRI들 (…/Province/경기도, …/MetropolitanCity/경기도 …)"""
+    return [iri_ref(f"{ADMIN_DIVISION_BASE}{cls}/{name}") for cls in classes]
+
+
+def ko_literal(text: str) -> str:
+    """문자열 → "…"@ko 리터럴 (TTL의 prefLabel이 전부 @ko)"""
+    return f'"{escape_literal(text)}"@ko'
+
+
+def values_clause(var: str, terms: List[str]) -> str:
+    return f"VALUES ?{var} {{ {' '.join(terms)} }}"
+
+
+def check_label_match(match: str):
+    if match not in LABEL_MATCH_MODES:
         raise HTTPException(
             status_code=400,
-            detail=f"지원하지 않는 지역: {region}. 사용 가능한 값: {valid}",
+            detail=f"match는 {', '.join(LABEL_MATCH_MODES)} 중 하나여야 합니다.",
         )
 
-    # tm_fc가 없으면 현재 시각 기준으로 가장 최근 발표시각 계산
-    if tm_fc is None:
-        tm_fc = get_mid_tmfc()
 
-    land = call_mid_land_fcst(land_reg_id, tm_fc)
-    ta = call_mid_ta(temp_reg_id, tm_fc)
+def label_match_clause(subject: str, label_var: str, name: str, match: str) -> str:
+    """
+    skos:prefLabel 검색 패턴
+    - exact: "이름"@ko 를 VALUES로 바인딩 → 라벨 인덱스 조회
+    - prefix / contains: 라벨 값에 바로 STRSTARTS / CONTAINS (STR() 변환 없이)
+    """
+    if match == "exact":
+        return (
+            f"{values_clause(label_var, [ko_literal(name)])}\n"
+            f"  ?{subject} skos:prefLabel ?{label_var} ."
+        )
 
-    # 공공데이터 쪽에 아직 데이터가 없을 수도 있으니까 그대로 알려주기
-    if land is None or ta is None:
-        return {
-            "region": region,
-            "regId": land_reg_id,
-            "tmFc": tm_fc,
-            "has_data": False,
-            "land_raw": land,
-            "temp_raw": ta,
-        }
+    func = "STRSTARTS" if match == "prefix" else "CONTAINS"
+    return (
+        f"?{subject} skos:prefLabel ?{label_var} .\n"
+        f'  FILTER({func}(?{label_var}, "{escape_literal(name)}"))'
+    )
 
-    # 🔎 4~10일 중에서 실제로 값이 들어있는 가장 빠른 날짜 찾기
+
+SPARQL_JSON = "application/sparql-results+json"
+SPARQL_TSV = "text/tab-separated-values"
+XSD = "http://www.w3.org/2001/XMLSchema#"
+
+# 결과 행으로 풀 때 파이썬 타입으로 바꿀 데이터타입 (나머지는 문자열 그대로, 예: xsd:date)
+SPARQL_TYPE_DECODERS = {
+    XSD + "integer": int,
+    XSD + "int": int,
+    XSD + "long": int,
+    XSD + "short": int,
+    XSD + "decimal": float,
+    XSD + "double": float,
+    XSD + "float": float,
+    XSD + "boolean": lambda v: v in ("true", "1"),
+}
+_TSV_ESCAPE_RE = re.compile(r'\\(u[0-9A-Fa-f]{4}|U[0-9A-Fa-f]{8}|.)')
+_TSV_ESCAPES = {"t": "\t", "n": "\n", "r": "\r", "b": "\b", "f": "\f"}
+
+
+# -------------------------
+# 커서(keyset) 페이지네이션
+# -------------------------
+# cursor = 마지막으로 내려준 행의 정렬 키를 base64로 감싼 것 (클라이언트는 그대로 돌려보내기만)
+# → 다음 페이지는 "그 키보다 뒤"부터라서 몇 페이지째든 첫 페이지와 비용이 같음
+CURSOR_MAX_LIMIT = 100
+
+
+def encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(dump_json(list(key))).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[tuple]:
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw)
+        if not isinstance(key, list):
+            raise ValueError(key)
+        return tuple(key)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="잘못된 cursor 입니다.")
+
+
+def keyset_after_clause(after: Optional[tuple], key_vars) -> str:
+    """
+    SPARQL용 "정렬 키가 after 보다 뒤" 조건 (키 변수들은 STR()로 문자열 비교)
+    예) (이름, uri) → FILTER(STR(?name) > "a" || (STR(?name) = "a" && STR(?uri) > "b"))
+    """
+    if after is None:
+        return ""
+    if len(after) != len(key_vars):
+        raise HTTPException(status_code=400, detail="잘못된 cursor 입니다.")
+    terms = []
+    for i, var in enumerate(key_vars):
+        same = [f'STR(?{v}) = "{escape_literal(str(after[j]))}"' for j, v in enumerate(key_vars[:i])]
+        terms.append("(" + " && ".join(same + [f'STR(?{var}) > "{escape_literal(str(after[i]))}"']) + ")")
+    return "FILTER(" + " || ".join(terms) + ")"
+
+
+def page_with_cursor(keyed_rows, limit: int):
+    """(키, 행) limit+1개까지 받아서 → (행 limit개, 다음 cursor 또는 None)"""
+    page = list(islice(keyed_rows, limit + 1))
+    next_cursor = encode_cursor(page[limit - 1][0]) if len(page) > limit else None
+    return [row for _, row in page[:limit]], next_cursor
+
+
+# -------------------------
+# Fuseki 엔드포인트 풀 (least-outstanding 분배 + 헬스체크/제외/복귀)
+# -------------------------
+FUSEKI_EJECT_AFTER = 3              # 연속 실패 몇 번이면 풀에서 제외
+FUSEKI_EJECT_SECONDS = 30.0         # 제외 후 최소 이 시간 동안은 안 씀 (헬스체크 통과하면 복귀)
+FUSEKI_HEALTH_INTERVAL = 10.0       # 헬스체크 주기(초)
+FUSEKI_HEALTH_TIMEOUT = 2.0
+FUSEKI_QUERY_ATTEMPTS = 2           # 읽기 쿼리라 실패하면 다른 엔드포인트로 한 번 더
+
+
+class SparqlEndpoint:
+    """Fuseki 하나의 상태 (진행 중 요청 수, 최근 응답시간, 연속 실패, 제외 여부)"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self.data_url = url.rsplit("/", 1)[0] + "/data"   # Graph Store Protocol
+        self.outstanding = 0
+        self.latency = 0.0          # 응답시간 지수이동평균(초)
+        self.failures = 0
+        self.ejected_until = 0.0
+        self.total = 0
+        self.errors = 0
+
+    def available(self, now: float) -> bool:
+        return now >= self.ejected_until
+
+    def snapshot(self) -> dict:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "latency_ms": round(self.latency * 1000, 1),
+            "failures": self.failures,
+            "ejected": not self.available(time.monotonic()),
+            "total": self.total,
+            "errors": self.errors,
+        }
+
+
+class SparqlPool:
+    """
+    SPARQL 엔드포인트 풀
+    - 진행 중 요청이 제일 적은 곳으로 (같으면 최근 실패가 적고 응답이 빠른 곳)
+    - 연속으로 실패하면 잠시 제외, 헬스체크(ASK) 통과하면 바로 복귀
+    - 전부 제외돼 있으면 제일 먼저 복귀 예정인 곳이라도 씀
+    """
+
+    def __init__(self, urls: List[str]):
+        self.endpoints = [SparqlEndpoint(url) for url in urls]
+        self._lock = threading.Lock()
+
+    def acquire(self, exclude=()) -> SparqlEndpoint:
+        now = time.monotonic()
+        with self._lock:
+            candidates = [ep for ep in self.endpoints if ep not in exclude] or self.endpoints
+            live = [ep for ep in candidates if ep.available(now)]
+            if live:
+                ep = min(live, key=lambda e: (e.outstanding, e.failures, e.latency))
+            else:
+                ep = min(candidates, key=lambda e: e.ejected_until)
+            ep.outstanding += 1
+            return ep
+
+    def release(self, ep: SparqlEndpoint, ok: bool, elapsed: float):
+        with self._lock:
+            ep.outstanding -= 1
+            ep.total += 1
+            if ok:
+                ep.failures = 0
+                ep.latency = elapsed if ep.latency == 0.0 else ep.latency * 0.8 + elapsed * 0.2
+                return
+            ep.errors += 1
+            ep.failures += 1
+            if ep.failures >= FUSEKI_EJECT_AFTER:
+                ep.ejected_until = time.monotonic() + FUSEKI_EJECT_SECONDS
+                logger.warning("Fuseki %s 제외 (연속 실패 %d회)", ep.url, ep.failures)
+
+    def check(self, ep: SparqlEndpoint):
+        """ASK {} 로 살아 있는지 확인 → 통과하면 복귀, 실패하면 제외"""
+        try:
+            res = requests.get(
+                ep.url,
+                params={"query": "ASK {}"},
+                headers={"Accept": SPARQL_JSON},
+                timeout=FUSEKI_HEALTH_TIMEOUT,
+            )
+            res.raise_for_status()
+            healthy = True
+        except requests.RequestException:
+            healthy = False
+
+        with self._lock:
+            if healthy:
+                if not ep.available(time.monotonic()):
+                    logger.info("Fuseki %s 복귀", ep.url)
+                ep.failures = 0
+                ep.ejected_until = 0.0
+            else:
+                ep.failures = max(ep.failures, FUSEKI_EJECT_AFTER)
+                ep.ejected_until = time.monotonic() + FUSEKI_EJECT_SECONDS
+
+    def check_all(self):
+        for ep in self.endpoints:
+            self.check(ep)
+
+    def snapshot(self) -> List[dict]:
+        with self._lock:
+            return [ep.snapshot() for ep in self.endpoints]
+
+
+SPARQL_POOL = SparqlPool(FUSEKI_ENDPOINTS)
+
+
+def sparql_request(query: str, accept: str) -> requests.Response:
+    """
+    풀에서 엔드포인트 하나 골라 SPARQL 요청
+    - 연결 실패/타임아웃/5xx면 다른 엔드포인트로 재시도
+    - 쿼리 자체 오류(4xx)는 엔드포인트 탓이 아니니 바로 올림
+    """
+    attempts = min(FUSEKI_QUERY_ATTEMPTS, len(SPARQL_POOL.endpoints))
+    tried = []
+    while True:
+        ep = SPARQL_POOL.acquire(exclude=tried)
+        tried.append(ep)
+        started = time.monotonic()
+        try:
+            res = requests.post(
+                ep.url,
+                data={"query": query},
+                headers={"Accept": accept},
+                timeout=10,
+            )
+        except (requests.ConnectionError, requests.Timeout):
+            SPARQL_POOL.release(ep, False, time.monotonic() - started)
+            if len(tried) >= attempts:
+                raise
+            continue
+
+        ok = res.status_code < 500
+        SPARQL_POOL.release(ep, ok, time.monotonic() - started)
+        if ok or len(tried) >= attempts:
+            res.raise_for_status()
+            return res
+        # 다음 엔드포인트로 넘어가기 전에 연결을 풀로 돌려줌
+        res.close()
+
+
+def post_sparql(query: str):
+    """Fuseki SPARQL 엔드포인트에 쿼리 보내고 JSON 반환 (캐시 없이)"""
+    return sparql_request(query, SPARQL_JSON).json()
+
+
+def _unescape_tsv(m) -> str:
+    esc = m.group(1)
+    if esc[0] in "uU":
+        return chr(int(esc[1:], 16))
+    return _TSV_ESCAPES.get(esc, esc)
+
+
+def decode_typed_value(value: str, datatype: Optional[str]):
+    decoder = SPARQL_TYPE_DECODERS.get(datatype)
+    if decoder is None:
+        return value
+    try:
+        return decoder(value)
+    except ValueError:
+        return value
+
+
+def decode_tsv_term(term: str):
+    """
+    SPARQL TSV 한 칸(RDF 용어 표기) → 파이썬 값
+    - <iri> → iri 문자열, "x"@ko → "x", "1"^^xsd:int → 1, 비어 있으면(unbound) None
+    - 숫자/불리언 축약형(49500, 1.5, true)도 타입 맞춰서
+    """
+    if not term:
+        return None
+    head = term[0]
+    if head == '"':
+        end = term.rindex('"')
+        value = term[1:end]
+        if "\\" in value:
+            value = _TSV_ESCAPE_RE.sub(_unescape_tsv, value)
+        suffix = term[end + 1:]
+        if suffix.startswith("^^<"):
+            return decode_typed_value(value, suffix[3:-1])
+        return value
+    if head == "<":
+        return term[1:-1]
+    if term == "true" or term == "false":
+        return term == "true"
+    try:
+        return int(term)
+    except ValueError:
+        pass
+    try:
+        return float(term)
+    except ValueError:
+        return term     # 빈 노드(_:b0) 등
+
+
+def decode_sparql_tsv(text: str):
+    """
+    SPARQL TSV 결과 → (변수 이름 목록, 행 튜플 목록)
+    - 줄/탭으로 한 번에 자르고, 같은 용어는 한 번만 디코딩 (지역/회차처럼 반복되는 값이 많음)
+    """
+    if text.endswith("\n"):
+        text = text[:-1]
+    lines = text.split("\n")
+    names = [v.lstrip("?") for v in lines[0].split("\t")] if lines[0] else []
+
+    memo = {}
+
+    def decode(term):
+        value = memo.get(term, memo)
+        if value is memo:
+            value = memo[term] = decode_tsv_term(term)
+        return value
+
+    rows = [tuple(map(decode, line.split("\t"))) for line in lines[1:]]
+    return names, rows
+
+
+def sparql_json_to_rows(data: dict):
+    """SPARQL JSON 결과 → (변수 이름 목록, 행 튜플 목록) (TSV 못 받았을 때)"""
+    names = data["head"]["vars"]
+
+    def decode(cell):
+        if cell is None:
+            return None
+        if cell.get("type") == "literal":
+            return decode_typed_value(cell["value"], cell.get("datatype"))
+        return cell["value"]
+
+    rows = [tuple(decode(b.get(n)) for n in names) for b in data["results"]["bindings"]]
+    return names, rows
+
+
+def post_sparql_rows(query: str):
+    """
+    Fuseki에 TSV로 결과 요청해서 행 튜플로 디코딩 (캐시 없이)
+    - TSV가 안 오면(프록시 등) JSON으로 받은 걸 같은 모양으로 바꿈
+    """
+    res = sparql_request(query, f"{SPARQL_TSV}, {SPARQL_JSON};q=0.5")
+    if res.headers.get("Content-Type", "").startswith(SPARQL_TSV):
+        return decode_sparql_tsv(res.text)
+    return sparql_json_to_rows(res.json())
+
+
+def run_sparql(query: str):
+    """
+    SPARQL 쿼리 실행 (현재 요청이 보고 있는 데이터셋 버전의 결과 캐시 사용)
+    - 데이터셋이 아직 안 올라왔으면 그냥 Fuseki에 바로 물어봄
+    """
+    state = REQUEST_DATASET.get() or DATASET
+    if state is None:
+        return post_sparql(query)
+    return state.cached(("json", query), post_sparql, query)
+
+
+def run_sparql_rows(query: str):
+    """
+    SPARQL SELECT 실행 → (변수 이름 목록, 행 튜플 목록)
+    - 값만 필요한 조회는 이걸로 (JSON보다 응답이 작고 파싱이 빠름)
+    - 언어태그/데이터타입 자체가 필요하면 run_sparql (JSON)
+    """
+    state = REQUEST_DATASET.get() or DATASET
+    if state is None:
+        return post_sparql_rows(query)
+    return state.cached(("rows", query), post_sparql_rows, query)
+
+def get_binding_value(binding: dict, key: str):
+    """SPARQL binding dict에서 value만 꺼내기 (없으면 None)"""
+    v = binding.get(key)
+    return v.get("value") if isinstance(v, dict) and "value" in v else None
+
+
+# -------------------------
+# TTL 데이터셋 핫 리로드 (파일 감시 → Fuseki 반영 → 파생 인덱스 재구성 → 원자적 교체)
+# -------------------------
+# file/*.ttl 이 바뀌면 백엔드/Fuseki 재시작 없이 새 버전으로 넘어감
+# - 새 버전 인덱스/캐시는 백그라운드에서 다 만든 다음 DATASET 참조만 바꿔치기
+# - 요청은 시작할 때 잡은 버전(REQUEST_DATASET)으로 끝까지 처리
+# - 바뀐 TTL은 파일 내용별 스테이징 그래프(<그래프>/<파일 지문>)에 PUT 한 번으로 올리고
+#   버전마다 그 그래프들을 FROM으로 골라 봄 → 적재 중에도 예전 버전 요청은 예전 그래프만 봄
+#   (기본 그래프에 PUT/POST로 덮어쓰면 반쯤 올라간 상태가 예전 버전 ETag로 캐시됨)
+FUSEKI_RELOAD_ON_CHANGE = os.getenv("FUSEKI_RELOAD_ON_CHANGE", "1") == "1"
+DATASET_WATCH_ENABLED = os.getenv("DATASET_WATCH", "1") == "1"
+DATASET_QUERY_CACHE_SIZE = 1024     # 버전별 SPARQL 결과 캐시 최대 개수
+DATASET_POLL_INTERVAL = 5.0         # watchfiles 없을 때 파일 변경 확인 간격(초)
+DATASET_GRAPH_DROP_DELAY = 300      # 교체된 스테이징 그래프를 지우기 전 대기(초, 예전 버전 요청이 끝날 때까지)
+
+# 소스 파일별 named graph
+# - FUSEKI_NAMED_GRAPHS=1 이면 파일마다 자기 그래프에 올리고, 쿼리는 FROM으로 필요한 그래프만 봄
+#   (터미널 쿼리가 result.ttl 개념 7천 개를 안 건드리고, 파일 하나만 바뀌면 그 그래프만 교체)
+# - 0 이면 예전처럼 전부 기본 그래프에
+FUSEKI_NAMED_GRAPHS = os.getenv("FUSEKI_NAMED_GRAPHS", "0") == "1"
+GRAPH_BASE = os.getenv("GRAPH_BASE", "http://knowledgemap.kr/graph/")
+DATASET_GRAPHS = {
+    # 그래프 이름: TTL 파일
+    "terminals": "terminal.ttl",
+    "licenses": "fake_data_v3.ttl",   # 자격증 + 회차별 접수/시험일/수수료
+    "concepts": "result.ttl",         # 자격/행정구역 분류 체계(skos 개념 계층)
+}
+
+try:
+    import watchfiles
+except ImportError:  # 없으면 주기적으로 stat 해서 비교
+    watchfiles = None
+
+
+class DatasetState:
+    """
+    데이터셋 한 버전 + 그 버전에서 만든 파생 인덱스/쿼리 캐시
+    - lookups는 다 만든 뒤에는 읽기만 함
+    - 쿼리 캐시는 이 버전 안에서만 유효해서 버전이 바뀌면 같이 버려짐
+    """
+
+    def __init__(self, version: int, fingerprint: str, graphs: Optional[dict] = None):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.graphs = graphs        # 그래프 이름 → 이 버전이 보는 그래프 IRI (None이면 Fuseki에 원래 있던 그래프)
+        self.built_at = time.time()
+        self.lookups = {}
+        self._cache = {}
+        self._cache_lock = threading.Lock()
+
+    def cached(self, key, fn, *args):
+        with self._cache_lock:
+            if key in self._cache:
+                return self._cache[key]
+        value = fn(*args)
+        with self._cache_lock:
+            if len(self._cache) >= DATASET_QUERY_CACHE_SIZE:
+                # 가장 먼저 들어온 것부터 버림 (dict는 삽입 순서 유지)
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = value
+        return value
+
+
+DATASET: Optional[DatasetState] = None
+REQUEST_DATASET = contextvars.ContextVar("request_dataset", default=None)
+DATASET_BUILDERS = {}
+_DATASET_RELOAD_LOCK = threading.Lock()
+
+
+def dataset_builder(name: str):
+    """새 데이터셋 버전마다 다시 만들 파생 인덱스 등록 (fn(state) -> 값, state.lookups[name]에 저장)"""
+
+    def register(fn):
+        DATASET_BUILDERS[name] = fn
+        return fn
+
+    return register
+
+
+def dataset_lookup(name: str):
+    """현재 요청이 보고 있는 버전의 파생 인덱스 (아직 없으면 None)"""
+    state = REQUEST_DATASET.get() or DATASET
+    if state is None:
+        return None
+    return state.lookups.get(name)
+
+
+def dataset_files() -> List[str]:
+    return sorted(glob.glob(os.path.join(DATASET_DIR, "*.ttl")))
+
+
+def dataset_file_stats() -> dict:
+    """file/*.ttl 경로 → "크기:수정시각" """
+    stats = {}
+    for path in dataset_files():
+        st = os.stat(path)
+        stats[path] = f"{st.st_size}:{st.st_mtime_ns}"
+    return stats
+
+
+def dataset_fingerprint() -> str:
+    """file/*.ttl 의 (이름, 크기, 수정시각)으로 만든 지문"""
+    h = hashlib.sha1()
+    for path, stat in dataset_file_stats().items():
+        h.update(f"{os.path.basename(path)}:{stat};".encode())
+    return h.hexdigest()[:16]
+
+
+def graph_iri(graph: str) -> str:
+    return GRAPH_BASE + graph
+
+
+def staging_graph_iri(graph: str, path: str) -> str:
+    """TTL 파일 내용(크기+수정시각)별 그래프 IRI (워커끼리 같은 파일이면 같은 그래프)"""
+    st = os.stat(path)
+    stamp = hashlib.sha1(f"{st.st_size}:{st.st_mtime_ns}".encode()).hexdigest()[:12]
+    return f"{graph_iri(graph)}/{stamp}"
+
+
+def dataset_graph_name(path: str) -> str:
+    """TTL 파일 → 스테이징 그래프 이름 (DATASET_GRAPHS 매핑 없으면 파일 이름)"""
+    return graph_for_file(path) or os.path.splitext(os.path.basename(path))[0]
+
+
+def graph_for_file(path: str) -> Optional[str]:
+    """TTL 파일 → 올라갈 named graph 이름 (매핑 없으면 None = 기본 그래프)"""
+    filename = os.path.basename(path)
+    for graph, graph_file in DATASET_GRAPHS.items():
+        if graph_file == filename:
+            return graph
+    return None
+
+
+def from_clause(*graphs: str) -> str:
+    """
+    쿼리에 넣을 FROM 절 (현재 요청이 보고 있는 버전의 그래프)
+    - 핫 리로드 전(버전에 스테이징 그래프 없음): named graph 모드면 원래 그래프, 아니면 빈 문자열
+    - 핫 리로드 후: named graph 모드면 고른 그래프의 스테이징 IRI,
+      기본 그래프 모드면 그 버전 스테이징 그래프 전부 (FROM 여러 개 = 합친 기본 그래프)
+    """
+    state = REQUEST_DATASET.get() or DATASET
+    staged = state.graphs if state is not None else None
+    if staged is None:
+        if not FUSEKI_NAMED_GRAPHS:
+            return ""
+        iris = [graph_iri(g) for g in graphs]
+    elif FUSEKI_NAMED_GRAPHS:
+        iris = [staged.get(g) or graph_iri(g) for g in graphs]
+    else:
+        iris = list(staged.values())
+    return "\n".join(f"FROM {iri_ref(iri)}" for iri in iris)
+
+
+def put_ttl(path: str, method: str, params: dict):
+    """TTL 파일 하나를 풀의 모든 Fuseki에 올림 (복제본마다 자기 DB를 가짐)"""
+    for ep in SPARQL_POOL.endpoints:
+        with open(path, "rb") as f:
+            res = requests.request(
+                method,
+                ep.data_url,
+                params=params,
+                data=f,
+                headers={"Content-Type": "text/turtle; charset=utf-8"},
+                timeout=300,
+            )
+        res.raise_for_status()
+
+
+def push_dataset_to_fuseki(paths: Optional[List[str]] = None):
+    """
+    TTL 파일들을 Fuseki에 다시 올리기 (Graph Store Protocol, load_graphs.py 용 일괄 적재)
+    - named graph 모드: 바뀐 파일만 자기 그래프에 PUT(그 그래프만 교체)
+      매핑 없는 파일은 기본 그래프에 POST(추가)
+    - 아니면 전체 파일을 기본 그래프에 (첫 파일 PUT, 나머지 POST)
+    - 서버가 떠 있는 동안의 핫 리로드는 stage_dataset_graphs (원자적 교체)
+    """
+    if not FUSEKI_NAMED_GRAPHS:
+        for i, path in enumerate(dataset_files()):
+            put_ttl(path, "PUT" if i == 0 else "POST", {"default": ""})
+        return
+
+    for path in paths if paths is not None else dataset_files():
+        if not os.path.exists(path):
+            continue
+        graph = graph_for_file(path)
+        if graph is None:
+            put_ttl(path, "POST", {"default": ""})
+        else:
+            put_ttl(path, "PUT", {"graph": graph_iri(graph)})
+        logger.info("Fuseki에 %s 반영 (graph=%s)", os.path.basename(path), graph or "default")
+
+
+def stage_dataset_graphs(graphs: Optional[dict], paths: Optional[List[str]]) -> dict:
+    """
+    바뀐 TTL을 스테이징 그래프에 올리고 새 버전이 볼 그래프 매핑 반환
+    - 파일 하나 = 그래프 PUT 한 번 (Fuseki 트랜잭션 → 다 올라가기 전엔 안 보임)
+    - 예전 버전은 자기 매핑의 그래프만 보므로 적재 중에도 결과가 그대로
+    - 아직 스테이징한 적 없으면(graphs=None) 전체 파일
+    """
+    staged = dict(graphs or {})
+    if graphs is None or paths is None:
+        paths = dataset_files()
+    for path in paths:
+        name = dataset_graph_name(path)
+        if not os.path.exists(path):
+            staged.pop(name, None)
+            continue
+        iri = staging_graph_iri(name, path)
+        if staged.get(name) != iri:
+            put_ttl(path, "PUT", {"graph": iri})
+            logger.info("Fuseki에 %s 스테이징 (graph=%s)", os.path.basename(path), iri)
+        staged[name] = iri
+    return staged
+
+
+def find_staged_graphs() -> Optional[dict]:
+    """
+    재시작했을 때 현재 파일 내용의 스테이징 그래프가 Fuseki에 전부 있으면 그 매핑
+    (핫 리로드 이후 재시작하면 원래 그래프는 이미 지워졌을 수 있음)
+    """
+    staged = {dataset_graph_name(path): staging_graph_iri(dataset_graph_name(path), path) for path in dataset_files()}
+    if not staged:
+        return None
+    try:
+        for iri in staged.values():
+            if not post_sparql(f"ASK {{ GRAPH {iri_ref(iri)} {{ ?s ?p ?o }} }}").get("boolean"):
+                return None
+    except requests.RequestException as e:
+        logger.warning("스테이징 그래프 확인 실패 (원래 그래프로 조회): %s", e)
+        return None
+    return staged
+
+
+def drop_graphs_later(iris: List[str]):
+    """교체된 스테이징 그래프는 예전 버전 요청이 다 끝난 뒤에 지움"""
+
+    def drop():
+        for iri in iris:
+            for ep in SPARQL_POOL.endpoints:
+                try:
+                    requests.delete(ep.data_url, params={"graph": iri}, timeout=60)
+                except requests.RequestException as e:
+                    logger.warning("스테이징 그래프 삭제 실패: %s (%s)", iri, e)
+
+    timer = threading.Timer(DATASET_GRAPH_DROP_DELAY, drop)
+    timer.daemon = True
+    timer.start()
+
+
+def build_dataset_state(version: int, fingerprint: str, graphs: Optional[dict] = None) -> DatasetState:
+    state = DatasetState(version, fingerprint, graphs)
+    # 빌더 안에서 run_sparql 부르면 새 버전 캐시를 쓰도록
+    token = REQUEST_DATASET.set(state)
+    try:
+        for name, builder in DATASET_BUILDERS.items():
+            state.lookups[name] = builder(state)
+    finally:
+        REQUEST_DATASET.reset(token)
+    return state
+
+
+def reload_dataset(push: bool = True, changed: Optional[List[str]] = None) -> DatasetState:
+    """
+    데이터셋 새 버전 만들고 교체
+    - push=True면 먼저 바뀐 TTL을 스테이징 그래프에 올림 (changed가 있으면 그 파일들만)
+    - 적재 + 파생 인덱스 재구성이 다 끝난 뒤에 교체 → 그 전까지는 예전 버전 그래프/캐시로 응답
+    - 적재나 재구성이 실패하면 예전 버전 그대로 유지
+    """
+    global DATASET
+
+    with _DATASET_RELOAD_LOCK:
+        previous = DATASET
+        fingerprint = dataset_fingerprint()
+        graphs = previous.graphs if previous is not None else None
+        if push and FUSEKI_RELOAD_ON_CHANGE:
+            graphs = stage_dataset_graphs(graphs, changed)
+        elif previous is None:
+            graphs = find_staged_graphs()
+        version = (previous.version if previous else 0) + 1
+        state = build_dataset_state(version, fingerprint, graphs)
+        DATASET = state
+        logger.info("데이터셋 v%d 적용 (fingerprint=%s)", version, fingerprint)
+        if previous is not None and previous.graphs:
+            retired = set(previous.graphs.values()) - set((graphs or {}).values())
+            if retired:
+                drop_graphs_later(sorted(retired))
+        for hook in DATASET_RELOAD_HOOKS:
+            try:
+                hook(state)
+            except Exception:
+                logger.exception("데이터셋 교체 후처리 실패: %s", getattr(hook, "__name__", hook))
+        return state
+
+
+# 새 버전으로 바뀐 뒤 실행할 함수들 (fn(state))
+DATASET_RELOAD_HOOKS = []
+
+
+def watch_dataset_files():
+    """file/*.ttl 변경 감시 → 바뀌면 reload_dataset()"""
+    if watchfiles is not None:
+        for changes in watchfiles.watch(
+            DATASET_DIR,
+            watch_filter=lambda change, path: path.endswith(".ttl"),
+            debounce=2000,
+        ):
+            try:
+                reload_dataset(changed=sorted({path for _, path in changes}))
+            except Exception:
+                logger.exception("데이터셋 리로드 실패 (이전 버전 유지)")
+    else:
+        last = dataset_file_stats()
+        while True:
+            time.sleep(DATASET_POLL_INTERVAL)
+            current = dataset_file_stats()
+            if current == last:
+                continue
+            changed = sorted(p for p in set(current) | set(last) if current.get(p) != last.get(p))
+            try:
+                reload_dataset(changed=changed)
+                last = current
+            except Exception:
+                logger.exception("데이터셋 리로드 실패 (이전 버전 유지)")
+
+
+@app.on_event("startup")
+def start_fuseki_health_checks():
+    run_periodic("fuseki-health", FUSEKI_HEALTH_INTERVAL, SPARQL_POOL.check_all, FUSEKI_HEALTH_INTERVAL)
+
+
+@app.on_event("startup")
+def start_dataset_loader():
+    def initial_load():
+        # 처음에는 Fuseki에 이미 데이터가 있다고 보고 인덱스만 만듦
+        try:
+            reload_dataset(push=False)
+        except Exception:
+            logger.exception("데이터셋 초기 인덱스 생성 실패 (SPARQL 직접 조회로 동작)")
+        if DATASET_WATCH_ENABLED:
+            watch_dataset_files()
+
+    threading.Thread(target=initial_load, name="dataset-loader", daemon=True).start()
+
+
+@app.middleware("http")
+async def pin_dataset_middleware(request: Request, call_next):
+    """요청 시작 시점의 데이터셋 버전을 고정 (처리 중에 리로드돼도 끝까지 같은 버전)"""
+    token = REQUEST_DATASET.set(DATASET)
+    try:
+        return await call_next(request)
+    finally:
+        REQUEST_DATASET.reset(token)
+
+
+# 회차별 응답 필드 → TTL 속성 (뒤에 회차 번호 1/2/3)
+LICENSE_ROUND_PROPERTIES = {
+    "appDate": "applicationDate",
+    "examDate": "examDate",
+    "fee": "applicationFee",
+    "mode": "testMode",
+}
+LICENSE_ROUND_FIELDS = ("label", "round", "appDate", "examDate", "fee", "mode")
+
+
+def license_round_block(n: int, wanted: List[str]) -> str:
+    """n차 회차 UNION 블록 (필요한 속성만 OPTIONAL로)"""
+    lines = [f'BIND("{n}차" AS ?round)']
+    lines += [f"OPTIONAL {{ ?exam koqu:{LICENSE_ROUND_PROPERTIES[k]}{n} ?{k} . }}" for k in wanted]
+    if len(wanted) == len(LICENSE_ROUND_PROPERTIES):
+        lines.append("FILTER(" + " || ".join(f"BOUND(?{k})" for k in wanted) + ")")
+    else:
+        # 안 가져오는 속성만 있는 회차도 빠지지 않게 (행 구성은 전체 조회와 같음)
+        any_prop = "|".join(f"koqu:{prop}{n}" for prop in LICENSE_ROUND_PROPERTIES.values())
+        lines.append(f"FILTER EXISTS {{ ?exam {any_prop} ?any{n} . }}")
+    return "  {\n" + "".join(f"    {line}\n" for line in lines) + "  }"
+
+
+def query_license_items_by_name(name: Optional[str], match: str = "contains", fields: Optional[set] = None):
+    """
+    Fuseki(licenses)에 올라간 자격증 TTL에서
+    skos:prefLabel(자격증 이름)으로 검색해서
+    회차별(1차/2차/3차) 응시 정보 한 줄씩 뽑아오는 함수.
+
+    TTL 구조:
+      - 자격증 개체(ex:xxx)는 skos:Concept
+      - skos:prefLabel "세무사"@ko
+      - koqu:applicationDate1 / examDate1 / applicationFee1 / testMode1
+      - koqu:applicationDate2 / examDate2 / applicationFee2 / testMode2
+      - koqu:applicationDate3 / examDate3 / applicationFee3 / testMode3
+
+    match: exact(이름 그대로) / prefix(앞부분) / contains(부분 문자열, 기본)
+    fields: 응답에 쓸 필드만 (없으면 전부) → 안 쓰는 속성은 OPTIONAL 자체를 뺌
+    name=None 이면 이름 조건 없이 전체 (변경 피드용)
+    """
+    if name is None:
+        label_clause = "?exam skos:prefLabel ?itemLabel ."
+    else:
+        label_clause = label_match_clause("exam", "itemLabel", name, match)
+    wanted = [k for k in LICENSE_ROUND_PROPERTIES if fields is None or k in fields]
+    rounds = "\n  UNION\n".join(license_round_block(n, wanted) for n in (1, 2, 3))
+    select = " ".join(f"?{k}" for k in ["exam", "itemLabel", "round", *wanted])
+
+    query = f"""
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+
+SELECT {select}
+{from_clause("licenses")}
+WHERE {{
+  {label_clause}
+  ?exam a skos:Concept .
+
+{rounds}
+}}
+ORDER BY ?itemLabel ?round
+"""
+    names, rows = run_sparql_rows(query)
+
+    # exam → uri 로 이름만 바꾸고 나머지는 변수 이름 그대로 (fee는 xsd:int → 숫자)
+    keys = ["uri" if n == "exam" else n for n in names]
+    return [dict(zip(keys, row)) for row in rows]
+
+
+def license_round_rows(items: List[dict], order, fields: Optional[set] = None) -> List[dict]:
+    """회차 item → 응답 행 (엔드포인트마다 필드 순서만 다름, fields 있으면 그 필드만)"""
+    keys = [k for k in order if fields is None or k in fields]
+    source = {"label": "itemLabel"}
+    return [{k: it.get(source.get(k, k)) for k in keys} for it in items]
+
+
+def query_license_names() -> List[str]:
+    """회차 정보(접수일/시험일/수수료/시험방식)가 하나라도 있는 자격증 이름 전체"""
+    query = f"""
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+
+SELECT DISTINCT ?itemLabel
+{from_clause("licenses")}
+WHERE {{
+  ?exam a skos:Concept ;
+        skos:prefLabel ?itemLabel .
+  FILTER EXISTS {{
+    ?exam koqu:applicationDate1|koqu:examDate1|koqu:applicationFee1|koqu:testMode1
+        |koqu:applicationDate2|koqu:examDate2|koqu:applicationFee2|koqu:testMode2
+        |koqu:applicationDate3|koqu:examDate3|koqu:applicationFee3|koqu:testMode3 ?value .
+  }}
+}}
+ORDER BY ?itemLabel
+"""
+    _, rows = run_sparql_rows(query)
+    return [label for (label,) in rows]
+
+
+def format_yyyymmdd(date_str: str) -> str:
+    """YYYYMMDD -> YYYY-MM-DD 형태로 보기 좋게 바꾸기"""
+    if not date_str or len(date_str) != 8 or not date_str.isdigit():
+        return date_str
+    return f"{date_str[0:4]}-{date_str[4:6]}-{date_str[6:8]}"
+
+
+# -------------------------
+# 국가자격 시험일정 전체 페이지 수집 + 연도별 스냅샷
+# -------------------------
+EXAM_SCHEDULE_PAGE_SIZE = 100
+EXAM_SCHEDULE_PAGE_CONCURRENCY = 4          # 나머지 페이지 동시 요청 수
+EXAM_SCHEDULE_SNAPSHOT_TTL = 6 * 60 * 60     # 스냅샷 갱신 주기(초)
+EXAM_SCHEDULE_SNAPSHOT_DIR = os.path.join(BACKEND_DATA_DIR, "exam_schedule")
+
+_EXAM_SCHEDULE_SNAPSHOTS = {}    # (year, qualgbCd) -> {"fetched_at", "total_count", "items"}
+_EXAM_SCHEDULE_LOCKS = {}
+_EXAM_SCHEDULE_LOCKS_GUARD = threading.Lock()
+_EXAM_SCHEDULE_POOL = ThreadPoolExecutor(
+    max_workers=EXAM_SCHEDULE_PAGE_CONCURRENCY, thread_name_prefix="exam-schedule"
+)
+
+
+def fetch_exam_schedule_page(year: int, qualgb_cd: str, page: int):
+    """시험일정 API 한 페이지 호출 → (item 리스트, totalCount)"""
+    params = {
+        "serviceKey": EXAM_API_KEY,
+        "numOfRows": str(EXAM_SCHEDULE_PAGE_SIZE),
+        "pageNo": str(page),
+        "dataFormat": "json",
+        "implYy": str(year),
+        "qualgbCd": qualgb_cd,
+    }
+
+    res = upstream_get("exam_schedule", EXAM_API_URL, params)
+    res.raise_for_status()
+    data = res.json()
+
+    body = data.get("response", {}).get("body", {})
+    items = (body.get("items") or {}).get("item", [])
+
+    # 결과가 1건일 때 dict로 올 수 있어서 리스트로 통일
+    if isinstance(items, dict):
+        items = [items]
+
+    try:
+        total_count = int(body.get("totalCount") or 0)
+    except (TypeError, ValueError):
+        total_count = len(items)
+
+    return items, total_count
+
+
+def fetch_exam_schedule_all(year: int, qualgb_cd: str):
+    """
+    (implYy, qualgbCd) 한 쌍의 시험일정을 전부 가져오기
+    - 1페이지에서 totalCount 확인 → 나머지 페이지는 동시에 요청
+    - 페이지 사이에 데이터가 바뀌어 겹치는 행이 생길 수 있어서 중복 제거
+    """
+    items, total_count = fetch_exam_schedule_page(year, qualgb_cd, 1)
+    last_page = max(1, -(-total_count // EXAM_SCHEDULE_PAGE_SIZE))
+
+    pages = [items]
+    futures = [
+        # contextvars 복사해서 넘겨야 background 우선순위가 워커 스레드까지 따라감
+        _EXAM_SCHEDULE_POOL.submit(
+            contextvars.copy_context().run, fetch_exam_schedule_page, year, qualgb_cd, page
+        )
+        for page in range(2, last_page + 1)
+    ]
+    for fut in futures:
+        pages.append(fut.result()[0])
+
+    merged = []
+    seen = set()
+    for page_items in pages:
+        for item in page_items:
+            key = json.dumps(item, sort_keys=True, ensure_ascii=False)
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(item)
+
+    return {"fetched_at": time.time(), "total_count": total_count, "items": merged}
+
+
+def exam_schedule_snapshot_path(year: int, qualgb_cd: str) -> str:
+    return os.path.join(EXAM_SCHEDULE_SNAPSHOT_DIR, f"{year}_{qualgb_cd}.json")
+
+
+def _exam_schedule_lock(key):
+    with _EXAM_SCHEDULE_LOCKS_GUARD:
+        lock = _EXAM_SCHEDULE_LOCKS.get(key)
+        if lock is None:
+            lock = _EXAM_SCHEDULE_LOCKS[key] = threading.Lock()
+        return lock
+
+
+def _is_fresh(snapshot) -> bool:
+    return snapshot is not None and time.time() - snapshot["fetched_at"] < EXAM_SCHEDULE_SNAPSHOT_TTL
+
+
+def refresh_exam_schedule_snapshot(year: int, qualgb_cd: str, force: bool = False):
+    """
+    (year, qualgbCd) 스냅샷 갱신
+    - 다른 워커 프로세스가 방금 갱신했으면 디스크에서 읽어오고 끝
+    - force=True면 무조건 공공 API에서 다시 받아옴
+    """
+    key = (year, qualgb_cd)
+    with _exam_schedule_lock(key):
+        if not force:
+            snapshot = _EXAM_SCHEDULE_SNAPSHOTS.get(key)
+            if not _is_fresh(snapshot):
+                snapshot = read_json(exam_schedule_snapshot_path(year, qualgb_cd))
+            if _is_fresh(snapshot):
+                _EXAM_SCHEDULE_SNAPSHOTS[key] = snapshot
+                return snapshot
+
+        previous = _EXAM_SCHEDULE_SNAPSHOTS.get(key) or read_json(exam_schedule_snapshot_path(year, qualgb_cd))
+        snapshot = fetch_exam_schedule_all(year, qualgb_cd)
+        write_json_atomic(exam_schedule_snapshot_path(year, qualgb_cd), snapshot)
+        _EXAM_SCHEDULE_SNAPSHOTS[key] = snapshot
+        if previous is not None and previous.get("items") != snapshot["items"]:
+            EVENT_HUB.publish(
+                "exam-schedule",
+                {"year": year, "qualgb_cd": qualgb_cd, "count": len(snapshot["items"])},
+            )
+        capture_exam_schedule_changes(year, qualgb_cd, snapshot)
+        return snapshot
+
+
+def get_exam_schedule_snapshot(year: int, qualgb_cd: str):
+    """
+    스냅샷 조회 (메모리 → 디스크 → 공공 API 순)
+    - 오래된 스냅샷만 있고 갱신이 실패하면 오래된 거라도 돌려줌
+    """
+    key = (year, qualgb_cd)
+    snapshot = _EXAM_SCHEDULE_SNAPSHOTS.get(key)
+    if _is_fresh(snapshot):
+        return snapshot
+
+    try:
+        return refresh_exam_schedule_snapshot(year, qualgb_cd)
+    except Exception:
+        stale = snapshot or read_json(exam_schedule_snapshot_path(year, qualgb_cd))
+        if stale is None:
+            raise
+        logger.warning("시험일정 스냅샷 갱신 실패, 이전 스냅샷 사용: %s", key)
+        _EXAM_SCHEDULE_SNAPSHOTS[key] = stale
+        return stale
+
+
+def exam_schedule_years() -> tuple:
+    """백그라운드 갱신이 관리하는 시행년도 (올해, 내년)"""
+    this_year = datetime.now().year
+    return (this_year, this_year + 1)
+
+
+def stored_exam_schedule_snapshot(year: int, qualgb_cd: str):
+    """갱신 대상이 아닌 연도 → 남아 있는 스냅샷만 (없으면 404, 사용자 요청으로 크롤링하지 않음)"""
+    key = (year, qualgb_cd)
+    snapshot = _EXAM_SCHEDULE_SNAPSHOTS.get(key) or read_json(exam_schedule_snapshot_path(year, qualgb_cd))
+    if snapshot is None:
+        years = ", ".join(map(str, exam_schedule_years()))
+        raise HTTPException(status_code=404, detail=f"{year}년 시험일정 스냅샷 없음 (조회 가능: {years})")
+    _EXAM_SCHEDULE_SNAPSHOTS[key] = snapshot
+    return snapshot
+
+
+def call_exam_schedule_api(year: int, qualgb_name: Optional[str] = None):
+    """
+    국가자격 시험일정 raw item 리스트 반환 (로컬 스냅샷에서)
+    - qualgb_name 없으면 자격구분 4개(T/C/W/S) 스냅샷을 합쳐서 반환
+    - 올해/내년 말고는 이미 있는 스냅샷만 (아무 연도나 받으면 요청마다 전체 크롤링 + 파일 생성)
+    """
+    # 자격구분명(한글)을 코드(T/C/W/S)로 변환해서 넣기 (옵션)
+    if qualgb_name:
+        code = QUALGB_MAP.get(qualgb_name)
+        if not code:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 자격구분명: {qualgb_name}")
+        codes = [code]
+    else:
+        codes = list(QUALGB_MAP.values())
+
+    load = get_exam_schedule_snapshot if year in exam_schedule_years() else stored_exam_schedule_snapshot
+    items = []
+    for code in codes:
+        items.extend(load(year, code)["items"])
+    return items
+
+
+def refresh_all_exam_schedules():
+    """올해/내년 × 자격구분 전체 스냅샷 갱신 (백그라운드 작업용)"""
+    for year in exam_schedule_years():
+        for code in QUALGB_MAP.values():
+            refresh_exam_schedule_snapshot(year, code)
+
+
+@app.on_event("startup")
+def start_exam_schedule_refresher():
+    run_periodic("exam-schedule-refresh", EXAM_SCHEDULE_SNAPSHOT_TTL, refresh_all_exam_schedules)
+
+
+def call_exam_area_api(brch_cd: str, page: int = 1, per_page: int = 50):
+    """
+    국가자격시험 시험장소 API 호출해서 raw XML 반환
+    brch_cd: 지사코드 (예: 01=서울, 10=경기, 18=제주 ...)
+    """
+    params = {
+        "serviceKey": EXAM_API_KEY,
+        "brchCd": brch_cd,
+        "numOfRows": str(per_page),
+        "pageNo": str(page),
+    }
+
+    res = upstream_get("exam_area", EXAM_AREA_API_URL, params)
+    res.raise_for_status()
+    return res.text  # XML 문자열 그대로 반환
+
+
+EXAM_AREA_FIELDS = ("address", "brchCd", "brchNm", "examAreaGbNm", "examAreaNm", "plceLoctGid", "telNo")
+
+
+def parse_exam_area_stream(chunks):
+    """
+    시험장소 XML을 조각(bytes) 단위로 받아가면서 파싱 (XMLPullParser)
+    - 응답 전체를 트리로 만들지 않고 <item> 하나 끝날 때마다 dict로 바꾸고 버림
+    - 반환: (dict 리스트, totalCount)
+    """
+    parser = ET.XMLPullParser(events=("end",))
+    results = []
+    total_count = 0
+
+    def drain():
+        nonlocal total_count
+        for _, el in parser.read_events():
+            # openapi.q-net 응답 구조: <response><body><items><item>...</item></items></body></response>
+            if el.tag == "item":
+                row = {}
+                for tag in EXAM_AREA_FIELDS:
+                    child = el.find(tag)
+                    row[tag] = child.text.strip() if child is not None and child.text is not None else None
+                results.append(row)
+                el.clear()
+            elif el.tag == "totalCount":
+                text = (el.text or "").strip()
+                total_count = int(text) if text.isdigit() else 0
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        drain()
+    parser.close()
+    drain()
+
+    return results, total_count
+
+
+def parse_exam_area_xml(xml_text: str):
+    """
+    시험장소 XML 응답을 파싱해서 파이썬 dict 리스트로 변환
+    """
+    return parse_exam_area_stream([xml_text.encode("utf-8")])
+
+
+def fetch_exam_area_page(brch_cd: str, page: int = 1, per_page: int = 50):
+    """시험장소 API 한 페이지를 받으면서 바로 파싱 → (dict 리스트, totalCount)"""
+    params = {
+        "serviceKey": EXAM_API_KEY,
+        "brchCd": brch_cd,
+        "numOfRows": str(per_page),
+        "pageNo": str(page),
+    }
+
+    res = upstream_get("exam_area", EXAM_AREA_API_URL, params, stream=True)
+    try:
+        res.raise_for_status()
+        return parse_exam_area_stream(res.iter_content(chunk_size=16 * 1024))
+    finally:
+        res.close()
+
+
+# -------------------------
+# 시험장소 전체 스냅샷 (지사코드 전부 크롤링)
+# -------------------------
+# q-net 지사코드: 01=서울 ... 18=제주 등. 결과 없는 코드는 스냅샷에 안 들어가서
+# 넉넉하게 01~30 을 돌림 (EXAM_AREA_BRANCH_CODES=01,02,... 로 바꿀 수 있음)
+EXAM_AREA_BRANCH_CODES = [
+    code.strip()
+    for code in os.getenv("EXAM_AREA_BRANCH_CODES", ",".join(f"{i:02d}" for i in range(1, 31))).split(",")
+    if code.strip()
+]
+EXAM_AREA_CRAWL_PAGE_SIZE = 100
+EXAM_AREA_CRAWL_CONCURRENCY = 4
+EXAM_AREA_SNAPSHOT_INTERVAL = 24 * 60 * 60
+EXAM_AREA_SNAPSHOT_DIR = os.path.join(BACKEND_DATA_DIR, "exam_centers")
+EXAM_AREA_SNAPSHOT_KEEP = 3        # 이전 버전 파일 몇 개까지 남길지
+
+_EXAM_AREA_POOL = ThreadPoolExecutor(max_workers=EXAM_AREA_CRAWL_CONCURRENCY, thread_name_prefix="exam-area")
+
+
+class ExamCenterSnapshot:
+    """시험장소 스냅샷 한 버전 + 조회용 인덱스 (만든 뒤에는 안 바꿈)"""
+
+    def __init__(self, version: int, built_at: float, items: list):
+        self.version = version
+        self.built_at = built_at
+        self.items = sorted(
+            items, key=lambda r: (r.get("brchCd") or "", r.get("examAreaNm") or "", r.get("plceLoctGid") or "")
+        )
+        # 커서 페이지네이션용 정렬 키 (정렬 기준이 같은 행은 순번을 붙여 유일하게)
+        self.keys = []
+        seen = {}
+        for row in self.items:
+            base = (row.get("brchCd") or "", row.get("examAreaNm") or "", row.get("plceLoctGid") or "")
+            seen[base] = seen.get(base, -1) + 1
+            self.keys.append((*base, seen[base]))
+        self.by_branch = {}
+        self.branch_keys = {}
+        for row, key in zip(self.items, self.keys):
+            self.by_branch.setdefault(row.get("brchCd"), []).append(row)
+            self.branch_keys.setdefault(row.get("brchCd"), []).append(key)
+        # 이름/주소 검색용 텍스트 미리 만들어두기
+        self.search_text = {
+            id(row): f"{row.get('examAreaNm') or ''} {row.get('address') or ''}".casefold() for row in self.items
+        }
+
+
+EXAM_CENTER_SNAPSHOT: Optional[ExamCenterSnapshot] = None
+
+
+def _crawl_exam_area_branch(brch_cd: str):
+    rows, total_count = fetch_exam_area_page(brch_cd, 1, EXAM_AREA_CRAWL_PAGE_SIZE)
+    last_page = max(1, -(-total_count // EXAM_AREA_CRAWL_PAGE_SIZE))
+    futures = [
+        _EXAM_AREA_POOL.submit(
+            contextvars.copy_context().run, fetch_exam_area_page, brch_cd, page, EXAM_AREA_CRAWL_PAGE_SIZE
+        )
+        for page in range(2, last_page + 1)
+    ]
+    for fut in futures:
+        rows.extend(fut.result()[0])
+    return rows
+
+
+def crawl_exam_areas(previous: Optional[ExamCenterSnapshot] = None):
+    """
+    모든 지사코드 × 모든 페이지를 동시에 받아서 시험장소 목록 하나로 합치기
+    - 지사 하나가 실패하면 이전 스냅샷의 그 지사 데이터를 그대로 씀
+    """
+    items = []
+    # 지사 단위 작업이 페이지 작업을 다시 같은 풀에 넣으면 풀이 막힐 수 있어서 지사는 별도 스레드로
+    with ThreadPoolExecutor(max_workers=EXAM_AREA_CRAWL_CONCURRENCY, thread_name_prefix="exam-area-branch") as pool:
+        futures = {
+            brch_cd: pool.submit(contextvars.copy_context().run, _crawl_exam_area_branch, brch_cd)
+            for brch_cd in EXAM_AREA_BRANCH_CODES
+        }
+        for brch_cd, fut in futures.items():
+            try:
+                items.extend(fut.result())
+            except Exception:
+                logger.exception("시험장소 크롤링 실패: brchCd=%s", brch_cd)
+                if previous is not None:
+                    items.extend(previous.by_branch.get(brch_cd, []))
+    return items
+
+
+def load_exam_center_snapshot() -> Optional[ExamCenterSnapshot]:
+    """디스크에 있는 최신 버전 스냅샷 읽기"""
+    current = read_json(os.path.join(EXAM_AREA_SNAPSHOT_DIR, "current.json"))
+    if not current:
+        return None
+    data = read_json(os.path.join(EXAM_AREA_SNAPSHOT_DIR, f"v{current['version']}.json"))
+    if not data:
+        return None
+    return ExamCenterSnapshot(data["version"], data["built_at"], data["items"])
+
+
+def refresh_exam_center_snapshot():
+    """
+    시험장소 스냅샷 새 버전 만들기
+    - v{N}.json 저장 → current.json 갱신 → 메모리 참조 교체 순서
+    - 크롤링 결과가 비어 있으면 (API 장애 등) 이전 버전 유지
+    """
+    global EXAM_CENTER_SNAPSHOT
+
+    previous = EXAM_CENTER_SNAPSHOT or load_exam_center_snapshot()
+    items = crawl_exam_areas(previous)
+    if not items:
+        logger.warning("시험장소 크롤링 결과가 비어 있어서 이전 스냅샷 유지")
+        EXAM_CENTER_SNAPSHOT = previous
+        return previous
+
+    version = (previous.version if previous else 0) + 1
+    built_at = time.time()
+    write_json_atomic(
+        os.path.join(EXAM_AREA_SNAPSHOT_DIR, f"v{version}.json"),
+        {"version": version, "built_at": built_at, "items": items},
+    )
+    write_json_atomic(os.path.join(EXAM_AREA_SNAPSHOT_DIR, "current.json"), {"version": version})
+
+    old_path = os.path.join(EXAM_AREA_SNAPSHOT_DIR, f"v{version - EXAM_AREA_SNAPSHOT_KEEP}.json")
+    if os.path.exists(old_path):
+        os.remove(old_path)
+
+    EXAM_CENTER_SNAPSHOT = ExamCenterSnapshot(version, built_at, items)
+    return EXAM_CENTER_SNAPSHOT
+
+
+@app.on_event("startup")
+def start_exam_center_refresher():
+    global EXAM_CENTER_SNAPSHOT
+
+    EXAM_CENTER_SNAPSHOT = load_exam_center_snapshot()
+    # 디스크 스냅샷이 하루 안 된 거면 첫 크롤링은 다음 주기로 미룸
+    delay = 0.0
+    if EXAM_CENTER_SNAPSHOT is not None:
+        age = time.time() - EXAM_CENTER_SNAPSHOT.built_at
+        delay = max(0.0, EXAM_AREA_SNAPSHOT_INTERVAL - age)
+    run_periodic("exam-center-refresh", EXAM_AREA_SNAPSHOT_INTERVAL, refresh_exam_center_snapshot, delay)
+
+
+@app.get("/")
+def root():
+    return {"message": "backend alive"}
+
+
+@app.get("/stats/upstream")
+def get_upstream_stats_view():
+    """
+    공공 API별 최근 응답시간(p50/p95/p99), 현재 타임아웃, 헤지 횟수 조회
+    """
+    with _UPSTREAM_STATS_LOCK:
+        names = sorted(UPSTREAM_STATS.keys())
+    return FastJSONResponse({name: get_upstream_stats(name).snapshot() for name in names})
+
+
+@app.get("/stats/quota")
+def get_upstream_quota_view():
+    """
+    공공 API(serviceKey 공용)별 남은 호출 예산 조회
+    """
+    return FastJSONResponse(UPSTREAM_QUOTA.budget())
+
+
+@app.get("/stats/fuseki")
+def get_fuseki_pool_view():
+    """
+    Fuseki 엔드포인트별 진행 중 요청 수, 응답시간, 제외 여부 조회
+    """
+    return FastJSONResponse({"endpoints": SPARQL_POOL.snapshot()})
+
+
+@app.get("/stats/dataset")
+def get_dataset_view():
+    """
+    현재 적용된 TTL 데이터셋 버전 조회
+    """
+    state = DATASET
+    if state is None:
+        return FastJSONResponse({"version": None, "fingerprint": dataset_fingerprint(), "ready": False})
+    return FastJSONResponse(
+        {
+            "version": state.version,
+            "fingerprint": state.fingerprint,
+            "built_at": datetime.fromtimestamp(state.built_at).isoformat(timespec="seconds"),
+            "graphs": state.graphs,
+            "lookups": sorted(state.lookups),
+            "ready": True,
+        }
+    )
+
+
+# -------------------------
+# 자격증 이름 오타 허용 검색 (한글 자모 분해 + SymSpell 삭제 사전)
+# -------------------------
+# "정보처리기서" 처럼 한 글자만 틀려도 CONTAINS 검색은 0건 → 사용자가 계속 다시 검색함
+# 이름을 자모 단위로 풀어서(사→ㅅㅏ, 서→ㅅㅓ: 거리 1) 앞 FUZZY_PREFIX_LENGTH 자모의
+# "최대 FUZZY_MAX_DISTANCE개 지운 문자열" → 이름 목록 사전을 데이터셋 버전마다 만들어두고
+# 검색어도 똑같이 지워서 사전에서 후보만 꺼낸 뒤 실제 편집 거리로 확인 (전체 스캔 없음)
+FUZZY_MAX_DISTANCE = 2
+FUZZY_PREFIX_LENGTH = 7
+SEARCH_MATCH_MODES = ("contains", "fuzzy", "bm25")
+
+HANGUL_BASE = 0xAC00
+HANGUL_LAST = 0xD7A3
+CHOSEONG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSEONG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSEONG = ("", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+             "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ")
+
+
+def hangul_jamo(text: str) -> str:
+    """공백 빼고 소문자로 + 한글 음절은 초/중/종성으로 풀기 (나머지 글자는 그대로)"""
+    out = []
+    for ch in text.casefold():
+        code = ord(ch)
+        if HANGUL_BASE <= code <= HANGUL_LAST:
+            idx = code - HANGUL_BASE
+            out.append(CHOSEONG[idx // 588] + JUNGSEONG[idx % 588 // 28] + JONGSEONG[idx % 28])
+        elif not ch.isspace():
+            out.append(ch)
+    return "".join(out)
+
+
+def deletion_variants(word: str, max_distance: int) -> set:
+    """word에서 글자를 0~max_distance개 지운 문자열 전부"""
+    variants = {word}
+    frontier = {word}
+    for _ in range(max_distance):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        variants |= frontier
+    return variants
+
+
+def edit_distance_row(a: str, b: str, max_distance: int) -> Optional[List[int]]:
+    """
+    a 와 b[:j] (j = 0..len(b)) 사이 편집 거리 (인접 글자 바꿈도 1, OSA)
+    - 대각선 ±max_distance 띠만 계산하고, 한 줄 전체가 max_distance를 넘으면 바로 None
+    - 반환값[-1] 은 b 전체와의 거리, min(반환값) 은 b 앞부분 중 가장 가까운 것과의 거리
+    """
+    inf = max_distance + 1
+    prev2 = None
+    prev = [j if j <= max_distance else inf for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        cur = [i if i <= max_distance else inf] + [inf] * len(b)
+        best = cur[0]
+        # 안쪽 루프는 검색마다 후보 수 × 수십 번 돌아서 min() 대신 비교문으로
+        for j in range(max(1, i - max_distance), min(len(b), i + max_distance) + 1):
+            d = prev[j - 1] if ca == b[j - 1] else prev[j - 1] + 1
+            if prev[j] + 1 < d:
+                d = prev[j] + 1
+            if cur[j - 1] + 1 < d:
+                d = cur[j - 1] + 1
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == b[j - 1] and prev2[j - 2] + 1 < d:
+                d = prev2[j - 2] + 1
+            if d > inf:
+                d = inf
+            cur[j] = d
+            if d < best:
+                best = d
+        if best > max_distance:
+            return None
+        prev2, prev = prev, cur
+    return prev
+
+
+class LicenseLabelIndex:
+    """자격증 이름(skos:prefLabel) 오타 허용 검색 인덱스 (데이터셋 버전마다 새로 만들고 읽기만)"""
+
+    def __init__(self, entries: List[tuple]):
+        self.entries = entries      # (uri, label, desc)
+        self.jamo = [hangul_jamo(label) for _, label, _ in entries]
+        self.deletes = {}
+        for i, word in enumerate(self.jamo):
+            for variant in deletion_variants(word[:FUZZY_PREFIX_LENGTH], FUZZY_MAX_DISTANCE):
+                self.deletes.setdefault(variant, []).append(i)
+
+    def search(self, query: str, max_distance: int, limit: int) -> List[tuple]:
+        """
+        → [(거리, uri, label, desc)] 거리 가까운 순 (같으면 이름 길이 차이 작은 순)
+        - 이름 전체뿐 아니라 이름 앞부분과의 거리도 봄
+          ("정보처리기" → "정보처리기사"도 거리 0, 대신 길이 차이로 뒤에 정렬)
+        """
+        inf = max_distance + 1
+        word = hangul_jamo(query)
+        if not word:
+            return []
+        candidates = set()
+        for variant in deletion_variants(word[:FUZZY_PREFIX_LENGTH], max_distance):
+            candidates.update(self.deletes.get(variant, ()))
+
+        scored = []
+        for i in candidates:
+            target = self.jamo[i]
+            row = edit_distance_row(word, target, max_distance)
+            distance = min(row) if row is not None else inf
+            if distance <= max_distance:
+                uri, label, desc = self.entries[i]
+                scored.append((distance, abs(len(target) - len(word)), label, uri, desc))
+        scored.sort()
+        return [(d, uri, label, desc) for d, _, label, uri, desc in scored[:limit]]
+
+
+@dataset_builder("license_label_index")
+def build_license_label_index(state: DatasetState) -> LicenseLabelIndex:
+    query = f"""
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+PREFIX dcterms: <http://purl.org/dc/terms/>
+
+SELECT ?license ?label ?desc
+{from_clause("licenses", "concepts")}
+WHERE {{
+  ?license a skos:Concept ;
+           skos:inScheme koqu:QualificationScheme ;
+           skos:prefLabel ?label .
+  OPTIONAL {{ ?license dcterms:description ?desc . }}
+}}
+"""
+    _, rows = run_sparql_rows(query)
+    return LicenseLabelIndex(rows)
+
+
+# -------------------------
+# 자격증 형태소 토큰 BM25 검색 (토큰 역색인)
+# -------------------------
+# "관광 통역", "전문 자격" 처럼 띄어 쓴 검색어는 이름 어디에도 통째로 없어서 CONTAINS로는 0건
+# → file/wjdwp.py 와 같은 Okt 형태소 분석으로 이름/계열명/자격구분명을 토큰으로 나누고
+#   토큰 → {문서: 빈도} 역색인을 데이터셋 버전마다 만들어서 검색어 토큰의 postings만 봄
+# konlpy(Okt)가 없으면 file/*_칼럼_최종.csv 의 *_tokN 칼럼(같은 Okt 결과)을 사전으로
+# 최장 일치 분할 (사전에 없는 부분은 한 토큰으로 남김)
+try:
+    from konlpy.tag import Okt
+except ImportError:  # 없으면 토큰 칼럼 사전으로 분할
+    Okt = None
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+BM25_OPS = ("and", "or")
+TOKEN_USER_WORDS = ["관광", "통역", "안내사", "기능자"]     # file/wjdwp.py USER_WORDS 와 같게
+TOKEN_COLUMN_FILES = ("계열명_칼럼_최종.csv", "자격구분명_칼럼_최종.csv")
+LICENSE_CODE_FILE = "자격구분명_고유코드ver.csv"    # 종목명 ↔ 계열명 / 자격구분명
+
+_okt = None
+_okt_lock = threading.Lock()
+
+
+def okt_tagger():
+    """Okt는 만들 때 JVM을 띄워서 느림 → 프로세스에 하나만"""
+    global _okt
+    if Okt is None:
+        return None
+    with _okt_lock:
+        if _okt is None:
+            okt = Okt()
+            if hasattr(okt, "add_dictionary"):
+                for word in TOKEN_USER_WORDS:
+                    try:
+                        okt.add_dictionary(word, "Noun")
+                    except Exception:
+                        pass
+            _okt = okt
+    return _okt
+
+
+def read_csv_rows(path: str) -> List[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def load_token_vocabulary() -> set:
+    """*_칼럼_최종.csv 의 *_tokN 칼럼 값 전체 (+ USER_WORDS)"""
+    vocab = {word.casefold() for word in TOKEN_USER_WORDS}
+    for name in TOKEN_COLUMN_FILES:
+        for row in read_csv_rows(os.path.join(DATASET_DIR, name)):
+            for column, value in row.items():
+                if column and "_tok" in column and value and value.strip():
+                    vocab.add(value.strip().casefold())
+    return vocab
+
+
+def load_license_groups() -> dict:
+    """종목명/계열명 → [(자격구분명, 계열명)] (이름 토큰에 상위 분류 토큰도 같이 넣으려고)"""
+    groups = {}
+    for row in read_csv_rows(os.path.join(DATASET_DIR, LICENSE_CODE_FILE)):
+        kind = (row.get("자격구분명") or "").strip()
+        series = (row.get("계열명") or "").strip()
+        for name in {(row.get("종목명") or "").strip(), series}:
+            if name and (kind, series) not in groups.get(name, ()):
+                groups.setdefault(name, []).append((kind, series))
+    return groups
+
+
+class MorphTokenizer:
+    """Okt.morphs(stem=True), 없으면 토큰 사전 최장 일치 분할"""
+
+    def __init__(self, vocab: set):
+        self.okt = okt_tagger()
+        self.vocab = vocab
+        self.max_len = max((len(w) for w in vocab), default=0)
+
+    def tokens(self, text: Optional[str]) -> List[str]:
+        if not text or not text.strip():
+            return []
+        if self.okt is not None:
+            return [t.casefold() for t in self.okt.morphs(text.strip(), stem=True) if t.strip()]
+        out = []
+        for chunk in text.casefold().split():
+            out.extend(self.segment(chunk))
+        return out
+
+    def segment(self, chunk: str) -> List[str]:
+        out = []
+        unknown = ""
+        i = 0
+        while i < len(chunk):
+            for size in range(min(self.max_len, len(chunk) - i), 0, -1):
+                if chunk[i:i + size] in self.vocab:
+                    if unknown:
+                        out.append(unknown)
+                        unknown = ""
+                    out.append(chunk[i:i + size])
+                    i += size
+                    break
+            else:
+                unknown += chunk[i]
+                i += 1
+        if unknown:
+            out.append(unknown)
+        return out
+
+
+class LicenseTokenIndex:
+    """자격증 형태소 토큰 역색인 + BM25 (데이터셋 버전마다 새로 만들고 읽기만)"""
+
+    def __init__(self, entries: List[tuple], tokenizer: MorphTokenizer, groups: dict):
+        self.entries = entries      # (uri, label, desc)
+        self.tokenizer = tokenizer
+        self.postings = {}          # 토큰 → {문서 번호: 토큰 빈도}
+        self.lengths = []
+        field_tokens = {}           # 계열명/자격구분명은 여러 이름이 같이 써서 한 번만 분석
+        for i, (_, label, _) in enumerate(entries):
+            terms = tokenizer.tokens(label)
+            for kind, series in groups.get(label, ()):
+                for field in (series, kind):
+                    if field and field != label:
+                        if field not in field_tokens:
+                            field_tokens[field] = tokenizer.tokens(field)
+                        terms.extend(field_tokens[field])
+            for term in terms:
+                doc_tf = self.postings.setdefault(term, {})
+                doc_tf[i] = doc_tf.get(i, 0) + 1
+            self.lengths.append(len(terms))
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        n = len(entries)
+        self.idf = {
+            term: math.log(1 + (n - len(doc_tf) + 0.5) / (len(doc_tf) + 0.5))
+            for term, doc_tf in self.postings.items()
+        }
+
+    def join_indexed(self, tokens: List[str]) -> List[str]:
+        """이웃한 토큰을 붙인 문자열이 색인 토큰이면 가장 길게 붙임 (이름과 검색어 분할 맞추기)"""
+        out = []
+        i = 0
+        while i < len(tokens):
+            j = len(tokens)
+            while j > i + 1 and "".join(tokens[i:j]) not in self.postings:
+                j -= 1
+            out.append("".join(tokens[i:j]))
+            i = j
+        return out
+
+    def search(self, query: str, op: str, limit: int):
+        """
+        → (검색어 토큰, [(점수, uri, label, desc)]) 점수 높은 순
+        - op=and: 모든 토큰이 있는 문서만 (postings 짧은 것부터 교집합)
+        - op=or : 토큰 하나라도 있는 문서
+        - 띄어 쓴 검색어 토큰은 붙인 게 색인에 있으면 붙여서 봄
+          ("정보 처리" → 정보처리, 이름 "정보처리기사"는 정보처리 + 기사로 색인됨)
+        """
+        terms = list(dict.fromkeys(self.join_indexed(self.tokenizer.tokens(query))))
+        lists = [self.postings.get(term) for term in terms]
+        if op == "and":
+            if not lists or any(doc_tf is None for doc_tf in lists):
+                return terms, []
+            ordered = sorted(lists, key=len)
+            docs = set(ordered[0])
+            for doc_tf in ordered[1:]:
+                docs &= doc_tf.keys()
+                if not docs:
+                    return terms, []
+        else:
+            docs = set()
+            for doc_tf in lists:
+                if doc_tf:
+                    docs.update(doc_tf)
+
+        weighted = [(self.idf[term], doc_tf) for term, doc_tf in zip(terms, lists) if doc_tf]
+        scored = []
+        for i in docs:
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[i] / self.avg_length)
+            score = 0.0
+            for idf, doc_tf in weighted:
+                tf = doc_tf.get(i, 0)
+                if tf:
+                    score += idf * tf * (BM25_K1 + 1) / (tf + norm)
+            uri, label, desc = self.entries[i]
+            scored.append((-score, label, uri, desc))
+        top = heapq.nsmallest(limit, scored)
+        return terms, [(-neg, uri, label, desc) for neg, label, uri, desc in top]
+
+
+@dataset_builder("license_token_index")
+def build_license_token_index(state: DatasetState) -> LicenseTokenIndex:
+    query = f"""
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+PREFIX dcterms: <http://purl.org/dc/terms/>
+
+SELECT ?license ?label ?desc
+{from_clause("licenses", "concepts")}
+WHERE {{
+  ?license a skos:Concept ;
+           skos:inScheme koqu:QualificationScheme ;
+           skos:prefLabel ?label .
+  OPTIONAL {{ ?license dcterms:description ?desc . }}
+}}
+"""
+    _, rows = run_sparql_rows(query)
+    return LicenseTokenIndex(rows, MorphTokenizer(load_token_vocabulary()), load_license_groups())
+
+
+@app.get("/licenses/search")
+def search_licenses(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=CURSOR_MAX_LIMIT, description="한 번에 받을 개수"),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (다음 페이지)"),
+    match: str = Query(
+        "contains", description="contains(부분 문자열) / fuzzy(오타 허용, 가까운 순) / bm25(형태소 토큰, 점수순)"
+    ),
+    distance: int = Query(
+        FUZZY_MAX_DISTANCE, ge=0, le=FUZZY_MAX_DISTANCE, description="fuzzy 허용 편집 거리 (자모 단위)"
+    ),
+    op: str = Query("and", description="bm25 검색어 토큰 결합: and(전부 포함) / or(하나라도)"),
+):
+    """
+    자격증 이름(부분 문자열)으로 그래프DB에서 검색
+    - (이름, URI) 순으로 limit개씩, 다음 페이지는 next_cursor로
+    - match=fuzzy 면 자모 편집 거리 distance 이내 이름을 가까운 순으로 limit개 (커서 없음)
+    - match=bm25 면 형태소 토큰 역색인에서 BM25 점수 높은 순으로 limit개 (커서 없음)
+    예) /licenses/search?q=세무사
+    예) /licenses/search?q=기사&limit=50&cursor=...
+    예) /licenses/search?q=정보처리기서&match=fuzzy
+    예) /licenses/search?q=관광 통역&match=bm25
+    예) /licenses/search?q=전문 자격&match=bm25&op=or
+    예) /licenses/search?q=정보 처리&match=bm25  (붙여서 색인된 "정보처리"로 찾음)
+    """
+    if match not in SEARCH_MATCH_MODES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"match는 {', '.join(SEARCH_MATCH_MODES)} 중 하나여야 합니다.",
+        )
+    if match == "fuzzy":
+        if cursor:
+            raise HTTPException(status_code=400, detail="match=fuzzy 는 cursor를 지원하지 않습니다.")
+        index = dataset_lookup("license_label_index")
+        if index is None:
+            raise HTTPException(status_code=503, detail="자격증 이름 인덱스 준비 중")
+        results = [
+            {"uri": uri, "label": label, "desc": desc, "distance": d}
+            for d, uri, label, desc in index.search(q, distance, limit)
+        ]
+        return FastJSONResponse({"query": q, "count": len(results), "results": results, "next_cursor": None})
+    if match == "bm25":
+        if op not in BM25_OPS:
+            raise HTTPException(status_code=400, detail=f"op는 {', '.join(BM25_OPS)} 중 하나여야 합니다.")
+        if cursor:
+            raise HTTPException(status_code=400, detail="match=bm25 는 cursor를 지원하지 않습니다.")
+        index = dataset_lookup("license_token_index")
+        if index is None:
+            raise HTTPException(status_code=503, detail="자격증 토큰 인덱스 준비 중")
+        terms, hits = index.search(q, op, limit)
+        results = [
+            {"uri": uri, "label": label, "desc": desc, "score": round(score, 4)}
+            for score, uri, label, desc in hits
+        ]
+        return FastJSONResponse(
+            {"query": q, "tokens": terms, "op": op, "count": len(results), "results": results, "next_cursor": None}
+        )
+
+    return FastJSONResponse(search_licenses_payload(q, limit, cursor))
+
+
+def search_licenses_payload(q: str, limit: int = 20, cursor: Optional[str] = None) -> dict:
+    """/licenses/search (match=contains) 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    keyword = escape_literal(q)
+    after = keyset_after_clause(decode_cursor(cursor), ("label", "license"))
+
+    query = f"""
+PREFIX skos: <http://www.w3.org/2004/02/skos/core#>
+PREFIX koqu: <http://knowledgemap.kr/koqu/def/>
+PREFIX dcterms: <http://purl.org/dc/terms/>
+
+SELECT ?license ?label ?desc
+{from_clause("licenses", "concepts")}
+WHERE {{
+  ?license a skos:Concept ;
+           skos:inScheme koqu:QualificationScheme ;
+           skos:prefLabel ?label .
+  OPTIONAL {{ ?license dcterms:description ?desc . }}
+  FILTER(CONTAINS(STR(?label), "{keyword}"))
+  {after}
+}}
+ORDER BY ?label ?license
+LIMIT {limit + 1}
+"""
+
+    _, rows = run_sparql_rows(query)
+
+    keyed = (
+        ((label, uri), {"uri": uri, "label": label, "desc": desc})
+        for uri, label, desc in rows
+    )
+    results, next_cursor = page_with_cursor(keyed, limit)
+
+    return {"query": q, "count": len(results), "results": results, "next_cursor": next_cursor}
+
+@app.get("/licenses/schedule")
+def get_license_schedule(
+    name: str = Query(..., description="자격증 이름(예: 세무사)"),
+    match: str = Query("contains", description="이름 매칭 방식: exact / prefix / contains"),
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: label,round,examDate)"),
+):
+    """
+    ✅ fake_data_v3.ttl (GraphDB) 에서 자격증 일정 조회
+    - itemLable 로 검색해서 round / appDate / examDate / fee / mode 모두 반환
+    - match=exact 면 라벨 인덱스로 바로 찾음 (정확한 이름을 알 때)
+    - fields 주면 그 필드만 (SPARQL에서도 안 쓰는 속성은 안 가져옴)
+    """
+    return FastJSONResponse(license_schedule_payload(name, match, fields))
+
+
+def license_schedule_payload(name: str, match: str = "contains", fields: Optional[str] = None) -> dict:
+    """/licenses/schedule 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    check_label_match(match)
+    selected = parse_fields(fields, LICENSE_ROUND_FIELDS)
+    items = query_license_items_by_name(name, match, selected)
+
+    return {
+        "name": name,
+        "year": None,          # 예전 응답형식 맞추려고 남겨둠(실제 필터는 안 함)
+        "qualgb_name": None,   # 마찬가지
+        "total_from_api": len(items),
+        "count": len(items),
+        "results": license_round_rows(
+            items, ("label", "round", "appDate", "examDate", "fee", "mode"), selected
+        ),
+    }  
+def resolve_weather_region(region: str):
+    """지역 이름 → (중기육상예보용 regId, 중기기온용 regId), 모르는 지역이면 400"""
+    land_reg_id = WEATHER_LAND_REGION_MAP.get(region)
+    temp_reg_id = WEATHER_TEMP_REGION_MAP.get(region)
+
+    if not land_reg_id or not temp_reg_id:
+        valid = ", ".join(WEATHER_LAND_REGION_MAP.keys())
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 지역: {region}. 사용 가능한 값: {valid}",
+        )
+    return land_reg_id, temp_reg_id
+
+
+WEATHER_FIELDS = ("region", "regId", "tmFc", "has_data", "summary_day4", "land_raw", "temp_raw")
+
+
+def build_mid_weather(region: str, land_reg_id: str, tm_fc: str, land, ta) -> dict:
+    """육상예보 + 기온 item으로 /weather/mid 응답 한 건 만들기"""
+    # 공공데이터 쪽에 아직 데이터가 없을 수도 있으니까 그대로 알려주기
+    if land is None or ta is None:
+        return {
+            "region": region,
+            "regId": land_reg_id,
+            "tmFc": tm_fc,
+            "has_data": False,
+            "land_raw": land,
+            "temp_raw": ta,
+        }
+
+    # 🔎 4~10일 중에서 실제로 값이 들어있는 가장 빠른 날짜 찾기
     first_day = None
     for d in range(4, 11):
         if land.get(f"wf{d}Am") or land.get(f"wf{d}Pm"):
             first_day = d
             break
 
-    # 아무 날에도 값이 없으면 요약은 전부 null 처리
-    if first_day is None:
-        summary_day4 = {
-            "day_offset": None,
-            "am": {"weather": None, "rain_prob": None},
-            "pm": {"weather": None, "rain_prob": None},
-            "temp": {"min": None, "max": None},
-        }
+    # 아무 날에도 값이 없으면 요약은 전부 null 처리
+    if first_day is None:
+        summary_day4 = {
+            "day_offset": None,
+            "am": {"weather": None, "rain_prob": None},
+            "pm": {"weather": None, "rain_prob": None},
+            "temp": {"min": None, "max": None},
+        }
+    else:
+        summary_day4 = {
+            "day_offset": first_day,  # 오늘 기준 +몇 일인지
+            "am": {
+                "weather": land.get(f"wf{first_day}Am"),
+                "rain_prob": land.get(f"rnSt{first_day}Am"),
+            },
+            "pm": {
+                "weather": land.get(f"wf{first_day}Pm"),
+                "rain_prob": land.get(f"rnSt{first_day}Pm"),
+            },
+            "temp": {
+                "min": ta.get(f"taMin{first_day}"),
+                "max": ta.get(f"taMax{first_day}"),
+            },
+        }
+
+    return {
+        "region": region,
+        "regId": land_reg_id,
+        "tmFc": tm_fc,
+        "has_data": True,
+        "summary_day4": summary_day4,
+        "land_raw": land,
+        "temp_raw": ta,
+    }
+
+
+@app.get("/weather/mid")
+def get_mid_weather(
+    region: str = Query(
+        ...,
+        description="예: 수도권, 강원영서, 강원영동, 충청북도, 충남권, 전라북도, 전남권, 경북권, 경남권, 제주도 중 하나",
+    ),
+    tm_fc: Optional[str] = Query(
+        None,
+        description="(선택) 중기예보 발표시각, 예: 202512070600. 없으면 서버가 자동으로 가장 최근 발표시각을 계산"
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="(선택) 응답에 넣을 필드, 예: region,tmFc,summary_day4 (land_raw/temp_raw 원본 빼고 받기)",
+    ),
+):
+    """
+    기상청 중기예보(중기육상예보 + 중기기온)를 합쳐서 반환
+    - region: 사람이 읽는 지역 이름 (수도권 등) → regId로 매핑
+    - 반환: 3일 후 기준 간단 요약 + 원본 데이터
+    """
+    selected = parse_fields(fields, WEATHER_FIELDS)
+    # 중기육상예보용 regId, 중기기온용 regId를 각각 매핑
+    land_reg_id, temp_reg_id = resolve_weather_region(region)
+
+    # tm_fc가 없으면 현재 시각 기준으로 가장 최근 발표시각 계산
+    tm_fc = check_tm_fc(tm_fc)
+
+    land = get_mid_land_cached(land_reg_id, tm_fc)
+    ta = get_mid_ta_cached(temp_reg_id, tm_fc)
+
+    return FastJSONResponse(pick_fields(build_mid_weather(region, land_reg_id, tm_fc, land, ta), selected))
+
+
+def split_query_list(values: Optional[List[str]]) -> List[str]:
+    """a=x,y&a=z 처럼 반복/쉼표로 온 쿼리 값 → 중복 없는 목록 (순서 유지)"""
+    names = []
+    for value in values or []:
+        for name in value.split(","):
+            name = name.strip()
+            if name and name not in names:
+                names.append(name)
+    return names
+
+
+def parse_fields(fields: Optional[str], allowed) -> Optional[set]:
+    """fields=a,b → {"a", "b"} (없으면 None = 전부), 모르는 필드면 400"""
+    if fields is None:
+        return None
+    selected = set(split_query_list([fields]))
+    unknown = selected - set(allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"지원하지 않는 필드: {', '.join(sorted(unknown))}. 사용 가능한 값: {', '.join(allowed)}",
+        )
+    return selected
+
+
+def pick_fields(row: dict, fields: Optional[set]) -> dict:
+    if fields is None:
+        return row
+    return {k: v for k, v in row.items() if k in fields}
+
+
+# 지역 여러 개 동시 조회용 (지역당 육상/기온 2건씩이라 10개 지역이면 20건)
+_WEATHER_POOL = ThreadPoolExecutor(max_workers=20, thread_name_prefix="weather")
+
+
+def fetch_mid_weather_many(regions: List[str], tm_fc: str) -> List[dict]:
+    """
+    여러 지역 육상예보/기온을 한꺼번에 동시에 요청해서 지역별 응답 리스트로 반환
+    - 전체 시간은 가장 느린 업스트림 호출 하나 정도
+    - 한 지역이 실패해도 나머지는 그대로 내려주고 그 지역만 error 표시
+    """
+    jobs = {}
+    for region in regions:
+        try:
+            land_reg_id, temp_reg_id = resolve_weather_region(region)
+        except HTTPException as e:
+            # 모르는 지역 하나 때문에 전체를 400으로 만들지 않고 그 지역만 error 표시
+            jobs[region] = e
+            continue
+        jobs[region] = (
+            land_reg_id,
+            _WEATHER_POOL.submit(contextvars.copy_context().run, get_mid_land_cached, land_reg_id, tm_fc),
+            _WEATHER_POOL.submit(contextvars.copy_context().run, get_mid_ta_cached, temp_reg_id, tm_fc),
+        )
+
+    results = []
+    for region in regions:
+        job = jobs[region]
+        if isinstance(job, HTTPException):
+            results.append({"region": region, "regId": None, "tmFc": tm_fc, "has_data": False, "error": job.detail})
+            continue
+        land_reg_id, land_fut, ta_fut = job
+        try:
+            results.append(build_mid_weather(region, land_reg_id, tm_fc, land_fut.result(), ta_fut.result()))
+        except Exception as e:
+            logger.warning("중기예보 조회 실패: %s (%s)", region, e)
+            results.append(
+                {"region": region, "regId": land_reg_id, "tmFc": tm_fc, "has_data": False, "error": str(e)}
+            )
+    return results
+
+
+@app.get("/weather/mid/all")
+def get_mid_weather_all(
+    regions: Optional[List[str]] = Query(
+        None,
+        description="조회할 지역들 (예: regions=수도권,제주도 또는 regions=수도권&regions=제주도). 없으면 전체 10개 지역",
+    ),
+    tm_fc: Optional[str] = Query(
+        None,
+        description="(선택) 중기예보 발표시각, 예: 202512070600. 없으면 가장 최근 발표시각",
+    ),
+    fields: Optional[str] = Query(None, description="(선택) 지역별로 넣을 필드, 예: region,summary_day4"),
+):
+    """
+    여러 지역 중기예보를 한 번에 반환 (/weather/mid 응답을 지역별로 모은 것)
+    예) /weather/mid/all
+    예) /weather/mid/all?regions=수도권,경남권
+    """
+    selected = parse_fields(fields, WEATHER_FIELDS)
+    names = split_query_list(regions) or list(WEATHER_LAND_REGION_MAP.keys())
+
+    tm_fc = check_tm_fc(tm_fc)
+
+    results = fetch_mid_weather_many(names, tm_fc)
+    if selected is not None:
+        # 실패한 지역 표시는 필드 선택과 상관없이 남김
+        results = [pick_fields(r, selected | {"error"}) for r in results]
+
+    return FastJSONResponse(
+        {
+            "tmFc": tm_fc,
+            "count": len(results),
+            "results": results,
+        }
+    )
+    
+
+@app.get("/exam-centers")
+def get_exam_centers(
+    brch_cd: Optional[str] = Query(None, description="지사코드 (예: 01=서울, 10=경기, 18=제주 등). 없으면 전체"),
+    page: int = Query(1, ge=1, description="페이지 번호"),
+    per_page: int = Query(50, ge=1, le=100, description="페이지 당 개수"),
+    area_gb: Optional[str] = Query(None, description="시험장 구분(examAreaGbNm)으로 필터"),
+    q: Optional[str] = Query(None, description="시험장 이름/주소 검색어"),
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: examAreaNm,address)"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=CURSOR_MAX_LIMIT, description="커서 방식으로 받을 개수 (주면 page/per_page 대신 사용)"
+    ),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (다음 페이지)"),
+):
+    """
+    국가자격시험 시험장소 정보를 조회해서 JSON으로 반환 (로컬 스냅샷 기준)
+    예) /exam-centers?brch_cd=01  (서울 지역 시험장 목록)
+    예) /exam-centers?q=강남&area_gb=필기
+    예) /exam-centers?brch_cd=01&limit=50  (이후 &cursor=<next_cursor>)
+    """
+    selected = parse_fields(fields, EXAM_AREA_FIELDS)
+    snapshot = EXAM_CENTER_SNAPSHOT
+
+    if snapshot is None:
+        # 첫 크롤링이 끝나기 전에는 예전처럼 q-net에 바로 물어봄 (지사코드 필수)
+        if not brch_cd:
+            raise HTTPException(status_code=503, detail="시험장소 스냅샷 준비 중. brch_cd를 지정해 주세요.")
+        # 커서 방식은 스냅샷 정렬 키가 있어야 해서 이때는 page 방식으로만
+        results, total_count = fetch_exam_area_page(brch_cd, page=page, per_page=per_page)
+        version = None
+        next_cursor = None
+    else:
+        rows = snapshot.by_branch.get(brch_cd, []) if brch_cd else snapshot.items
+        keys = snapshot.branch_keys.get(brch_cd, []) if brch_cd else snapshot.keys
+        needle = q.strip().casefold() if q and q.strip() else None
+
+        def matches(r):
+            if area_gb and r.get("examAreaGbNm") != area_gb:
+                return False
+            return needle is None or needle in snapshot.search_text[id(r)]
+
+        if limit is not None or cursor is not None:
+            # 정렬 키로 시작 위치를 이분 탐색 → 거기서부터 필터 통과하는 것만 limit+1개까지
+            after = decode_cursor(cursor)
+            try:
+                start = bisect.bisect_right(keys, after) if after is not None else 0
+            except TypeError:
+                raise HTTPException(status_code=400, detail="잘못된 cursor 입니다.")
+            keyed = ((keys[i], rows[i]) for i in range(start, len(rows)) if matches(rows[i]))
+            results, next_cursor = page_with_cursor(keyed, limit or per_page)
+            # 필터가 없을 때만 전체 개수를 공짜로 앎
+            total_count = len(rows) if not area_gb and needle is None else None
+        else:
+            rows = [r for r in rows if matches(r)]
+            total_count = len(rows)
+            results = rows[(page - 1) * per_page: page * per_page]
+            next_cursor = None
+        version = snapshot.version
+
+    if selected is not None:
+        results = [pick_fields(r, selected) for r in results]
+
+    return FastJSONResponse(
+        {
+            "brch_cd": brch_cd,
+            "page": page,
+            "per_page": per_page,
+            "total_count": total_count,
+            "count": len(results),
+            "version": version,
+            "results": results,
+            "next_cursor": next_cursor,
+        }
+    )
+
+def get_mid_tmfc() -> str:
+    """
+    중기예보 발표시각(tmFc) 계산
+    - 매일 06시, 18시에 발표 → 지금 시각 기준으로 가장 최근 발표 시각을 구함
+    - 예: 2025-12-07 09시라면 202512070600
+    """
+    now = datetime.now()
+    hour = now.hour
+
+    if hour < 6:
+        base = now - timedelta(days=1)
+        base_hour = 18
+    elif hour < 18:
+        base = now
+        base_hour = 6
+    else:
+        base = now
+        base_hour = 18
+
+    return base.strftime("%Y%m%d") + f"{base_hour:02d}00"
+
+
+def check_tm_fc(tm_fc: Optional[str]) -> str:
+    """
+    사용자가 준 tm_fc 검사 (없으면 가장 최근 발표시각)
+    - 실제 발표시각(YYYYMMDD0600 / YYYYMMDD1800)이면서 가장 최근 발표시각 이하만 허용
+      (아무 값이나 받으면 캐시 키가 되고, 미래 값은 캐시에서 영영 안 밀려남)
+    """
+    latest = get_mid_tmfc()
+    if tm_fc is None:
+        return latest
+    try:
+        valid = len(tm_fc) == 12 and tm_fc[8:] in ("0600", "1800") and datetime.strptime(tm_fc[:8], "%Y%m%d")
+    except ValueError:
+        valid = False
+    if not valid or tm_fc > latest:
+        raise HTTPException(
+            status_code=400,
+            detail=f"tm_fc는 {latest} 이전의 발표시각(YYYYMMDD0600 또는 YYYYMMDD1800)이어야 합니다.",
+        )
+    return tm_fc
+
+def call_mid_land_fcst(reg_id: str, tm_fc: str):
+    """
+    중기육상예보조회(getMidLandFcst) 호출
+    - 입력: regId(예보구역 코드), tmFc(발표시각)
+    - 출력: 해당 지역 예보 item(dict) 또는 None
+    """
+    params = {
+        "serviceKey": EXAM_API_KEY,   # 동일한 개인 키 사용
+        "numOfRows": "10",
+        "pageNo": "1",
+        "dataType": "JSON",
+        "regId": reg_id,
+        "tmFc": tm_fc,
+    }
+
+    res = upstream_get("mid_land", WEATHER_MID_LAND_URL, params)
+    res.raise_for_status()
+    data = res.json()
+
+    body = data.get("response", {}).get("body", {})
+    items = body.get("items", {}).get("item", [])
+
+    if isinstance(items, dict):
+        items = [items]
+
+    if not items:
+        return None
+
+    return items[0]   # 보통 1건만 옴
+
+
+def call_mid_ta(reg_id: str, tm_fc: str):
+    """
+    중기기온조회(getMidTa) 호출
+    - 입력: regId, tmFc
+    - 출력: 해당 지역 기온 item(dict) 또는 None
+    """
+    params = {
+        "serviceKey": EXAM_API_KEY,
+        "numOfRows": "10",
+        "pageNo": "1",
+        "dataType": "JSON",
+        "regId": reg_id,
+        "tmFc": tm_fc,
+    }
+
+    res = upstream_get("mid_ta", WEATHER_MID_TA_URL, params)
+    res.raise_for_status()
+    data = res.json()
+
+    body = data.get("response", {}).get("body", {})
+    items = body.get("items", {}).get("item", [])
+
+    if isinstance(items, dict):
+        items = [items]
+
+    if not items:
+        return None
+
+    return items[0]
+
+# -------------------------
+# 중기예보 캐시 (regId, tmFc) + 발표시각 맞춘 프리워밍
+# -------------------------
+# 중기예보는 06시/18시 발표 때만 바뀌어서 (종류, regId, tmFc) 로 캐시하면
+# 발표 사이 요청은 전부 메모리에서 끝남
+WEATHER_CACHE_MAX_ENTRIES = 200
+WEATHER_NEGATIVE_TTL = 60              # 아직 발표 전(None)인 결과는 60초만 기억
+WEATHER_PREWARM_RETRY_MIN = 30         # 발표 직후 KMA에 새 tmFc가 없으면 재시도 간격(초)
+WEATHER_PREWARM_RETRY_MAX = 300
+
+_WEATHER_CACHE = {}         # (kind, regId, tmFc) -> item dict
+_WEATHER_MISSES = {}        # (kind, regId, tmFc) -> None 결과 만료 시각
+_WEATHER_CACHE_LOCK = threading.Lock()
+
+
+def _weather_cache_get(kind: str, reg_id: str, tm_fc: str, fetch):
+    key = (kind, reg_id, tm_fc)
+    with _WEATHER_CACHE_LOCK:
+        item = _WEATHER_CACHE.get(key)
+        if item is not None:
+            return item
+        if _WEATHER_MISSES.get(key, 0) > time.monotonic():
+            return None
+
+    item = fetch(reg_id, tm_fc)
+
+    with _WEATHER_CACHE_LOCK:
+        if item is None:
+            now = time.monotonic()
+            # 지난 tmFc 키는 다시 안 물어보니 넣을 때 만료된 것을 같이 정리
+            for old_key in [k for k, until in _WEATHER_MISSES.items() if until <= now]:
+                del _WEATHER_MISSES[old_key]
+            _WEATHER_MISSES[key] = now + WEATHER_NEGATIVE_TTL
+            return None
+        _WEATHER_MISSES.pop(key, None)
+        _WEATHER_CACHE[key] = item
+        if len(_WEATHER_CACHE) > WEATHER_CACHE_MAX_ENTRIES:
+            # tmFc 문자열(YYYYMMDDHHMM)이 작은 것부터 버림
+            for old_key in sorted(_WEATHER_CACHE, key=lambda k: k[2])[: len(_WEATHER_CACHE) - WEATHER_CACHE_MAX_ENTRIES]:
+                del _WEATHER_CACHE[old_key]
+    return item
+
+
+def get_mid_land_cached(reg_id: str, tm_fc: str):
+    """중기육상예보 (캐시 우선)"""
+    return _weather_cache_get("land", reg_id, tm_fc, call_mid_land_fcst)
+
+
+def get_mid_ta_cached(reg_id: str, tm_fc: str):
+    """중기기온 (캐시 우선)"""
+    return _weather_cache_get("ta", reg_id, tm_fc, call_mid_ta)
+
+
+def weather_is_cached(kind: str, reg_id: str, tm_fc: str) -> bool:
+    with _WEATHER_CACHE_LOCK:
+        return (kind, reg_id, tm_fc) in _WEATHER_CACHE
+
+
+def next_mid_publication(now: Optional[datetime] = None) -> datetime:
+    """다음 중기예보 발표시각 (06시 또는 18시)"""
+    now = now or datetime.now()
+    for hour in (6, 18):
+        candidate = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+        if candidate > now:
+            return candidate
+    return (now + timedelta(days=1)).replace(hour=6, minute=0, second=0, microsecond=0)
+
+
+def prewarm_mid_weather(tm_fc: str, deadline: datetime):
+    """
+    tmFc 한 회차에 대해 10개 예보구역 육상/기온 예보를 전부 캐시에 채우기
+    - KMA에 새 tmFc가 아직 안 올라왔으면(None) 간격을 늘려가며 다시 시도
+    - 다음 발표시각(deadline)이 되면 포기
+    """
+    targets = [("land", reg_id) for reg_id in WEATHER_LAND_REGION_MAP.values()]
+    targets += [("ta", reg_id) for reg_id in WEATHER_TEMP_REGION_MAP.values()]
+    retry = WEATHER_PREWARM_RETRY_MIN
+
+    while True:
+        missing = [(kind, reg_id) for kind, reg_id in targets if not weather_is_cached(kind, reg_id, tm_fc)]
+        for kind, reg_id in missing:
+            fetch = call_mid_land_fcst if kind == "land" else call_mid_ta
+            try:
+                _weather_cache_get(kind, reg_id, tm_fc, fetch)
+            except Exception:
+                logger.exception("중기예보 프리워밍 실패: %s %s %s", kind, reg_id, tm_fc)
+
+        missing = [(kind, reg_id) for kind, reg_id in targets if not weather_is_cached(kind, reg_id, tm_fc)]
+        if not missing:
+            logger.info("중기예보 프리워밍 완료: tmFc=%s", tm_fc)
+            publish_mid_weather(tm_fc)
+            return True
+        if datetime.now() + timedelta(seconds=retry) >= deadline:
+            logger.warning("중기예보 프리워밍 포기: tmFc=%s, 남은 구역 %d개", tm_fc, len(missing))
+            return False
+        time.sleep(retry)
+        retry = min(WEATHER_PREWARM_RETRY_MAX, retry * 2)
+
+
+def weather_prewarm_loop():
+    """발표시각마다 깨어나서 최신 tmFc로 전 구역 프리워밍"""
+    while True:
+        next_pub = next_mid_publication()
+        try:
+            with background_priority():
+                prewarm_mid_weather(get_mid_tmfc(), next_pub)
+        except Exception:
+            logger.exception("중기예보 프리워밍 루프 오류")
+        time.sleep(max(1.0, (next_mid_publication() - datetime.now()).total_seconds()))
+
+
+@app.on_event("startup")
+def start_weather_prewarmer():
+    if BACKGROUND_JOBS_ENABLED:
+        threading.Thread(target=weather_prewarm_loop, name="weather-prewarm", daemon=True).start()
+
+
+def query_terminal_regions() -> List[str]:
+    """터미널이 있는 시/도 이름 목록 (SPARQL)"""
+    query = f"""
+PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
+PREFIX schema: <http://schema.org/>
+
+SELECT DISTINCT ?regionName
+{from_clause("terminals")}
+WHERE {{
+  ?terminal a koqu:Terminal ;
+            schema:addressRegion ?region .
+  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
+}}
+ORDER BY ?regionName
+"""
+    _, rows = run_sparql_rows(query)
+    return [region for (region,) in rows]
+
+
+def query_terminal_localities(sido: str) -> List[str]:
+    """시/도 안에 터미널이 있는 시/군/구 이름 목록 (SPARQL)"""
+    query = f"""
+PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
+PREFIX schema: <http://schema.org/>
+
+SELECT DISTINCT ?localName
+{from_clause("terminals")}
+WHERE {{
+  {values_clause("region", admin_division_terms(sido, SIDO_CLASSES))}
+  ?terminal schema:addressRegion ?region ;
+            a koqu:Terminal ;
+            schema:addressLocality ?locality .
+  BIND(REPLACE(STR(?locality), ".*/", "") AS ?localName)
+}}
+ORDER BY ?localName
+"""
+    _, rows = run_sparql_rows(query)
+    return [locality for (locality,) in rows]
+
+
+@dataset_builder("terminal_localities")
+def build_terminal_localities(state: DatasetState) -> dict:
+    """시/도 → 터미널 있는 시/군/구 목록 (정렬됨)"""
+    query = f"""
+PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
+PREFIX schema: <http://schema.org/>
+
+SELECT DISTINCT ?regionName ?localName
+{from_clause("terminals")}
+WHERE {{
+  ?terminal a koqu:Terminal ;
+            schema:addressRegion ?region ;
+            schema:addressLocality ?locality .
+  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
+  BIND(REPLACE(STR(?locality), ".*/", "") AS ?localName)
+}}
+"""
+    lookup = {}
+    _, rows = run_sparql_rows(query)
+    for region, locality in rows:
+        lookup.setdefault(region, set()).add(locality)
+    return {sido: sorted(names) for sido, names in lookup.items()}
+
+
+@app.get("/terminals/regions")
+def get_terminal_regions():
+    """
+    터미널이 존재하는 시/도 목록 조회
+    예: ["경기도", "서울특별시", "전라남도", ...]
+    """
+    return FastJSONResponse(terminal_regions_payload())
+
+
+def terminal_regions_payload() -> dict:
+    """/terminals/regions 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    lookup = dataset_lookup("terminal_localities")
+    if lookup is not None:
+        regions = sorted(lookup)
+    else:
+        regions = query_terminal_regions()
+
+    return {
+        "count": len(regions),
+        "regions": regions,
+    }
+
+
+@app.get("/terminals/localities")
+def get_terminal_localities(
+    sido: str = Query(..., description="시/도 이름 (예: 경기도, 서울특별시, 전라남도)")
+):
+    """
+    선택한 시/도 안에 터미널이 존재하는 시/군/구 목록 조회
+    예: /terminals/localities?sido=경기도
+    """
+    return FastJSONResponse(terminal_localities_payload(sido))
+
+
+def terminal_localities_payload(sido: str) -> dict:
+    """/terminals/localities 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    lookup = dataset_lookup("terminal_localities")
+    if lookup is not None:
+        localities = lookup.get(sido, [])
+    else:
+        localities = query_terminal_localities(sido)
+
+    return {
+        "sido": sido,
+        "count": len(localities),
+        "localities": localities,
+    }
+    
+TERMINAL_FIELDS = (
+    "uri", "id", "name", "streetAddress", "address", "sido", "locality", "neighborhood",
+    "telephone", "url", "type", "lat", "lon", "coordPrecision", "routes",
+)
+
+
+def query_terminals(sido: str, locality: Optional[str] = None, fields: Optional[set] = None) -> List[dict]:
+    """
+    시/도 + (선택) 시/군/구로 터미널 목록을 그래프DB에서 조회
+    - fields 주면 그 필드에 필요한 OPTIONAL(읍/면/동, 전화, 홈페이지)만 붙임
+    """
+    return [row for _, row in fetch_terminals(sido, locality, fields)]
+
+
+def fetch_terminals(
+    sido: Optional[str],
+    locality: Optional[str] = None,
+    fields: Optional[set] = None,
+    limit: Optional[int] = None,
+    after: Optional[tuple] = None,
+):
+    """
+    query_terminals 본체 → [((이름, uri) 정렬 키, 행), ...]
+    - limit 있으면 after 뒤로 limit+1개만 (다음 페이지 있는지 확인용 1개 더)
+    - sido=None 이면 전체 터미널 (좌표 인덱스 만들 때)
+    """
+    def wants(*names):
+        return fields is None or any(n in fields for n in names)
+
+    # 시/도(·시/군/구) IRI 후보를 VALUES로 묶어서 addressRegion 인덱스로 바로 찾음
+    bindings = []
+    if sido:
+        bindings.append(values_clause("region", admin_division_terms(sido, SIDO_CLASSES)))
+    if locality:
+        bindings.append(values_clause("locality", admin_division_terms(locality, LOCALITY_CLASSES)))
+    values = "\n  ".join(bindings)
+
+    select = ["?terminal", "?id", "?name", "?street", "?regionName", "?localName"]
+    optionals = []
+    if wants("neighborhood", "address"):
+        select.append("?neighborhoodName")
+        optionals.append(
+            "OPTIONAL { ?terminal schema:addressNeighborhood ?neighborhood . }\n"
+            '  BIND(IF(BOUND(?neighborhood), REPLACE(STR(?neighborhood), ".*/", ""), "") AS ?neighborhoodName)'
+        )
+    if wants("telephone"):
+        select.append("?tel")
+        optionals.append("OPTIONAL { ?terminal schema:telephone ?tel . }")
+    if wants("url"):
+        select.append("?url")
+        optionals.append("OPTIONAL { ?terminal schema:url ?url . }")
+    optional_block = "\n  ".join(optionals)
+
+    query = f"""
+PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
+PREFIX schema: <http://schema.org/>
+
+SELECT {" ".join(select)}
+{from_clause("terminals")}
+WHERE {{
+  {values}
+  ?terminal schema:addressRegion ?region ;
+            schema:addressLocality ?locality ;
+            a koqu:Terminal ;
+            schema:identifier ?id ;
+            schema:name ?name ;
+            schema:streetAddress ?street .
+  {optional_block}
+
+  {keyset_after_clause(after, ("name", "terminal"))}
+
+  # 이름 추출은 결과 표시용으로만 (필터에는 안 씀)
+  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
+  BIND(REPLACE(STR(?locality), ".*/", "") AS ?localName)
+}}
+ORDER BY ?name ?terminal
+{f"LIMIT {limit + 1}" if limit else ""}
+"""
+    names, rows = run_sparql_rows(query)
+
+    results = []
+    for row in rows:
+        b = dict(zip(names, row))
+        street = b["street"]
+        sido_name = b["regionName"]
+        locality_name = b["localName"]
+        neighborhood_name = b.get("neighborhoodName")
+
+        address_parts: List[str] = []
+        for val in [sido_name, locality_name, neighborhood_name, street]:
+            if val:
+                address_parts.append(val)
+        address = " ".join(address_parts)
+        centroid = admin_centroid(sido_name, locality_name)
+        if centroid is None or centroid[2] == "sido":
+            # 광역시 터미널은 시/군/구 IRI가 시 전체라서 지번 주소의 구 이름으로 한 번 더
+            centroid = address_centroid(street) or centroid
+
+        results.append(
+            ((b["name"], b["terminal"]), pick_fields(
+                {
+                    "uri": b["terminal"],
+                    "id": b["id"],
+                    "name": b["name"],
+                    "streetAddress": street,
+                    "address": address,
+                    "sido": sido_name,
+                    "locality": locality_name,
+                    "neighborhood": neighborhood_name,
+                    "telephone": b.get("tel"),
+                    "url": b.get("url"),
+                    # 프론트 요구 필드 호환을 위한 기본값들
+                    "type": "버스터미널",
+                    # 좌표는 시/군/구 중심점 (없으면 시/도 중심점) - coordPrecision 참고
+                    "lat": centroid[0] if centroid else None,
+                    "lon": centroid[1] if centroid else None,
+                    "coordPrecision": centroid[2] if centroid else None,
+                    "routes": None,
+                },
+                fields,
+            ))
+        )
+
+    return results
+
+
+@app.get("/terminals/by-region")
+def get_terminals_by_region(
+    sido: str = Query(..., description="시/도 이름 (예: 경기도, 서울특별시)"),
+    locality: Optional[str] = Query(
+        None,
+        description="시/군/구 이름 (예: 수원시, 서초구, 영광군). 없으면 해당 시/도 전체 터미널 조회",
+    ),
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: id,name,address)"),
+    limit: Optional[int] = Query(
+        None, ge=1, le=CURSOR_MAX_LIMIT, description="한 번에 받을 개수 (없으면 예전처럼 전부)"
+    ),
+    cursor: Optional[str] = Query(None, description="이전 응답의 next_cursor (다음 페이지)"),
+):
+    """
+    시/도 + (선택) 시/군/구로 터미널 목록 조회
+    - limit 주면 (이름, URI) 순으로 limit개씩, 다음 페이지는 next_cursor로
+    예1) /terminals/by-region?sido=경기도
+    예2) /terminals/by-region?sido=경기도&locality=수원시
+    예3) /terminals/by-region?sido=경기도&fields=id,name,address  (빈 routes 등 빼고)
+    예4) /terminals/by-region?sido=경기도&limit=50
+    """
+    return FastJSONResponse(terminals_by_region_payload(sido, locality, fields, limit, cursor))
+
+
+def terminals_by_region_payload(
+    sido: str,
+    locality: Optional[str] = None,
+    fields: Optional[str] = None,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+) -> dict:
+    """/terminals/by-region 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    selected = parse_fields(fields, TERMINAL_FIELDS)
+    after = decode_cursor(cursor)
+    if after is not None and limit is None:
+        limit = CURSOR_MAX_LIMIT
+
+    keyed = fetch_terminals(sido, locality, selected, limit, after)
+    if limit is None:
+        results, next_cursor = [row for _, row in keyed], None
     else:
-        summary_day4 = {
-            "day_offset": first_day,  # 오늘 기준 +몇 일인지
-            "am": {
-                "weather": land.get(f"wf{first_day}Am"),
-                "rain_prob": land.get(f"rnSt{first_day}Am"),
-            },
-            "pm": {
-                "weather": land.get(f"wf{first_day}Pm"),
-                "rain_prob": land.get(f"rnSt{first_day}Pm"),
-            },
-            "temp": {
-                "min": ta.get(f"taMin{first_day}"),
-                "max": ta.get(f"taMax{first_day}"),
-            },
+        results, next_cursor = page_with_cursor(keyed, limit)
+
+    return {
+        "sido": sido,
+        "locality": locality,
+        "count": len(results),
+        "results": results,
+        "next_cursor": next_cursor,
+    }
+
+
+# -------------------------
+# 터미널 좌표 (행정구역 중심점) + 최근접 터미널 인덱스
+# -------------------------
+# terminal.ttl 에는 좌표가 없고 행정구역 IRI(Province/City/County/...)만 있음
+# → file/admin_centroids.csv (시/도, 시/군/구 → 중심점 위경도)로 좌표를 붙이고
+#   데이터셋 버전마다 k-d 트리를 만들어서 "이 시험장 근처 터미널"을 바로 찾음
+# (동/읍/면 단위 중심점은 아직 없어서 같은 시/군/구 터미널은 좌표가 같음)
+ADMIN_CENTROIDS_PATH = os.getenv("ADMIN_CENTROIDS_PATH", os.path.join(DATASET_DIR, "admin_centroids.csv"))
+EARTH_RADIUS_KM = 6371.0
+NEAREST_MAX_K = 50
+
+# 주소/API에서 쓰는 시/도 약칭·새 이름 → 중심점 표(= terminal.ttl IRI)에 있는 이름
+SIDO_ALIASES = {
+    "서울": "서울특별시", "서울시": "서울특별시",
+    "부산": "부산광역시", "부산시": "부산광역시",
+    "대구": "대구광역시", "대구시": "대구광역시",
+    "인천": "인천광역시", "인천시": "인천광역시",
+    "광주": "광주광역시", "광주시": "광주광역시",
+    "대전": "대전광역시", "대전시": "대전광역시",
+    "울산": "울산광역시", "울산시": "울산광역시",
+    "세종": "세종특별자치시", "세종시": "세종특별자치시",
+    "경기": "경기도",
+    "강원": "강원도", "강원특별자치도": "강원도",
+    "충북": "충청북도", "충남": "충청남도",
+    "전북": "전라북도", "전북특별자치도": "전라북도",
+    "전남": "전라남도",
+    "경북": "경상북도", "경남": "경상남도",
+    "제주": "제주특별자치도", "제주도": "제주특별자치도",
+}
+
+_ADMIN_CENTROIDS = None     # (시/도, 시/군/구 또는 "") -> (lat, lon)
+
+
+def admin_centroids() -> dict:
+    global _ADMIN_CENTROIDS
+    if _ADMIN_CENTROIDS is None:
+        table = {}
+        try:
+            with open(ADMIN_CENTROIDS_PATH, encoding="utf-8", newline="") as f:
+                for row in csv.DictReader(f):
+                    table[(row["sido"], row["locality"])] = (float(row["lat"]), float(row["lon"]))
+        except FileNotFoundError:
+            logger.warning("행정구역 중심점 파일 없음: %s (터미널 좌표 없이 동작)", ADMIN_CENTROIDS_PATH)
+        _ADMIN_CENTROIDS = table
+    return _ADMIN_CENTROIDS
+
+
+def admin_centroid(sido: Optional[str], locality: Optional[str] = None) -> Optional[tuple]:
+    """(시/도, 시/군/구) → (lat, lon, "locality" | "sido"), 표에 없으면 None"""
+    if not sido:
+        return None
+    table = admin_centroids()
+    sido = SIDO_ALIASES.get(sido, sido)
+    if locality and (sido, locality) in table:
+        return (*table[(sido, locality)], "locality")
+    if (sido, "") in table:
+        return (*table[(sido, "")], "sido")
+    return None
+
+
+def address_centroid(address: Optional[str]) -> Optional[tuple]:
+    """ "경기도 수원시 권선구 ..." 같은 주소 → 앞의 시/도, 시/군/구로 중심점"""
+    tokens = (address or "").split()
+    if not tokens:
+        return None
+    return admin_centroid(tokens[0], tokens[1] if len(tokens) > 1 else None)
+
+
+def unit_vector(lat: float, lon: float) -> tuple:
+    """위경도 → 3차원 단위벡터 (벡터 사이 직선거리 순서 = 대원거리 순서, 경도 ±180 경계 걱정 없음)"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def chord_to_km(d2: float) -> float:
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(d2) / 2))
+
+
+def km_to_chord2(km: float) -> float:
+    return (2 * math.sin(min(math.pi, km / EARTH_RADIUS_KM) / 2)) ** 2
+
+
+class TerminalGeoIndex:
+    """
+    터미널 좌표 k-d 트리 (데이터셋 버전마다 새로 만들고 그 뒤로는 읽기만)
+    - 노드: (점, 행 번호, 분할 축, 왼쪽, 오른쪽)
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        points = [(unit_vector(r["lat"], r["lon"]), i) for i, r in enumerate(rows)]
+        self.root = self._build(points, 0)
+
+    def _build(self, points, depth):
+        if not points:
+            return None
+        axis = depth % 3
+        points.sort(key=lambda p: p[0][axis])
+        mid = len(points) // 2
+        return (
+            points[mid][0],
+            points[mid][1],
+            axis,
+            self._build(points[:mid], depth + 1),
+            self._build(points[mid + 1:], depth + 1),
+        )
+
+    def nearest(self, lat: float, lon: float, k: int, max_km: Optional[float] = None):
+        """(lat, lon)에서 가까운 터미널 k개 → [(거리 km, 행), ...] 가까운 순"""
+        target = unit_vector(lat, lon)
+        limit = km_to_chord2(max_km) if max_km is not None else float("inf")
+        heap = []   # (-거리², 행 번호) 최대 힙 → 지금까지 k번째로 가까운 게 맨 위
+
+        def bound():
+            return -heap[0][0] if len(heap) >= k else limit
+
+        def visit(node):
+            if node is None:
+                return
+            point, idx, axis, left, right = node
+            d2 = (point[0] - target[0]) ** 2 + (point[1] - target[1]) ** 2 + (point[2] - target[2]) ** 2
+            if d2 <= limit:
+                if len(heap) < k:
+                    heapq.heappush(heap, (-d2, idx))
+                elif d2 < -heap[0][0]:
+                    heapq.heapreplace(heap, (-d2, idx))
+            diff = target[axis] - point[axis]
+            near, far = (left, right) if diff < 0 else (right, left)
+            visit(near)
+            if diff * diff <= bound():
+                visit(far)
+
+        visit(self.root)
+        return [(chord_to_km(-d2), self.rows[idx]) for d2, idx in sorted(heap, key=lambda e: (-e[0], e[1]))]
+
+
+@dataset_builder("terminal_geo_index")
+def build_terminal_geo_index(state: DatasetState) -> TerminalGeoIndex:
+    rows = [row for _, row in fetch_terminals(None)]
+    return TerminalGeoIndex([row for row in rows if row["lat"] is not None])
+
+
+@app.get("/terminals/nearest")
+def get_nearest_terminals(
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="위도 (lon과 같이)"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="경도 (lat과 같이)"),
+    address: Optional[str] = Query(None, description="주소 (시/도 시/군/구 ... 앞부분으로 위치 추정)"),
+    exam_center: Optional[str] = Query(None, description="시험장 이름(examAreaNm) - 시험장소 스냅샷의 주소 사용"),
+    brch_cd: Optional[str] = Query(None, description="exam_center 찾을 지사코드 (같은 이름이 여러 지사에 있을 때)"),
+    k: int = Query(5, ge=1, le=NEAREST_MAX_K, description="가져올 터미널 수"),
+    max_km: Optional[float] = Query(None, gt=0, description="이 거리(km) 안의 터미널만"),
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: id,name,address)"),
+):
+    """
+    가까운 터미널 k개 (좌표는 행정구역 중심점 기준이라 대략적인 거리)
+    예) /terminals/nearest?lat=37.27&lon=127.01&k=3
+    예) /terminals/nearest?exam_center=수원상공회의소&brch_cd=10
+    예) /terminals/nearest?address=충청북도 청주시 흥덕구
+    """
+    selected = parse_fields(fields, TERMINAL_FIELDS)
+
+    origin = {}
+    if lat is not None and lon is not None:
+        centroid = (lat, lon, "point")
+    elif exam_center:
+        snapshot = EXAM_CENTER_SNAPSHOT
+        if snapshot is None:
+            raise HTTPException(status_code=503, detail="시험장소 스냅샷 준비 중")
+        rows = snapshot.by_branch.get(brch_cd, []) if brch_cd else snapshot.items
+        center = next((r for r in rows if r.get("examAreaNm") == exam_center), None)
+        if center is None:
+            raise HTTPException(status_code=404, detail=f"시험장을 찾을 수 없음: {exam_center}")
+        origin = {"examAreaNm": center.get("examAreaNm"), "brchCd": center.get("brchCd"), "address": center.get("address")}
+        centroid = address_centroid(center.get("address"))
+    elif address:
+        origin = {"address": address}
+        centroid = address_centroid(address)
+    else:
+        raise HTTPException(status_code=400, detail="lat/lon, address, exam_center 중 하나는 필요합니다.")
+
+    if centroid is None:
+        raise HTTPException(status_code=404, detail="위치를 알 수 없는 주소입니다.")
+    index = dataset_lookup("terminal_geo_index")
+    if index is None:
+        raise HTTPException(status_code=503, detail="터미널 좌표 인덱스 준비 중")
+
+    origin.update({"lat": centroid[0], "lon": centroid[1], "coordPrecision": centroid[2]})
+    results = [
+        {**pick_fields(row, selected), "distance_km": round(km, 2)}
+        for km, row in index.nearest(centroid[0], centroid[1], k, max_km)
+    ]
+    return FastJSONResponse({"origin": origin, "k": k, "count": len(results), "results": results})
+
+
+# -------------------------
+# 4) 응시 수수료 조회 API
+# -------------------------
+@app.get("/licenses/fee")
+def get_license_fee(
+    name: str,
+    match: str = Query("contains", description="이름 매칭 방식: exact / prefix / contains"),
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: label,round,fee)"),
+):
+    """
+    ✅ fake_data_v3.ttl 에서 자격증 응시 수수료 조회
+    - 같은 TTL 데이터에서 fee 필드만 중심으로 뽑아서 돌려줌
+    """
+    return FastJSONResponse(license_fee_payload(name, match, fields))
+
+
+def license_fee_payload(name: str, match: str = "contains", fields: Optional[str] = None) -> dict:
+    """/licenses/fee 응답 본문 (라우트와 export_static.py가 같이 씀)"""
+    check_label_match(match)
+    selected = parse_fields(fields, LICENSE_ROUND_FIELDS)
+    items = query_license_items_by_name(name, match, selected)
+
+    return {
+        "name": name,
+        "count": len(items),
+        "results": license_round_rows(
+            items, ("label", "round", "fee", "mode", "appDate", "examDate"), selected
+        ),
+    }
+
+# -------------------------
+# 5) 시험 응시장소 조회 API
+# -------------------------
+@app.get("/licenses/sites")
+def get_license_test_sites(
+    name: str,
+    fields: Optional[str] = Query(None, description="결과 행에 넣을 필드 (예: label,round,examDate,mode)"),
+):
+    """
+    ✅ fake_data_v3.ttl 기반의 간단한 '시험 정보' 엔드포인트
+    - 현재 TTL에는 실제 장소 정보가 없어서
+      round / examDate / mode 정도만 내려줌.
+    """
+    selected = parse_fields(fields, LICENSE_ROUND_FIELDS)
+    items = query_license_items_by_name(name, fields=selected)
+
+    return FastJSONResponse(
+        {
+            "name": name,
+            "count": len(items),
+            "results": license_round_rows(
+                items, ("label", "round", "examDate", "mode", "appDate", "fee"), selected
+            ),
+        }
+    )
+
+
+# -------------------------
+# 6) 국가자격 시험일정 조회 API (스냅샷 기반)
+# -------------------------
+EXAM_SCHEDULE_FIELDS = (
+    "year", "seq", "qualgbCd", "qualgbNm", "description",
+    "docRegStartDt", "docRegEndDt", "docExamStartDt", "docExamEndDt",
+    "pracRegStartDt", "pracRegEndDt", "pracExamStartDt", "pracExamEndDt",
+    "docPassDt", "pracPassDt",
+)
+
+
+def format_exam_schedule_item(item: dict, fields: Optional[set] = None) -> dict:
+    """시험일정 API raw item → 프론트용 dict (날짜는 YYYY-MM-DD, fields 있으면 그 필드만)"""
+    row = {
+        "year": item.get("implYy"),
+        "seq": item.get("implSeq"),
+        "qualgbCd": item.get("qualgbCd"),
+        "qualgbNm": item.get("qualgbNm"),
+        "description": item.get("description", ""),
+        # 필기 원서접수 / 필기 시험
+        "docRegStartDt": format_yyyymmdd(item.get("docRegStartDt", "")),
+        "docRegEndDt": format_yyyymmdd(item.get("docRegEndDt", "")),
+        "docExamStartDt": format_yyyymmdd(item.get("docExamStartDt", "")),
+        "docExamEndDt": format_yyyymmdd(item.get("docExamEndDt", "")),
+        # 실기/면접 원서접수 / 실기/면접 시험
+        "pracRegStartDt": format_yyyymmdd(item.get("pracRegStartDt", "")),
+        "pracRegEndDt": format_yyyymmdd(item.get("pracRegEndDt", "")),
+        "pracExamStartDt": format_yyyymmdd(item.get("pracExamStartDt", "")),
+        "pracExamEndDt": format_yyyymmdd(item.get("pracExamEndDt", "")),
+        # 합격자 발표
+        "docPassDt": format_yyyymmdd(item.get("docPassDt", "")),
+        "pracPassDt": format_yyyymmdd(item.get("pracPassDt", "")),
+    }
+    return pick_fields(row, fields)
+
+
+@app.get("/exam-schedule")
+def get_exam_schedule(
+    year: int = Query(..., description="시행년도 (예: 2025)"),
+    qualgb_name: Optional[str] = Query(
+        None,
+        description="자격구분명 (예: 국가기술자격, 국가전문자격). 없으면 전체",
+    ),
+    name: Optional[str] = Query(None, description="(선택) description에 포함된 이름으로 필터"),
+    fields: Optional[str] = Query(None, description="(선택) 결과 행에 넣을 필드 (예: description,docExamStartDt)"),
+):
+    """
+    국가자격 시험일정 API 결과(전체 페이지)를 로컬 스냅샷에서 조회
+    예) /exam-schedule?year=2025&qualgb_name=국가전문자격&name=세무사
+    """
+    selected = parse_fields(fields, EXAM_SCHEDULE_FIELDS)
+    items = call_exam_schedule_api(year, qualgb_name)
+    keyword = (name or "").strip()
+
+    results = [
+        format_exam_schedule_item(item, selected)
+        for item in items
+        if not keyword or keyword in item.get("description", "")
+    ]
+
+    return FastJSONResponse(
+        {
+            "year": year,
+            "qualgb_name": qualgb_name,
+            "name": name,
+            "total_from_api": len(items),
+            "count": len(results),
+            "results": results,
+        }
+    )
+
+
+# -------------------------
+# 7) 시험일 일정표 API (일정 + 근처 터미널 + 그날 날씨)
+# -------------------------
+# 시/도 이름 → 중기예보 구역 (프론트 inferRegionFromAddress 와 같은 규칙)
+SIDO_WEATHER_REGION_RULES = [
+    (("제주",), "제주도"),
+    (("부산", "울산", "경남", "경상남"), "경남권"),
+    (("대구", "경북", "경상북"), "경북권"),
+    (("광주", "전남", "전라남"), "전남권"),
+    (("전북", "전라북"), "전라북도"),
+    (("대전", "세종", "충남", "충청남"), "충남권"),
+    (("충북", "충청북"), "충청북도"),
+    (("서울", "경기", "인천"), "수도권"),
+]
+# 강원도는 영동/영서로 나뉨
+GANGWON_YEONGDONG_LOCALITIES = ("강릉", "속초", "동해", "삼척", "양양", "고성")
+
+_ITINERARY_POOL = ThreadPoolExecutor(max_workers=16, thread_name_prefix="itinerary")
+
+
+def weather_region_for_sido(sido: str, locality: Optional[str] = None) -> Optional[str]:
+    """시/도(+시/군/구) 이름으로 중기예보 구역 이름 찾기, 모르면 None"""
+    if sido.startswith("강원"):
+        if locality and locality.startswith(GANGWON_YEONGDONG_LOCALITIES):
+            return "강원영동"
+        return "강원영서"
+    for prefixes, region in SIDO_WEATHER_REGION_RULES:
+        if sido.startswith(prefixes):
+            return region
+    return None
+
+
+def parse_exam_date(value: Optional[str]):
+    """'2025-05-26' / '20250526' 형태 날짜 문자열 → date (못 읽으면 None)"""
+    if not value:
+        return None
+    for fmt, length in (("%Y-%m-%d", 10), ("%Y%m%d", 8)):
+        try:
+            return datetime.strptime(value[:length], fmt).date()
+        except ValueError:
+            continue
+    return None
+
+
+def forecast_for_date(land, ta, tm_fc: str, target) -> Optional[dict]:
+    """
+    시험일(target)에 해당하는 중기예보 칸 찾기
+    - tmFc 날짜 기준 +N일 → wf{N}Am/Pm, rnSt{N}Am/Pm, taMin{N}/taMax{N}
+    - 8일 이후는 오전/오후 구분 없이 wf{N}, rnSt{N} 으로 옴
+    """
+    if land is None or ta is None or target is None:
+        return None
+    base = datetime.strptime(tm_fc[:8], "%Y%m%d").date()
+    n = (target - base).days
+
+    am_weather = land.get(f"wf{n}Am") or land.get(f"wf{n}")
+    pm_weather = land.get(f"wf{n}Pm") or land.get(f"wf{n}")
+    if not am_weather and not pm_weather:
+        return None
+
+    return {
+        "day_offset": n,
+        "am": {
+            "weather": am_weather,
+            "rain_prob": land.get(f"rnSt{n}Am", land.get(f"rnSt{n}")),
+        },
+        "pm": {
+            "weather": pm_weather,
+            "rain_prob": land.get(f"rnSt{n}Pm", land.get(f"rnSt{n}")),
+        },
+        "temp": {
+            "min": ta.get(f"taMin{n}"),
+            "max": ta.get(f"taMax{n}"),
+        },
+    }
+
+
+@app.get("/itinerary")
+def get_exam_itinerary(
+    name: str = Query(..., description="자격증 이름(예: 세무사)"),
+    sido: str = Query(..., description="시/도 이름 (예: 경기도, 서울특별시)"),
+    locality: Optional[str] = Query(None, description="시/군/구 이름 (예: 수원시)"),
+):
+    """
+    시험 회차별로 '시험일 + 근처 버스터미널 + 그날 예보'를 한 번에 반환
+    - 자격증 일정 / 터미널 / 중기예보를 동시에 조회해서 날짜·지역으로 묶음
+    예) /itinerary?name=세무사&sido=경기도&locality=수원시
+    """
+    region = weather_region_for_sido(sido, locality)
+    tm_fc = get_mid_tmfc()
+
+    def submit(fn, *args):
+        return _ITINERARY_POOL.submit(contextvars.copy_context().run, fn, *args)
+
+    items_fut = submit(query_license_items_by_name, name)
+    terminals_fut = submit(query_terminals, sido, locality)
+    land_fut = ta_fut = None
+    if region:
+        land_reg_id, temp_reg_id = resolve_weather_region(region)
+        land_fut = submit(get_mid_land_cached, land_reg_id, tm_fc)
+        ta_fut = submit(get_mid_ta_cached, temp_reg_id, tm_fc)
+
+    items = items_fut.result()
+    terminals = terminals_fut.result()
+
+    # 예보가 실패해도 일정/터미널은 그대로 보여줌
+    land = ta = None
+    if land_fut is not None:
+        try:
+            land, ta = land_fut.result(), ta_fut.result()
+        except Exception as e:
+            logger.warning("일정표용 중기예보 조회 실패: %s (%s)", region, e)
+
+    itinerary = []
+    for it in items:
+        exam_date = parse_exam_date(it["examDate"])
+        itinerary.append(
+            {
+                "label": it["itemLabel"],
+                "round": it["round"],
+                "appDate": it["appDate"],
+                "examDate": it["examDate"],
+                "fee": it["fee"],
+                "mode": it["mode"],
+                "forecast": forecast_for_date(land, ta, tm_fc, exam_date),
+            }
+        )
+
+    return FastJSONResponse(
+        {
+            "name": name,
+            "sido": sido,
+            "locality": locality,
+            "region": region,
+            "tmFc": tm_fc,
+            "has_weather": land is not None and ta is not None,
+            "count": len(itinerary),
+            "itinerary": itinerary,
+            "terminal_count": len(terminals),
+            "terminals": terminals,
+        }
+    )
+
+
+# -------------------------
+# 8) 실시간 알림 (Server-Sent Events)
+# -------------------------
+# 예보는 06/18시 발표 때만, 일정은 가끔만 바뀌는데 페이지 열어둔 클라이언트가 계속 다시 조회함
+# → /events 로 구독해두면 바뀔 때만 서버가 밀어줌 (그 사이엔 15초마다 주석 한 줄뿐)
+# 토픽: weather:{지역}, schedule:{자격증 이름}, exam-schedule, dataset
+# 이벤트 허브는 프로세스 안에만 있음 → 여러 워커로 띄우면
+# - weather / exam-schedule 은 백그라운드 작업을 도는 워커(BACKGROUND_JOBS=1)에 붙은 연결만 받음
+# - dataset / schedule 은 각 워커가 자기 리로드 때 따로 보냄
+#   → /events 는 BACKGROUND_JOBS=1 인 워커 하나로만 라우팅하거나 워커 1개로 띄울 것
+EVENTS_QUEUE_SIZE = 64          # 구독자별 밀린 이벤트 최대 개수 (넘치면 끊고 재접속하게 함)
+EVENTS_REPLAY_SIZE = 256        # 재접속(Last-Event-ID) 때 다시 보내줄 최근 이벤트 수
+EVENTS_KEEPALIVE = 15.0         # 아무 이벤트 없을 때 연결 유지용 주석 간격(초)
+EVENTS_RETRY_MS = 3000          # 끊겼을 때 브라우저 EventSource 재접속 간격
+
+
+class EventSubscriber:
+    """SSE 연결 하나 (이벤트 루프 안에서만 큐를 만짐)"""
+
+    def __init__(self, topics: set, loop):
+        self.topics = topics
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def offer(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 너무 느린 클라이언트 → 끊고 Last-Event-ID로 다시 받게
+            self.overflowed = True
+
+
+class EventHub:
+    """
+    토픽별 구독자에게 이벤트 뿌리기
+    - publish는 백그라운드 스레드에서 불러도 됨 (각 구독자 루프로 넘겨서 넣음)
+    - 토픽별 마지막 내용 해시를 기억해서 같은 내용은 다시 안 보냄
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+        self._recent = deque(maxlen=EVENTS_REPLAY_SIZE)
+        self._last_digest = {}
+        self._seq = 0
+
+    def subscribe(self, topics: set, last_event_id: Optional[int] = None):
+        sub = EventSubscriber(topics, asyncio.get_running_loop())
+        with self._lock:
+            self._subscribers.add(sub)
+            missed = [
+                ev for ev in self._recent
+                if last_event_id is not None and ev["id"] > last_event_id and ev["topic"] in topics
+            ]
+        for ev in missed:
+            sub.offer(ev)
+        return sub
+
+    def unsubscribe(self, sub: EventSubscriber):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def has_baseline(self, topic: str) -> bool:
+        with self._lock:
+            return topic in self._last_digest
+
+    def set_baseline(self, topic: str, data):
+        """구독을 시작할 때의 내용을 dedupe 기준으로 기억 (이미 있으면 그대로, 이벤트는 안 보냄)"""
+        digest = hashlib.sha1(dump_json(data)).hexdigest()
+        with self._lock:
+            self._last_digest.setdefault(topic, digest)
+
+    def subscribed_topics(self) -> set:
+        with self._lock:
+            return set().union(*(sub.topics for sub in self._subscribers))
+
+    def publish(self, topic: str, data, dedupe: bool = False) -> bool:
+        """이벤트 발행 (dedupe=True면 같은 토픽에 직전과 같은 내용이면 건너뜀)"""
+        body = dump_json(data).decode("utf-8")
+        with self._lock:
+            if dedupe:
+                digest = hashlib.sha1(dump_json(data)).hexdigest()
+                if self._last_digest.get(topic) == digest:
+                    return False
+                self._last_digest[topic] = digest
+            self._seq += 1
+            event = {"id": self._seq, "topic": topic, "data": body}
+            self._recent.append(event)
+            targets = [sub for sub in self._subscribers if topic in sub.topics]
+
+        for sub in targets:
+            try:
+                sub.loop.call_soon_threadsafe(sub.offer, event)
+            except RuntimeError:    # 루프가 이미 닫힘 (서버 종료 중)
+                pass
+        return True
+
+
+EVENT_HUB = EventHub()
+
+
+def format_sse(event: dict) -> bytes:
+    return f"id: {event['id']}\nevent: {event['topic']}\ndata: {event['data']}\n\n".encode("utf-8")
+
+
+def publish_mid_weather(tm_fc: str):
+    """새 tmFc 프리워밍이 끝나면 구독 중인 지역만 캐시에서 꺼내 알림 (공공 API 추가 호출 없음)"""
+    topics = EVENT_HUB.subscribed_topics()
+    for region, land_reg_id in WEATHER_LAND_REGION_MAP.items():
+        if f"weather:{region}" not in topics:
+            continue
+        temp_reg_id = WEATHER_TEMP_REGION_MAP[region]
+        land = get_mid_land_cached(land_reg_id, tm_fc)
+        ta = get_mid_ta_cached(temp_reg_id, tm_fc)
+        EVENT_HUB.publish(f"weather:{region}", build_mid_weather(region, land_reg_id, tm_fc, land, ta), dedupe=True)
+
+
+def schedule_event_payload(name: str) -> dict:
+    items = query_license_items_by_name(name)
+    return {
+        "name": name,
+        "count": len(items),
+        "results": license_round_rows(items, ("label", "round", "appDate", "examDate", "fee", "mode")),
+    }
+
+
+def publish_dataset_changes(state: DatasetState):
+    """TTL 데이터셋이 새 버전으로 바뀌면 dataset 알림 + 구독 중인 자격증 일정이 바뀌었으면 알림"""
+    EVENT_HUB.publish("dataset", {"version": state.version, "fingerprint": state.fingerprint})
+    for topic in sorted(EVENT_HUB.subscribed_topics()):
+        if topic.startswith("schedule:"):
+            name = topic[len("schedule:"):]
+            EVENT_HUB.publish(topic, schedule_event_payload(name), dedupe=True)
+
+
+DATASET_RELOAD_HOOKS.append(publish_dataset_changes)
+
+
+@app.get("/events")
+async def stream_events(
+    request: Request,
+    regions: Optional[List[str]] = Query(None, description="예보 받을 지역들 (예: regions=수도권,제주도)"),
+    licenses: Optional[List[str]] = Query(None, description="일정 변경 받을 자격증 이름들 (예: licenses=세무사)"),
+):
+    """
+    SSE 구독 엔드포인트
+    - 구독한 지역 예보가 새로 발표되면 event: weather:{지역}
+    - 구독한 자격증 일정이 바뀌면 event: schedule:{이름}
+    - 시험일정 API 스냅샷/TTL 데이터셋이 바뀌면 event: exam-schedule / dataset
+    - 접속하자마자 캐시에 있는 현재 예보는 바로 한 번 보내줌
+    - 재접속 시 Last-Event-ID 이후 놓친 이벤트를 다시 보내줌
+    - 워커가 여러 개면 BACKGROUND_JOBS=1 인 워커로만 보내야 예보/시험일정 알림을 받음
+    예) /events?regions=수도권&licenses=세무사
+    """
+    region_names = split_query_list(regions)
+    for region in region_names:
+        resolve_weather_region(region)      # 모르는 지역이면 400
+    license_names = split_query_list(licenses)
+
+    topics = {"exam-schedule", "dataset"}
+    topics.update(f"weather:{r}" for r in region_names)
+    topics.update(f"schedule:{n}" for n in license_names)
+
+    # 처음 구독되는 자격증은 지금 일정을 기준으로 잡아둬야 다음 리로드 때 안 바뀌었으면 안 보냄
+    for name in license_names:
+        topic = f"schedule:{name}"
+        if not EVENT_HUB.has_baseline(topic):
+            try:
+                EVENT_HUB.set_baseline(topic, await run_in_threadpool(schedule_event_payload, name))
+            except requests.RequestException as e:
+                logger.warning("일정 알림 기준 조회 실패: %s (%s)", name, e)
+
+    last_event_id = request.headers.get("last-event-id")
+    sub = EVENT_HUB.subscribe(topics, int(last_event_id) if (last_event_id or "").isdigit() else None)
+
+    tm_fc = get_mid_tmfc()
+    initial = []
+    for region in region_names:
+        land_reg_id, temp_reg_id = resolve_weather_region(region)
+        if weather_is_cached("land", land_reg_id, tm_fc) and weather_is_cached("ta", temp_reg_id, tm_fc):
+            land = get_mid_land_cached(land_reg_id, tm_fc)
+            ta = get_mid_ta_cached(temp_reg_id, tm_fc)
+            initial.append((f"weather:{region}", build_mid_weather(region, land_reg_id, tm_fc, land, ta)))
+
+    async def stream():
+        try:
+            yield f"retry: {EVENTS_RETRY_MS}\n\n".encode("utf-8")
+            for topic, data in initial:
+                yield f"event: {topic}\ndata: {dump_json(data).decode('utf-8')}\n\n".encode("utf-8")
+            while not sub.overflowed:
+                try:
+                    event = await asyncio.wait_for(sub.queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield b": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            EVENT_HUB.unsubscribe(sub)
+
+    # 압축/ETag/동시 실행 제한 미들웨어는 이 경로를 건드리지 않음 (정책 목록에 없음, event-stream 제외)
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# -------------------------
+# 9) 변경 피드 (시험 회차 단위 CDC)
+# -------------------------
+# 시험일정 API 스냅샷 / TTL 데이터셋이 바뀌었는지 알려면 지금은 전부 다시 받아서 비교해야 함
+# → 회차 하나를 레코드 하나로 보고 내용 지문을 기억해뒀다가 달라진 것만 변경 로그에 남김
+#   /changes?since=<version> 으로 그 뒤 바뀐 회차만 받아가면 됨
+# - 같은 레코드가 또 바뀌면 예전 변경 기록은 지움 (로그 크기 = 레코드 수 + 삭제 표시)
+# - 삭제 표시(tombstone)는 CHANGES_TOMBSTONE_TTL 지나면 지우고, 그보다 오래된 since는 410
+CHANGES_DB_PATH = os.path.join(BACKEND_DATA_DIR, "changes.sqlite3")
+CHANGES_CAPTURE_INTERVAL = 10 * 60          # 스냅샷/데이터셋 전체 다시 대조하는 주기(초)
+CHANGES_TOMBSTONE_TTL = 30 * 24 * 60 * 60   # 삭제 표시 보관 기간(초)
+CHANGES_MAX_LIMIT = 5000
+CHANGE_SOURCES = ("exam-schedule", "license-rounds")
+
+
+class ChangeLog:
+    """
+    레코드 지문 + 변경 로그 (sqlite, 여러 워커 프로세스가 같이 씀)
+    - apply(source, scope, records): scope 안의 레코드 전체를 받아서 이전과 비교
+      (scope에 있었는데 이번에 없는 레코드는 삭제로 기록)
+    - 같은 내용으로 여러 워커가 동시에 apply 해도 한 번만 기록됨 (BEGIN IMMEDIATE)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self.local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.executescript(
+                "CREATE TABLE IF NOT EXISTS records ("
+                " source TEXT, scope TEXT, key TEXT, fingerprint TEXT, PRIMARY KEY (source, key));"
+                "CREATE INDEX IF NOT EXISTS records_scope ON records (source, scope);"
+                "CREATE TABLE IF NOT EXISTS changes ("
+                " version INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " source TEXT, key TEXT, op TEXT, data TEXT, changed_at REAL);"
+                "CREATE INDEX IF NOT EXISTS changes_key ON changes (source, key);"
+                "CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);"
+            )
+            self.local.conn = conn
+        return conn
+
+    def apply(self, source: str, scope: str, records: dict) -> int:
+        """records: {키: 내용 dict} → 기록한 변경 수"""
+        fingerprints = {
+            key: hashlib.sha1(dump_json(data)).hexdigest()[:16] for key, data in records.items()
+        }
+        now = time.time()
+
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = dict(
+                conn.execute(
+                    "SELECT key, fingerprint FROM records WHERE source = ? AND scope = ?", (source, scope)
+                )
+            )
+            changed = [(k, "upsert") for k, fp in fingerprints.items() if known.get(k) != fp]
+            changed += [(k, "delete") for k in known if k not in fingerprints]
+
+            for key, op in changed:
+                conn.execute("DELETE FROM changes WHERE source = ? AND key = ?", (source, key))
+                if op == "upsert":
+                    conn.execute(
+                        "INSERT OR REPLACE INTO records (source, scope, key, fingerprint) VALUES (?, ?, ?, ?)",
+                        (source, scope, key, fingerprints[key]),
+                    )
+                    data = dump_json(records[key]).decode("utf-8")
+                else:
+                    conn.execute("DELETE FROM records WHERE source = ? AND key = ?", (source, key))
+                    data = None
+                conn.execute(
+                    "INSERT INTO changes (source, key, op, data, changed_at) VALUES (?, ?, ?, ?, ?)",
+                    (source, key, op, data, now),
+                )
+            self._prune_tombstones(conn, now)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(changed)
+
+    def _prune_tombstones(self, conn, now: float):
+        """오래된 삭제 표시 정리 → 그 버전까지는 since로 이어받을 수 없음(floor)"""
+        cutoff = now - CHANGES_TOMBSTONE_TTL
+        (pruned,) = conn.execute(
+            "SELECT MAX(version) FROM changes WHERE op = 'delete' AND changed_at < ?", (cutoff,)
+        ).fetchone()
+        if pruned is None:
+            return
+        conn.execute("DELETE FROM changes WHERE op = 'delete' AND changed_at < ?", (cutoff,))
+        conn.execute(
+            "INSERT INTO meta (name, value) VALUES ('floor', ?)"
+            " ON CONFLICT(name) DO UPDATE SET value = MAX(value, excluded.value)",
+            (pruned,),
+        )
+
+    def since(self, version: int, limit: int, sources) -> dict:
+        conn = self._conn()
+        floor = conn.execute("SELECT value FROM meta WHERE name = 'floor'").fetchone()
+        if version and floor and version < floor[0]:
+            raise HTTPException(
+                status_code=410,
+                detail=f"since={version} 이후 삭제 기록이 정리됨. since 없이 전체를 다시 받아주세요.",
+            )
+        current = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'changes'").fetchone()
+        current = current[0] if current else 0
+
+        marks = ", ".join("?" for _ in sources)
+        rows = conn.execute(
+            "SELECT version, source, key, op, data, changed_at FROM changes"
+            f" WHERE version > ? AND source IN ({marks}) ORDER BY version LIMIT ?",
+            (version, *sources, limit + 1),
+        ).fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "since": version,
+            # 다음 요청 때 since로 넘길 값
+            "version": rows[-1][0] if has_more else max(current, version),
+            "has_more": has_more,
+            "count": len(rows),
+            "changes": [
+                {
+                    "version": v,
+                    "source": source,
+                    "key": key,
+                    "op": op,
+                    "data": json.loads(data) if data is not None else None,
+                    "changed_at": datetime.fromtimestamp(changed_at).isoformat(timespec="seconds"),
+                }
+                for v, source, key, op, data, changed_at in rows
+            ],
         }
 
-    return {
-        "region": region,
-        "regId": land_reg_id,
-        "tmFc": tm_fc,
-        "has_data": True,
-        "summary_day4": summary_day4,
-        "land_raw": land,
-        "temp_raw": ta,
-    }
-    
 
-@app.get("/exam-centers")
-def get_exam_centers(
-    brch_cd: str = Query(..., description="지사코드 (예: 01=서울, 10=경기, 18=제주 등)"),
-    page: int = Query(1, ge=1, description="페이지 번호"),
-    per_page: int = Query(50, ge=1, le=100, description="페이지 당 개수"),
+CHANGE_LOG = ChangeLog(CHANGES_DB_PATH)
+
+
+def capture_exam_schedule_changes(year: int, qualgb_cd: str, snapshot: dict):
+    """시험일정 스냅샷 하나 → 회차(implYy, qualgbCd, implSeq, description)별 레코드로 대조"""
+    records = {}
+    for item in snapshot["items"]:
+        base = f"{item.get('implYy')}:{item.get('qualgbCd')}:{item.get('implSeq')}:{item.get('description', '')}"
+        key, n = base, 1
+        while key in records:       # 같은 회차 키가 또 나오면 순번 붙여서 구분
+            n += 1
+            key = f"{base}#{n}"
+        records[key] = format_exam_schedule_item(item)
+    try:
+        count = CHANGE_LOG.apply("exam-schedule", f"{year}:{qualgb_cd}", records)
+    except Exception:
+        logger.exception("시험일정 변경 기록 실패: %s/%s", year, qualgb_cd)
+        return
+    if count:
+        logger.info("시험일정 변경 %d건 기록: %s/%s", count, year, qualgb_cd)
+
+
+def capture_license_round_changes(state: DatasetState):
+    """TTL 데이터셋의 자격증 회차 전체 → (자격증 URI, 회차)별 레코드로 대조"""
+    items = query_license_items_by_name(None)
+    records = {}
+    for it, row in zip(items, license_round_rows(items, LICENSE_ROUND_FIELDS)):
+        records[f"{it['uri']}#{it['round']}"] = {"uri": it["uri"], **row}
+    count = CHANGE_LOG.apply("license-rounds", "", records)
+    if count:
+        logger.info("자격증 회차 변경 %d건 기록 (데이터셋 v%d)", count, state.version)
+
+
+DATASET_RELOAD_HOOKS.append(capture_license_round_changes)
+
+
+def capture_all_changes():
+    """메모리에 있는 시험일정 스냅샷 + 현재 데이터셋 전체 다시 대조 (놓친 변경 보정용)"""
+    for (year, qualgb_cd), snapshot in list(_EXAM_SCHEDULE_SNAPSHOTS.items()):
+        capture_exam_schedule_changes(year, qualgb_cd, snapshot)
+    if DATASET is not None:
+        capture_license_round_changes(DATASET)
+
+
+@app.on_event("startup")
+def start_change_capture():
+    run_periodic("change-capture", CHANGES_CAPTURE_INTERVAL, capture_all_changes, initial_delay=60)
+
+
+@app.get("/changes")
+def get_changes(
+    since: int = Query(0, ge=0, description="이전 응답의 version (없으면 처음부터 = 현재 전체)"),
+    limit: int = Query(500, ge=1, le=CHANGES_MAX_LIMIT, description="한 번에 받을 변경 수"),
+    source: Optional[List[str]] = Query(None, description="exam-schedule / license-rounds (없으면 전부)"),
 ):
     """
-    국가자격시험 시험장소 정보를 조회해서 JSON으로 반환
-    예) /exam-centers?brch_cd=01  (서울 지역 시험장 목록)
+    시험 회차 변경 피드
+    - since 뒤로 바뀐(upsert)/없어진(delete) 회차만, version 순서대로
+    - 응답의 version을 다음 since로 넘기면 이어받기 (has_more면 바로 다시 요청)
+    - since=0 이면 지금 있는 회차 전체 + 최근 삭제 표시
+    예) /changes?since=1200
+    예) /changes?since=0&source=exam-schedule&limit=1000
     """
-    xml_text = call_exam_area_api(brch_cd, page=page, per_page=per_page)
-    results, total_count = parse_exam_area_xml(xml_text)
+    sources = split_query_list(source) or list(CHANGE_SOURCES)
+    unknown = [s for s in sources if s not in CHANGE_SOURCES]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"source는 {', '.join(CHANGE_SOURCES)} 중에서: {', '.join(unknown)}",
+        )
+    return FastJSONResponse(CHANGE_LOG.since(since, limit, sources))
 
-    return {
-        "brch_cd": brch_cd,
-        "page": page,
-        "per_page": per_page,
-        "total_count": total_count,
-        "count": len(results),
-        "results": results,
-    }
 
-def get_mid_tmfc() -> str:
-    """
-    중기예보 발표시각(tmFc) 계산
-    - 매일 06시, 18시에 발표 → 지금 시각 기준으로 가장 최근 발표 시각을 구함
-    - 예: 2025-12-07 09시라면 202512070600
-    """
-    now = datetime.now()
-    hour = now.hour
+# -------------------------
+# 과부하 보호 (경로별 동시 실행 제한 + 대기열 + 조기 503)
+# -------------------------
+# 핸들러가 전부 sync라 Starlette 스레드풀 하나를 같이 씀
+# → 느린 /exam-centers, /weather 가 몰리면 /licenses/search 까지 같이 막힘
+# 그래서 경로 그룹별로 동시 실행 수/대기열을 따로 두고, 넘치면 바로 503 + Retry-After
+ADMISSION_THREADPOOL_SIZE = 64
+# (경로 prefix, 그룹 이름, 동시 실행 최대, 대기열 최대, 대기 최대 초, 우선순위) - 위에서부터 먼저 맞는 것
+ADMISSION_GROUPS = [
+    ("/licenses/search", "search", 16, 64, 3.0, "interactive"),
+    ("/licenses/", "licenses", 12, 32, 3.0, "interactive"),
+    ("/terminals/", "terminals", 8, 32, 3.0, "interactive"),
+    ("/exam-centers", "exam_centers", 6, 12, 1.0, "bulk"),
+    ("/weather/", "weather", 8, 16, 1.0, "bulk"),
+    ("/itinerary", "itinerary", 4, 8, 1.0, "bulk"),
+    ("/exam-schedule", "exam_schedule", 4, 8, 1.0, "bulk"),
+]
+# 전체 실행 중인 요청이 이만큼 넘으면 bulk 그룹은 줄 세우지 않고 바로 거절
+ADMISSION_BULK_SHED_THRESHOLD = 40
+ADMISSION_RETRY_AFTER = 1
 
-    if hour < 6:
-        base = now - timedelta(days=1)
-        base_hour = 18
-    elif hour < 18:
-        base = now
-        base_hour = 6
-    else:
-        base = now
-        base_hour = 18
 
-    return base.strftime("%Y%m%d") + f"{base_hour:02d}00"
+class AdmissionGate:
+    """경로 그룹 하나의 동시 실행 제한 (이벤트 루프 안에서만 사용)"""
 
-def call_mid_land_fcst(reg_id: str, tm_fc: str):
-    """
-    중기육상예보조회(getMidLandFcst) 호출
-    - 입력: regId(예보구역 코드), tmFc(발표시각)
-    - 출력: 해당 지역 예보 item(dict) 또는 None
-    """
-    params = {
-        "serviceKey": EXAM_API_KEY,   # 동일한 개인 키 사용
-        "numOfRows": "10",
-        "pageNo": "1",
-        "dataType": "JSON",
-        "regId": reg_id,
-        "tmFc": tm_fc,
-    }
+    def __init__(self, name: str, limit: int, max_queue: int, max_wait: float, priority: str):
+        self.name = name
+        self.limit = limit
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.priority = priority
+        self.sem = asyncio.Semaphore(limit)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.shed = 0
 
-    res = requests.get(WEATHER_MID_LAND_URL, params=params, timeout=10)
-    res.raise_for_status()
-    data = res.json()
+    async def acquire(self, allow_queue: bool = True) -> bool:
+        if self.sem.locked():
+            # 빈 자리가 없으면 대기열에 줄 서기 (대기열도 꽉 찼으면 바로 거절)
+            if not allow_queue or self.waiting >= self.max_queue:
+                self.shed += 1
+                return False
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self.sem.acquire(), self.max_wait)
+            except asyncio.TimeoutError:
+                self.shed += 1
+                return False
+            finally:
+                self.waiting -= 1
+        else:
+            await self.sem.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+        return True
 
-    body = data.get("response", {}).get("body", {})
-    items = body.get("items", {}).get("item", [])
+    def release(self):
+        self.in_flight -= 1
+        self.sem.release()
 
-    if isinstance(items, dict):
-        items = [items]
+    def snapshot(self) -> dict:
+        return {
+            "priority": self.priority,
+            "limit": self.limit,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "shed": self.shed,
+        }
 
-    if not items:
-        return None
 
-    return items[0]   # 보통 1건만 옴
+ADMISSION_GATES = {
+    prefix: AdmissionGate(name, limit, max_queue, max_wait, priority)
+    for prefix, name, limit, max_queue, max_wait, priority in ADMISSION_GROUPS
+}
 
 
-def call_mid_ta(reg_id: str, tm_fc: str):
-    """
-    중기기온조회(getMidTa) 호출
-    - 입력: regId, tmFc
-    - 출력: 해당 지역 기온 item(dict) 또는 None
-    """
-    params = {
-        "serviceKey": EXAM_API_KEY,
-        "numOfRows": "10",
-        "pageNo": "1",
-        "dataType": "JSON",
-        "regId": reg_id,
-        "tmFc": tm_fc,
-    }
+def find_admission_gate(path: str) -> Optional[AdmissionGate]:
+    for prefix, gate in ADMISSION_GATES.items():
+        if path.startswith(prefix):
+            return gate
+    return None
 
-    res = requests.get(WEATHER_MID_TA_URL, params=params, timeout=10)
-    res.raise_for_status()
-    data = res.json()
 
-    body = data.get("response", {}).get("body", {})
-    items = body.get("items", {}).get("item", [])
+@app.on_event("startup")
+def configure_threadpool():
+    # 그룹별 제한 합이 스레드풀 크기 안에 들어오게 기본값(40)보다 늘려둠
+    anyio.to_thread.current_default_thread_limiter().total_tokens = ADMISSION_THREADPOOL_SIZE
 
-    if isinstance(items, dict):
-        items = [items]
 
-    if not items:
-        return None
+@app.get("/stats/admission")
+def get_admission_stats():
+    """
+    경로 그룹별 실행 중/대기 중 요청 수와 거절(503) 횟수
+    """
+    return FastJSONResponse(
+        {
+            "total_in_flight": sum(g.in_flight for g in ADMISSION_GATES.values()),
+            "groups": {gate.name: gate.snapshot() for gate in ADMISSION_GATES.values()},
+        }
+    )
 
-    return items[0]
 
-@app.get("/terminals/regions")
-def get_terminal_regions():
+@app.middleware("http")
+async def admission_control_middleware(request: Request, call_next):
     """
-    터미널이 존재하는 시/도 목록 조회
-    예: ["경기도", "서울특별시", "전라남도", ...]
+    경로 그룹별 동시 실행 제한
+    - 자리가 없으면 대기열에서 잠깐 기다리고, 그래도 안 되면 타임아웃 대신 바로 503
+    - 전체가 붐비면 bulk(느린 조회) 그룹부터 대기 없이 거절해서 검색 쪽 자리를 지킴
     """
-    query = """
-PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
-PREFIX schema: <http://schema.org/>
+    gate = find_admission_gate(request.url.path)
+    if gate is None:
+        return await call_next(request)
 
-SELECT DISTINCT ?regionName
-WHERE {
-  ?terminal a koqu:Terminal ;
-            schema:addressRegion ?region .
-  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
-}
-ORDER BY ?regionName
-"""
-    data = run_sparql(query)
-    regions = [b["regionName"]["value"] for b in data["results"]["bindings"]]
+    allow_queue = True
+    if gate.priority == "bulk":
+        total = sum(g.in_flight for g in ADMISSION_GATES.values())
+        allow_queue = total < ADMISSION_BULK_SHED_THRESHOLD
 
-    return {
-        "count": len(regions),
-        "regions": regions,
-    }
+    if not await gate.acquire(allow_queue):
+        return FastJSONResponse(
+            {"detail": f"요청이 많아서 잠시 후 다시 시도해 주세요 ({gate.name})"},
+            status_code=503,
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
+    try:
+        return await call_next(request)
+    finally:
+        gate.release()
 
 
-@app.get("/terminals/localities")
-def get_terminal_localities(
-    sido: str = Query(..., description="시/도 이름 (예: 경기도, 서울특별시, 전라남도)")
-):
+# -------------------------
+# 조건부 GET (ETag / Cache-Control)
+# -------------------------
+# (경로 prefix, 검증자 종류, max-age 초) - 위에서부터 먼저 맞는 것 사용
+# - dataset: TTL 데이터 버전 → 핸들러 실행 전에 ETag 계산 가능
+# - tmfc: 요청한 지역 예보가 전부 캐시에 있으면 발표시각 → 핸들러 실행 전에 계산 가능 (아니면 본문 해시)
+# - exam_centers: 시험장소 스냅샷 버전 → 핸들러 실행 전에 계산 가능
+# - nearest: 데이터 버전 (+ exam_center 기준이면 시험장소 스냅샷 버전)
+# - payload: 응답 본문 해시 (본문은 만들어야 하지만 전송은 생략)
+CACHE_POLICIES = [
+    ("/weather/", "tmfc", 600),          # 실제 max-age는 다음 발표시각까지 남은 시간과 비교해 작은 값
+    ("/terminals/nearest", "nearest", 60 * 60),   # exam_center 기준 좌표는 시험장소 크롤링마다 바뀜
+    ("/terminals/", "dataset", 24 * 60 * 60),
+    ("/licenses/", "dataset", 60 * 60),
+    ("/exam-centers", "exam_centers", 60 * 60),
+    ("/exam-schedule", "payload", 60 * 60),
+    ("/itinerary", "payload", 0),
+]
+DATASET_VERSION_CHECK_INTERVAL = 2.0   # TTL 파일 stat은 2초에 한 번만
+
+_dataset_version_cache = {"checked": 0.0, "version": None}
+
+
+def dataset_version() -> str:
     """
-    선택한 시/도 안에 터미널이 존재하는 시/군/구 목록 조회
-    예: /terminals/localities?sido=경기도
+    ETag용 데이터 버전 문자열
+    - 핫 리로드로 올라간 버전이 있으면 그 버전 번호 + 지문
+    - 아직 없으면 file/*.ttl 지문 (stat은 2초에 한 번만)
     """
-    sido_lit = escape_literal(sido)
+    state = DATASET
+    if state is not None:
+        return f"v{state.version}-{state.fingerprint}"
 
-    query = f"""
-PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
-PREFIX schema: <http://schema.org/>
+    now = time.monotonic()
+    if now - _dataset_version_cache["checked"] >= DATASET_VERSION_CHECK_INTERVAL:
+        _dataset_version_cache.update(checked=now, version=dataset_fingerprint())
+    return _dataset_version_cache["version"]
 
-SELECT DISTINCT ?localName
-WHERE {{
-  ?terminal a koqu:Terminal ;
-            schema:addressRegion ?region ;
-            schema:addressLocality ?locality .
-  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
-  BIND(REPLACE(STR(?locality), ".*/", "") AS ?localName)
-  FILTER(?regionName = "{sido_lit}")
-}}
-ORDER BY ?localName
-"""
-    data = run_sparql(query)
-    localities = [b["localName"]["value"] for b in data["results"]["bindings"]]
 
-    return {
-        "sido": sido,
-        "count": len(localities),
-        "localities": localities,
-    }
-    
-@app.get("/terminals/by-region")
-def get_terminals_by_region(
-    sido: str = Query(..., description="시/도 이름 (예: 경기도, 서울특별시)"),
-    locality: Optional[str] = Query(
-        None,
-        description="시/군/구 이름 (예: 수원시, 서초구, 영광군). 없으면 해당 시/도 전체 터미널 조회",
-    ),
-):
+def find_cache_policy(path: str):
+    for prefix, kind, max_age in CACHE_POLICIES:
+        if path.startswith(prefix):
+            return kind, max_age
+    return None
+
+
+def cache_validator(kind: str, request: Request) -> Optional[str]:
+    """핸들러 실행 없이 알 수 있는 데이터 버전 (없으면 None → 본문 해시 사용)"""
+    if kind == "dataset":
+        return dataset_version()
+    if kind == "tmfc":
+        return weather_cache_validator(request)
+    if kind == "exam_centers":
+        snapshot = EXAM_CENTER_SNAPSHOT
+        return str(snapshot.version) if snapshot is not None else None
+    if kind == "nearest":
+        if "exam_center" not in request.query_params:
+            return dataset_version()
+        snapshot = EXAM_CENTER_SNAPSHOT
+        return f"{dataset_version()}:{snapshot.version}" if snapshot is not None else None
+    return None
+
+
+def weather_cache_validator(request: Request) -> Optional[str]:
     """
-    시/도 + (선택) 시/군/구로 터미널 목록 조회
-    예1) /terminals/by-region?sido=경기도
-    예2) /terminals/by-region?sido=경기도&locality=수원시
+    요청한 지역들의 (regId, tmFc) 예보가 전부 캐시에 있으면 tmFc (없으면 None → 본문 해시)
+    - 같은 tmFc 캐시 항목은 안 바뀌므로 다 들어와 있으면 응답도 그대로
+    - 하나라도 아직 없으면 이번 응답이 캐시를 채우거나 has_data=False 라서 본문으로 비교
     """
-    sido_lit = escape_literal(sido)
-    locality_lit = escape_literal(locality) if locality else None
-
-    if locality_lit:
-        filter_clause = f'FILTER(?regionName = "{sido_lit}" && ?localName = "{locality_lit}")'
+    if request.url.path == "/weather/mid":
+        regions = [request.query_params.get("region")]
+    elif request.url.path == "/weather/mid/all":
+        regions = split_query_list(request.query_params.getlist("regions")) or list(WEATHER_LAND_REGION_MAP)
     else:
-        filter_clause = f'FILTER(?regionName = "{sido_lit}")'
+        return None
+    tm_fc = request.query_params.get("tm_fc") or get_mid_tmfc()
+    for region in regions:
+        land_reg_id = WEATHER_LAND_REGION_MAP.get(region)
+        temp_reg_id = WEATHER_TEMP_REGION_MAP.get(region)
+        if not land_reg_id or not temp_reg_id:
+            return None
+        if not (weather_is_cached("land", land_reg_id, tm_fc) and weather_is_cached("ta", temp_reg_id, tm_fc)):
+            return None
+    return tm_fc
 
-    query = f"""
-PREFIX koqu: <https://knowledgemap.kr/koqu/def/>
-PREFIX schema: <http://schema.org/>
 
-SELECT ?terminal ?id ?name ?street ?regionName ?localName ?neighborhoodName ?tel ?url
-WHERE {{
-  ?terminal a koqu:Terminal ;
-            schema:identifier ?id ;
-            schema:name ?name ;
-            schema:streetAddress ?street ;
-            schema:addressRegion ?region ;
-            schema:addressLocality ?locality .
-  OPTIONAL {{ ?terminal schema:addressNeighborhood ?neighborhood . }}
-  OPTIONAL {{ ?terminal schema:telephone ?tel . }}
-  OPTIONAL {{ ?terminal schema:url ?url . }}
+def cache_control_header(kind: str, max_age: int) -> str:
+    if kind == "tmfc":
+        until_next = int((next_mid_publication() - datetime.now()).total_seconds())
+        max_age = max(0, min(max_age, until_next))
+    if max_age <= 0:
+        return "no-cache"
+    return f"public, max-age={max_age}"
 
-  BIND(REPLACE(STR(?region), ".*/", "") AS ?regionName)
-  BIND(REPLACE(STR(?locality), ".*/", "") AS ?localName)
-  BIND(IF(BOUND(?neighborhood),
-          REPLACE(STR(?neighborhood), ".*/", ""),
-          ""
-  ) AS ?neighborhoodName)
 
-  {filter_clause}
-}}
-ORDER BY ?name
-"""
-    data = run_sparql(query)
+def make_etag(*parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode())
+        h.update(b"\0")
+    return f'"{h.hexdigest()[:32]}"'
 
-    results = []
-    for b in data["results"]["bindings"]:
-        street = b["street"]["value"]
-        sido_name = b.get("regionName", {}).get("value")
-        locality_name = b.get("localName", {}).get("value")
-        neighborhood_name = b.get("neighborhoodName", {}).get("value")
 
-        address_parts: List[str] = []
-        for val in [sido_name, locality_name, neighborhood_name, street]:
-            if val:
-                address_parts.append(val)
-        address = " ".join(address_parts)
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 헤더(여러 개, W/ 포함 가능)와 ETag 비교"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        # 압축 응답에는 "...-gz" / "...-br" 로 붙여서 내보내므로 떼고 비교
+        for suffix in COMPRESSED_ETAG_SUFFIXES.values():
+            if candidate.endswith(f'{suffix}"'):
+                candidate = candidate[: -len(suffix) - 1] + '"'
+                break
+        if candidate == etag:
+            return True
+    return False
 
-        results.append(
-            {
-                "uri": b["terminal"]["value"],
-                "id": b["id"]["value"],
-                "name": b["name"]["value"],
-                "streetAddress": street,
-                "address": address,
-                "sido": sido_name,
-                "locality": locality_name,
-                "neighborhood": neighborhood_name,
-                "telephone": b.get("tel", {}).get("value"),
-                "url": b.get("url", {}).get("value"),
-                # 프론트 요구 필드 호환을 위한 기본값들
-                "type": "버스터미널",
-                "lat": None,
-                "lon": None,
-                "routes": None,
-            }
-        )
 
-    return {
-        "sido": sido,
-        "locality": locality,
-        "count": len(results),
-        "results": results,
-    }
-    
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
 
-    
-# -------------------------
-# 4) 응시 수수료 조회 API
-# -------------------------
-@app.get("/licenses/fee")
-def get_license_fee(name: str):
+
+@app.middleware("http")
+async def conditional_get_middleware(request: Request, call_next):
     """
-    ✅ fake_data_v3.ttl 에서 자격증 응시 수수료 조회
-    - 같은 TTL 데이터에서 fee 필드만 중심으로 뽑아서 돌려줌
+    읽기 API에 ETag / Cache-Control 붙이고 If-None-Match 맞으면 304
+    - 데이터 버전으로 ETag를 알 수 있는 경로는 핸들러를 아예 안 돌리고 304
+    - 나머지는 본문 해시로 비교해서 같으면 본문 없이 304
     """
-    items = query_license_items_by_name(name)
+    policy = find_cache_policy(request.url.path) if request.method == "GET" else None
+    if policy is None:
+        return await call_next(request)
+
+    kind, max_age = policy
+    cache_control = cache_control_header(kind, max_age)
+    if_none_match = request.headers.get("if-none-match")
+
+    version = cache_validator(kind, request)
+    etag = None
+    if version is not None:
+        etag = make_etag(kind, version, request.url.path, str(request.query_params))
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, cache_control)
+
+    response = await call_next(request)
+    if response.status_code != 200:
+        return response
+
+    if etag is not None and cache_validator(kind, request) != version:
+        # 처리하는 동안 데이터 버전이 바뀜 → 이 응답에는 ETag 안 붙임
+        etag = None
+    elif etag is None:
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        etag = make_etag(body)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, cache_control)
+        response = Response(
+            content=body,
+            status_code=response.status_code,
+            headers=dict(response.headers),
+            media_type=response.media_type,
+        )
+
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = cache_control
+    return response
 
-    return {
-        "name": name,
-        "count": len(items),
-        "results": [
-            {
-                "label": it["itemLabel"],
-                "round": it["round"],
-                "fee": it["fee"],
-                "mode": it["mode"],
-                "appDate": it["appDate"],
-                "examDate": it["examDate"],
-            }
-            for it in items
-        ],
-    }
 
 # -------------------------
-# 5) 시험 응시장소 조회 API
+# 응답 압축 (br / gzip 협상)
 # -------------------------
-@app.get("/licenses/sites")
-def get_license_test_sites(name: str):
+COMPRESS_MIN_SIZE = 1024             # 이보다 작은 응답은 압축 안 함
+COMPRESS_GZIP_LEVEL = 5
+COMPRESS_BROTLI_QUALITY = 4          # 실시간 압축용이라 너무 높게 안 잡음
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+COMPRESSED_ETAG_SUFFIXES = {"br": "-br", "gzip": "-gz"}
+
+
+def choose_content_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Accept-Encoding(q값 포함)을 보고 br → gzip 순으로 고르기"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for part in accept_encoding.split(","):
+        token, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[token.strip().lower()] = q
+
+    star = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for encoding in candidates:
+        q = accepted.get(encoding, star)
+        if q > best_q:
+            best, best_q = encoding, q
+    return best
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=COMPRESS_GZIP_LEVEL)
+
+
+@app.middleware("http")
+async def compression_middleware(request: Request, call_next):
     """
-    ✅ fake_data_v3.ttl 기반의 간단한 '시험 정보' 엔드포인트
-    - 현재 TTL에는 실제 장소 정보가 없어서
-      round / examDate / mode 정도만 내려줌.
+    JSON/텍스트 응답을 Accept-Encoding에 맞춰 br 또는 gzip으로 압축
+    - COMPRESS_MIN_SIZE 미만이거나 이미 인코딩된 응답은 그대로
+    - 압축은 CPU 작업이라 스레드풀에서
     """
-    items = query_license_items_by_name(name)
+    response = await call_next(request)
 
-    return {
-        "name": name,
-        "count": len(items),
-        "results": [
-            {
-                "label": it["itemLabel"],
-                "round": it["round"],
-                "examDate": it["examDate"],
-                "mode": it["mode"],
-                "appDate": it["appDate"],
-                "fee": it["fee"],
-            }
-            for it in items
-        ],
-    }
\ No newline at end of file
+    if response.status_code == 304 and "etag" in response.headers:
+        # 304에도 클라이언트가 갖고 있는 압축본과 같은 ETag를 돌려줌
+        response.headers.append("Vary", "Accept-Encoding")
+        encoding = choose_content_encoding(request.headers.get("accept-encoding"))
+        etag = response.headers["etag"]
+        if encoding is not None and etag.endswith('"'):
+            response.headers["etag"] = etag[:-1] + COMPRESSED_ETAG_SUFFIXES[encoding] + '"'
+        return response
+
+    content_type = response.headers.get("content-type", "")
+    if (
+        response.status_code != 200
+        or "content-encoding" in response.headers
+        or not content_type.startswith(COMPRESSIBLE_TYPES)
+        or content_type.startswith("text/event-stream")
+    ):
+        return response
+
+    response.headers.append("Vary", "Accept-Encoding")
+    encoding = choose_content_encoding(request.headers.get("accept-encoding"))
+    content_length = response.headers.get("content-length")
+    if encoding is None or (content_length is not None and int(content_length) < COMPRESS_MIN_SIZE):
+        return response
+
+    body = b"".join([chunk async for chunk in response.body_iterator])
+    headers = dict(response.headers)
+    if len(body) >= COMPRESS_MIN_SIZE:
+        body = await run_in_threadpool(compress_body, body, encoding)
+        headers["content-encoding"] = encoding
+        headers["content-length"] = str(len(body))
+        etag = headers.get("etag")
+        if etag and etag.endswith('"'):
+            headers["etag"] = etag[:-1] + COMPRESSED_ETAG_SUFFIXES[encoding] + '"'
+
+    return Response(content=body, status_code=response.status_code, headers=headers)
+
+
+# 나중에 React(프론트)가 여기로 요청 보낼 거라 CORS 열어두기
+# (맨 마지막에 등록해야 가장 바깥 미들웨어가 돼서 304/503 응답에도 CORS 헤더가 붙음)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],       # 과제용이라 그냥 전체 허용
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
@@ -0,0 +1,144 @@
+"""
+UPSTREAM_MODE=record 로 모아둔 공공 API fixture를 그대로 돌려주는 로컬 대역 서버
+(시험일정 / 시험장소 / 중기육상예보 / 중기기온 → 네트워크·쿼터 없이 반복 측정용)
+
+순서)
+  UPSTREAM_MODE=record uvicorn main:app        # 평소처럼 호출해서 fixture 모으기
+  python replay_server.py --latency upstream   # 대역 서버 (기본 127.0.0.1:8090)
+  UPSTREAM_MODE=replay uvicorn main:app        # 백엔드는 공공 API 대신 여기로 보냄
+
+--latency
+  none      바로 응답 (백엔드 자체 처리량 측정)
+  fixture   그 요청을 녹화할 때 걸린 시간 중 하나를 골라서 기다렸다 응답
+  upstream  같은 API의 녹화 응답시간 전체에서 골라서 기다림
+            (요청별 표본은 적어도 API 단위로 모으면 꼬리 지연까지 재현됨)
+--latency-scale 2.0 이면 지연을 2배로, --seed 주면 매번 같은 지연 순서
+"""
+import argparse
+import base64
+import glob
+import json
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from main import UPSTREAM_FIXTURE_DIR, dump_json, fixture_key, fixture_params, read_json
+
+LATENCY_MODES = ("none", "fixture", "upstream")
+
+
+def load_fixtures(fixture_dir: str):
+    """fixture 디렉터리 → ({키: fixture}, {API 이름: 응답시간 전체})"""
+    fixtures = {}
+    latencies = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*", "*.json"))):
+        fixture = read_json(path)
+        if not fixture or "path" not in fixture:
+            continue
+        if "body_base64" in fixture:
+            fixture["content"] = base64.b64decode(fixture["body_base64"])
+        else:
+            fixture["content"] = (fixture.get("body") or "").encode("utf-8")
+        fixtures[fixture_key(fixture["path"], fixture["params"])] = fixture
+        latencies.setdefault(fixture["name"], []).extend(fixture.get("latencies") or [])
+    return fixtures, latencies
+
+
+class ReplayState:
+    def __init__(self, fixtures: dict, latencies: dict, latency: str, scale: float, seed):
+        self.fixtures = fixtures
+        self.latencies = latencies
+        self.latency = latency
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()   # random.Random은 스레드끼리 같이 쓰면 순서가 섞임
+        self.hits = 0
+        self.misses = 0
+
+    def delay(self, fixture: dict) -> float:
+        if self.latency == "fixture":
+            samples = fixture.get("latencies")
+        elif self.latency == "upstream":
+            samples = self.latencies.get(fixture["name"])
+        else:
+            return 0.0
+        if not samples:
+            return 0.0
+        with self.lock:
+            return self.random.choice(samples) * self.scale
+
+
+def make_handler(state: ReplayState):
+    class ReplayHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query, keep_blank_values=True))
+            fixture = state.fixtures.get(fixture_key(url.path, params))
+
+            if fixture is None:
+                state.misses += 1
+                print(f"fixture 없음: {url.path} {json.dumps(fixture_params(params), ensure_ascii=False)}", file=sys.stderr)
+                self.send_body(404, "application/json", dump_json({"error": "fixture 없음", "path": url.path}))
+                return
+
+            state.hits += 1
+            delay = state.delay(fixture)
+            if delay > 0:
+                time.sleep(delay)
+            self.send_body(fixture["status"], fixture.get("content_type") or "text/plain", fixture["content"])
+
+        def send_body(self, status: int, content_type: str, body: bytes):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # 요청마다 찍으면 부하 테스트 때 로그 출력이 병목이 됨
+            pass
+
+    return ReplayHandler
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="공공 API fixture 재생 서버")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--fixtures", default=UPSTREAM_FIXTURE_DIR, help="fixture 디렉터리")
+    parser.add_argument("--latency", choices=LATENCY_MODES, default="none", help="녹화된 응답시간 재현 방식")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="재현 지연 배율")
+    parser.add_argument("--seed", type=int, default=None, help="지연 표본 뽑는 난수 시드")
+    return parser.parse_args(argv)
+
+
+def main(argv):
+    args = parse_args(argv)
+    fixtures, latencies = load_fixtures(args.fixtures)
+    if not fixtures:
+        print(f"fixture 없음: {args.fixtures} (UPSTREAM_MODE=record 로 먼저 녹화)")
+        return 1
+
+    state = ReplayState(fixtures, latencies, args.latency, args.latency_scale, args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    counts = ", ".join(f"{name} {sum(1 for f in fixtures.values() if f['name'] == name)}개" for name in sorted(latencies))
+    print(f"재생 서버: http://{args.host}:{args.port} ({counts}, 지연={args.latency})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"hit {state.hits}, miss {state.misses}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))